@@ -0,0 +1,78 @@
+"""Micro-benchmark : per-round client overhead of FlowerFabricClient.set_parameters / get_parameters.
+
+Compares the previous exchange (torch.tensor copy per layer + load_state_dict, state_dict rebuilt
+on every get) with the in-place exchange (torch.from_numpy views + copy_ into the model storage),
+for the cifar10 CNN and the LSTM plugin models.
+
+    PYTHONPATH=. python benchmarks/bench_client_parameters.py
+"""
+
+import argparse
+from collections import OrderedDict
+
+import numpy as np
+import torch
+from flwr.common import ndarrays_to_parameters, parameters_to_ndarrays
+
+from bench_common import build_models, print_table, timeit_ms
+
+import pybiscus.core.pybiscus_logger as logm
+from pybiscus.core.logger.multiplelogger.multiplelogger import NullLogger
+from pybiscus.flower_config.config_computecontext import ConfigClientComputeContext
+from pybiscus.flower_fabric.client.flowerfabricclient.flowerfabricclient import FlowerFabricClient
+
+
+def legacy_get_parameters(model):
+    return [val.cpu().numpy() for _, val in model.state_dict().items()]
+
+
+def legacy_set_parameters(model, parameters):
+    params_dict = zip(model.state_dict().keys(), parameters)
+    state_dict = OrderedDict({k: torch.tensor(v) for k, v in params_dict})
+    model.load_state_dict(state_dict, strict=True)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    # the console output is not what is measured
+    logm.console = NullLogger()
+
+    rows = []
+
+    for name, model in build_models().items():
+
+        client = FlowerFabricClient(
+            cid=1, model=model, data=None, num_examples={},
+            conf_fabric=ConfigClientComputeContext(hardware={"accelerator": "cpu", "devices": 1}),
+        )
+        client.model = client.fabric.setup(client.model)
+
+        # what the client receives from the server : deserialized ndarrays
+        global_parameters = ndarrays_to_parameters([ value.cpu().numpy() + 1.0 for value in model.state_dict().values() ])
+
+        def legacy_round():
+            legacy_set_parameters(client.model, parameters_to_ndarrays(global_parameters))
+            return legacy_get_parameters(client.model)
+
+        def inplace_round():
+            client.set_parameters(parameters_to_ndarrays(global_parameters))
+            return client.get_parameters(config={})
+
+        for expected, obtained in zip(legacy_round(), inplace_round()):
+            assert np.array_equal(expected, obtained)
+
+        rows.append((name, "set_parameters", timeit_ms(lambda: legacy_set_parameters(client.model, parameters_to_ndarrays(global_parameters)), args.repeat),
+                                             timeit_ms(lambda: client.set_parameters(parameters_to_ndarrays(global_parameters)), args.repeat)))
+        rows.append((name, "get_parameters", timeit_ms(lambda: legacy_get_parameters(client.model), args.repeat),
+                                             timeit_ms(lambda: client.get_parameters(config={}), args.repeat)))
+        rows.append((name, "round (set + get)", timeit_ms(legacy_round, args.repeat), timeit_ms(inplace_round, args.repeat)))
+
+    print_table("client parameters exchange : copies vs in-place", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Helpers shared by the Pybiscus micro-benchmarks.
+
+Run the benchmarks from the repository root, e.g. :
+
+    PYTHONPATH=. python benchmarks/bench_flatparameters.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+_ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# plugins are imported the way pybiscus-plugins-conf.yml does : by their directory
+for _plugin_dir in ("model", "data"):
+    _path = str(_ROOT_DIR / "pybiscus-plugins" / _plugin_dir)
+    if _path not in sys.path:
+        sys.path.append(_path)
+
+
+def build_models():
+    """the cifar10 CNN and the turbofan LSTM plugin models, with their default configuration"""
+
+    from cnn.lit_cnn import LitCNN
+    from lstm.lit_lstm_regressor import LitLSTMRegressor
+
+    return {
+        "cifar_cnn": LitCNN(input_shape=3, mid_shape=6, n_classes=10, lr=0.001),
+        "lstm":      LitLSTMRegressor(n_features=24, hidden_units=12, lr=0.001),
+    }
+
+
+def timeit_ms(fn, repeat: int = 20, warmup: int = 2) -> float:
+    """median wall time of fn(), in milliseconds"""
+
+    for _ in range(warmup):
+        fn()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000.0)
+
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def print_table(title: str, rows: list[tuple[str, str, float, float]]):
+    """rows of (model, operation, baseline ms, new ms)"""
+
+    print(f"\n{title}")
+    print(f"{'model':<12} {'operation':<28} {'baseline ms':>12} {'new ms':>10} {'speedup':>8}")
+    for model, operation, baseline, new in rows:
+        print(f"{model:<12} {operation:<28} {baseline:>12.3f} {new:>10.3f} {baseline / max(new, 1e-9):>7.2f}x")
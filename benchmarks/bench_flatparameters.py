@@ -0,0 +1,98 @@
+"""Micro-benchmark : flat parameter buffer vs per-layer ndarrays on the server round loop.
+
+Compares, for the cifar10 CNN and the LSTM plugin models :
+- aggregation   : parameters_to_ndarrays + flwr aggregate  vs  streaming fold into a flat buffer
+- evaluation    : parameters_to_ndarrays + copying set_params  vs  deserialize into a reused flat buffer + in-place copy
+- checkpointing : state_dict copy  vs  state_dict of views over the flat buffer
+
+    PYTHONPATH=. python benchmarks/bench_flatparameters.py --clients 20
+"""
+
+import argparse
+from collections import OrderedDict
+
+import numpy as np
+import torch
+from flwr.common import Code, FitRes, Status, ndarrays_to_parameters, parameters_to_ndarrays
+from flwr.server.strategy.aggregate import aggregate as flw_aggregate
+
+from bench_common import build_models, print_table, timeit_ms
+
+from pybiscus.flower.flatparameters import FlatParametersLayout
+from pybiscus.flower.flowerfitresultsaggregator.flowerfitresultsaggregatorusingstreamingweightedaverage.flowerfitresultsaggregatorusingstreamingweightedaverage import pyb_aggregate_streaming
+from pybiscus.flower.utils_server import set_params
+
+
+def legacy_set_params(model, params):
+    """set_params as it was before the flat parameters layer"""
+    params_dict = zip(model.state_dict().keys(), params)
+    state_dict = OrderedDict({k: torch.from_numpy(np.copy(v)) for k, v in params_dict})
+    model.load_state_dict(state_dict, strict=True)
+
+
+def fake_results(model, nb_clients: int):
+    rng = np.random.default_rng(0)
+    results = []
+    for cid in range(nb_clients):
+        ndarrays = [ value.cpu().numpy() + rng.standard_normal(value.shape).astype(np.float32)
+                     for value in model.state_dict().values() ]
+        results.append((cid, FitRes(Status(Code.OK, ""), ndarrays_to_parameters(ndarrays), 100 + cid, {})))
+    return results
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--repeat",  type=int, default=20)
+    args = parser.parse_args()
+
+    rows = []
+
+    for name, model in build_models().items():
+
+        results    = fake_results(model, args.clients)
+        parameters = results[0][1].parameters
+        layout     = FlatParametersLayout.from_module(model)
+        flat       = layout.allocate()
+
+        # --- aggregation
+
+        def legacy_aggregate():
+            return flw_aggregate([ (parameters_to_ndarrays(fit_res.parameters), fit_res.num_examples) for _, fit_res in results ])
+
+        def flat_aggregate():
+            return pyb_aggregate_streaming(results, layout=layout)
+
+        reference, streamed = legacy_aggregate(), flat_aggregate()
+        assert all(np.allclose(a, b, atol=1e-5) for a, b in zip(reference, streamed))
+
+        rows.append((name, f"aggregate ({args.clients} clients)", timeit_ms(legacy_aggregate, args.repeat), timeit_ms(flat_aggregate, args.repeat)))
+
+        # --- server evaluation : Parameters -> model
+
+        def legacy_evaluate_load():
+            legacy_set_params(model, parameters_to_ndarrays(parameters))
+
+        def flat_evaluate_load():
+            set_params(model, layout.views(layout.parameters_to_flat(parameters, out=flat)))
+
+        rows.append((name, "evaluate: load parameters", timeit_ms(legacy_evaluate_load, args.repeat), timeit_ms(flat_evaluate_load, args.repeat)))
+
+        # --- checkpointing : model -> state_dict
+
+        def legacy_checkpoint():
+            return OrderedDict((key, value.detach().clone()) for key, value in model.state_dict().items())
+
+        def flat_checkpoint():
+            return layout.flat_to_state_dict(layout.module_to_flat(model, out=flat))
+
+        rows.append((name, "checkpoint: state_dict", timeit_ms(legacy_checkpoint, args.repeat), timeit_ms(flat_checkpoint, args.repeat)))
+
+        print(f"{name}: {len(layout)} layers, {layout.numel} parameters")
+
+    print_table("flat parameters vs per-layer ndarrays", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Micro-benchmark : epoch time of the cifar10 training DataLoader, torchvision path vs memory-mapped cache.
+
+torchvision path : PIL image -> ToTensor -> Normalize per sample, then default_collate.
+cache path       : whole batches sliced from the uint8 / float16 cache, normalized (and augmented) per batch.
+Both with num_workers=0, with and without augmentation (random crop + horizontal flip).
+
+By default the images are random, cifar10 shaped, served the way torchvision CIFAR10 does;
+with --data-dir the real CIFAR10 datamodule is used (downloaded there if needed).
+
+    PYTHONPATH=. python benchmarks/bench_imagecache.py --samples 10000
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import torch
+import torchvision.transforms as transforms
+from PIL import Image
+from torch.utils.data import DataLoader, Dataset
+
+import bench_common  # noqa: F401 (plugins path)
+
+import pybiscus.core.pybiscus_logger as logm
+from pybiscus.core.logger.multiplelogger.multiplelogger import NullLogger
+from pybiscus.ml.data.imagecache import CachedImageDataset, load_image_cache
+from pybiscus.ml.data.tensorbatchloader import tensor_batch_loader
+
+MEAN = (0.5, 0.5, 0.5)
+STD  = (0.5, 0.5, 0.5)
+
+
+class SyntheticCIFAR10(Dataset):
+    """same __getitem__ as torchvision CIFAR10, over random images"""
+
+    def __init__(self, data: np.ndarray, targets: np.ndarray, transform):
+        self.data, self.targets, self.transform = data, targets, transform
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        img, target = Image.fromarray(self.data[index]), int(self.targets[index])
+        return self.transform(img), target
+
+
+def epoch_seconds(loader, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for images, targets in loader:
+            pass
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def synthetic_loaders(samples: int, batch_size: int, augment: bool, cache_dir: str):
+
+    rng = np.random.default_rng(0)
+    data    = rng.integers(0, 256, size=(samples, 32, 32, 3), dtype=np.uint8)
+    targets = rng.integers(0, 10, size=samples)
+
+    transform = transforms.Compose([transforms.ToTensor(), transforms.Normalize(MEAN, STD)])
+    if augment:
+        transform = transforms.Compose([transforms.RandomCrop(32, padding=4), transforms.RandomHorizontalFlip(), transform])
+
+    loaders = { "torchvision": DataLoader(SyntheticCIFAR10(data, targets, transform), batch_size=batch_size, shuffle=True, drop_last=True) }
+
+    for storage in ("uint8", "float16"):
+        images, cached_targets = load_image_cache(cache_dir, f"synthetic-{samples}", lambda: (data.transpose(0, 3, 1, 2), targets), storage, MEAN, STD)
+        dataset = CachedImageDataset(images, cached_targets, MEAN, STD, hflip=augment, crop_padding=4 if augment else 0)
+        loaders[f"{storage} cache"] = tensor_batch_loader(dataset, batch_size, shuffle=True, drop_last=True)
+
+    return loaders
+
+
+def datamodule_loaders(data_dir: str, batch_size: int, augment: bool):
+
+    from cifar10.cifar10_datamodule import CifarLightningDataModule
+
+    loaders = {}
+    for name, cache in (("torchvision", None), ("uint8 cache", "uint8"), ("float16 cache", "float16")):
+        datamodule = CifarLightningDataModule(data_dir, data_dir, data_dir, batch_size, num_workers=0, cache=cache, augment=augment)
+        datamodule.setup("fit")
+        loaders[name] = datamodule.train_dataloader()
+
+    return loaders
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples",    type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeat",     type=int, default=3)
+    parser.add_argument("--data-dir",   type=str, default=None)
+    args = parser.parse_args()
+
+    logm.console = NullLogger()
+    torch.manual_seed(0)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+
+        print(f"\n{'augment':<8} {'loader':<14} {'epoch s':>9} {'speedup':>8}")
+
+        for augment in (False, True):
+
+            if args.data_dir is not None:
+                loaders = datamodule_loaders(args.data_dir, args.batch_size, augment)
+            else:
+                loaders = synthetic_loaders(args.samples, args.batch_size, augment, cache_dir)
+
+            timings = { name: epoch_seconds(loader, args.repeat) for name, loader in loaders.items() }
+
+            for name, seconds in timings.items():
+                print(f"{str(augment):<8} {name:<14} {seconds:>9.3f} {timings['torchvision'] / seconds:>7.1f}x")
+
+        # same normalized values on both paths (without augmentation)
+        loaders = synthetic_loaders(256, 256, False, cache_dir) if args.data_dir is None else datamodule_loaders(args.data_dir, 256, False)
+        reference = loaders["torchvision"].dataset[0][0]
+        for name in ("uint8 cache", "float16 cache"):
+            print(f"{name:<14} max abs diff vs torchvision: {(loaders[name].dataset[0][0] - reference).abs().max().item():.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Micro-benchmark : steps/sec of the fabric train and test loops on CPU, for the cifar10 CNN.
+
+Compares the previous loops (metrics rebuilt per key and per batch, accumulated with their
+autograd graph, rich track on every step) with the device-resident metric accumulator,
+with and without the (throttled) progress display. Data is random, cifar10 shaped.
+
+    PYTHONPATH=. python benchmarks/bench_loops.py --samples 4096 --batch-size 32
+"""
+
+import argparse
+import time
+
+import torch
+from lightning import Fabric
+from rich.progress import track
+from torch.utils.data import DataLoader, TensorDataset
+
+from bench_common import build_models
+
+from pybiscus.ml.loops_fabric import test_loop, train_loop
+
+
+def legacy_train_loop(fabric, net, trainloader, optimizer, epochs: int):
+    """train_loop as it was before the metric accumulator"""
+
+    net.train()
+    for epoch in range(epochs):
+        results_epoch = { key: torch.tensor(0.0, device=net.device) for key in net.signature.__required_keys__ }
+        for batch_idx, batch in track(enumerate(trainloader), total=len(trainloader), description="Training..."):
+            results = net.training_step(batch, batch_idx)
+            optimizer.zero_grad()
+            fabric.backward(results["loss"])
+            optimizer.step()
+            for key in results_epoch.keys():
+                value = results[key]
+                if not isinstance(value, torch.Tensor):
+                    value = torch.tensor(value, device=net.device)
+                if value.shape != results_epoch[key].shape:
+                    value = value.reshape(results_epoch[key].shape)
+                results_epoch[key] += value
+        for key in results_epoch.keys():
+            results_epoch[key] /= len(trainloader)
+            results_epoch[key] = results_epoch[key].item()
+    return results_epoch
+
+
+def legacy_test_loop(fabric, net, testloader):
+    """test_loop as it was before the metric accumulator"""
+
+    net.eval()
+    with torch.no_grad():
+        results_epoch = { key: torch.tensor(0.0, device=net.device) for key in net.signature.__required_keys__ }
+        for batch_idx, batch in track(enumerate(testloader), total=len(testloader), description="Validating..."):
+            results = net.validation_step(batch, batch_idx)
+            for key in results_epoch.keys():
+                value = results[key]
+                if not isinstance(value, torch.Tensor):
+                    value = torch.tensor(value, device=net.device)
+                if value.shape != results_epoch[key].shape:
+                    value = value.reshape(results_epoch[key].shape)
+                results_epoch[key] += value
+    for key in results_epoch.keys():
+        results_epoch[key] /= len(testloader)
+        results_epoch[key] = results_epoch[key].item()
+    return results_epoch
+
+
+def steps_per_sec(fn, steps: int, repeat: int) -> float:
+    """best steps/sec over repeat runs of fn (one epoch each)"""
+    fn()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return steps / best
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples",    type=int, default=4096)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeat",     type=int, default=3)
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+
+    fabric = Fabric(accelerator="cpu", devices=1)
+    model  = build_models()["cifar_cnn"]
+    optimizer = model.configure_optimizers()
+    model, optimizer = fabric.setup(model, optimizer)
+
+    # a last partial batch on purpose
+    samples = args.samples + args.batch_size // 2
+    dataset = TensorDataset(torch.randn(samples, 3, 32, 32), torch.randint(0, 10, (samples,)))
+    loader  = fabric.setup_dataloaders(DataLoader(dataset, batch_size=args.batch_size))
+    steps   = len(loader)
+
+    runs = {
+        "train legacy":                lambda: legacy_train_loop(fabric, model, loader, optimizer, epochs=1),
+        "train accumulator":           lambda: train_loop(fabric, model, loader, [optimizer], epochs=1),
+        "train accumulator, no bar":   lambda: train_loop(fabric, model, loader, [optimizer], epochs=1, progress=False),
+        "test legacy":                 lambda: legacy_test_loop(fabric, model, loader),
+        "test accumulator":            lambda: test_loop(fabric, model, loader),
+        "test accumulator, no bar":    lambda: test_loop(fabric, model, loader, progress=False),
+    }
+
+    measures = { name: steps_per_sec(run, steps, args.repeat) for name, run in runs.items() }
+
+    print(f"\ncifar_cnn, {samples} samples, batch size {args.batch_size}, {steps} steps per epoch, {torch.get_num_threads()} threads")
+    print(f"{'loop':<28} {'steps/s':>10} {'vs legacy':>10}")
+    for name, value in measures.items():
+        legacy = measures[name.split()[0] + " legacy"]
+        print(f"{name:<28} {value:>10.1f} {value / legacy:>9.2f}x")
+
+    # the mean over a partial last batch : legacy divides by the number of batches
+    print(f"\ntest metrics legacy      {legacy_test_loop(fabric, model, loader)}")
+    print(f"test metrics accumulator {test_loop(fabric, model, loader, progress=False)}")
+
+
+if __name__ == "__main__":
+    main()
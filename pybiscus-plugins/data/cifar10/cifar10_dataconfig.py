@@ -11,6 +11,9 @@ class ConfigCifar10Data(BaseModel):
     dir_test:    str, optional = the testing data directory path (required for server)
     batch_size:  int, optional = the batch size (default to 32)
     num_workers: int, optional = the number of workers for the DataLoaders (default to 0)
+    cache:       str, optional = "uint8" or "float16" : serve the images from a memory-mapped cache
+                                 written in the data directory on first setup (default to None, torchvision path)
+    augment:     bool, optional = random crop (padding 4) and horizontal flip of the training images (default to False)
     """
 
     PYBISCUS_CONFIG: ClassVar[str] = "config"
@@ -20,6 +23,8 @@ class ConfigCifar10Data(BaseModel):
     dir_test:    Optional[str] = "${root_dir}/datasets/test/"
     batch_size:  int = 32
     num_workers: int = 0
+    cache:       Optional[Literal["uint8", "float16"]] = None
+    augment:     bool = False
 
     model_config = ConfigDict(extra="forbid")
 
@@ -8,6 +8,11 @@ from torch.utils.data import DataLoader
 from torchvision.datasets import CIFAR10
 
 import pybiscus.core.pybiscus_logger as logm
+from pybiscus.ml.data.imagecache import CachedImageDataset, load_image_cache
+from pybiscus.ml.data.tensorbatchloader import tensor_batch_loader
+
+CIFAR10_MEAN = (0.5, 0.5, 0.5)
+CIFAR10_STD  = (0.5, 0.5, 0.5)
 
 class CifarLightningDataModule(pl.LightningDataModule):
     """
@@ -170,7 +175,7 @@ class CifarLightningDataModule(pl.LightningDataModule):
     """
 
     @override
-    def __init__( self, dir_train, dir_val, dir_test, batch_size, num_workers: int = 0,):
+    def __init__( self, dir_train, dir_val, dir_test, batch_size, num_workers: int = 0, cache: Optional[str] = None, augment: bool = False,):
 
         super().__init__()
 
@@ -180,14 +185,24 @@ class CifarLightningDataModule(pl.LightningDataModule):
         self.data_dir_test  = dir_test
         self.num_workers    = num_workers
         self.batch_size     = batch_size
+        self.cache          = cache
+        self.augment        = augment
 
         self.transform      = transforms.Compose(
             [
                 transforms.ToTensor(),
-                transforms.Normalize((0.5, 0.5, 0.5), (0.5, 0.5, 0.5)),
+                transforms.Normalize(CIFAR10_MEAN, CIFAR10_STD),
             ]
         )
 
+        self.train_transform = transforms.Compose(
+            [
+                transforms.RandomCrop(32, padding=4),
+                transforms.RandomHorizontalFlip(),
+                self.transform,
+            ]
+        ) if augment else self.transform
+
         # DataLoaders for train, val and test phasis
         self.data_train     = None
         self.data_val       = None
@@ -208,8 +223,12 @@ class CifarLightningDataModule(pl.LightningDataModule):
             -----------------------------
         """
 
+        if self.cache is not None:
+            self._setup_cached(stage)
+            return
+
         if stage == "fit" or stage is None:
-            self.data_train = CIFAR10( root=self.data_dir_train, train=True,  download=True, transform=self.transform,)
+            self.data_train = CIFAR10( root=self.data_dir_train, train=True,  download=True, transform=self.train_transform,)
             logm.console.log("x_train shape: ", self.data_train.data.shape)
             self.data_val   = CIFAR10( root=self.data_dir_val,   train=False, download=True, transform=self.transform,)
             logm.console.log("y_train shape: ", self.data_val.data.shape)
@@ -222,13 +241,45 @@ class CifarLightningDataModule(pl.LightningDataModule):
             self.data_test  = CIFAR10( root=self.data_dir_test,  train=False, download=True, transform=self.transform,)
             logm.console.log("x_test shape", self.data_test.data.shape)
 
+    def _cached_dataset(self, root, train: bool, augment: bool = False) -> CachedImageDataset:
+        """dataset served from the memory-mapped cache, built from torchvision CIFAR10 on first use"""
+
+        def source():
+            dataset = CIFAR10( root=root, train=train, download=True,)
+            return dataset.data.transpose(0, 3, 1, 2), np.asarray(dataset.targets)
+
+        images, targets = load_image_cache( f"{root}/pybiscus-cache", f"cifar10-{'train' if train else 'test'}",
+                                            source, self.cache, CIFAR10_MEAN, CIFAR10_STD,)
+
+        return CachedImageDataset( images, targets, CIFAR10_MEAN, CIFAR10_STD,
+                                   hflip=augment, crop_padding=4 if augment else 0,)
+
+    def _setup_cached(self, stage: Optional[str] = None):
+
+        if stage == "fit" or stage is None:
+            self.data_train = self._cached_dataset( self.data_dir_train, train=True,  augment=self.augment,)
+            self.data_val   = self._cached_dataset( self.data_dir_val,   train=False,)
+            logm.console.log("x_train shape: ", tuple(self.data_train.images.shape), f"({self.cache} cache)")
+
+        if stage == "test" or stage is None:
+            self.data_test  = self._cached_dataset( self.data_dir_test,  train=False,)
+            logm.console.log("x_test shape", tuple(self.data_test.images.shape), f"({self.cache} cache)")
+
+    def _dataloader(self, dataset, shuffle: bool) -> DataLoader:
+
+        if self.cache is not None:
+            # whole batches sliced out of the cache
+            return tensor_batch_loader( dataset, batch_size=self.batch_size, shuffle=shuffle, drop_last=True, num_workers=self.num_workers,)
+
+        return DataLoader( dataset, batch_size=self.batch_size, num_workers=self.num_workers, drop_last=True, shuffle=shuffle,)
+
     @override
     def train_dataloader(self) -> DataLoader:
 
         if self.data_train is None:
             raise ValueError("Train dataset undefined: bad setup")
         
-        return DataLoader( self.data_train, batch_size=self.batch_size, num_workers=self.num_workers, drop_last=True, shuffle=True,)
+        return self._dataloader( self.data_train, shuffle=True,)
 
     @override
     def val_dataloader(self) -> DataLoader:
@@ -236,7 +287,7 @@ class CifarLightningDataModule(pl.LightningDataModule):
         if self.data_val is None:
             raise ValueError("Val dataset undefined: bad setup")
         
-        return DataLoader( self.data_val,   batch_size=self.batch_size, num_workers=self.num_workers, drop_last=True, shuffle=False,)
+        return self._dataloader( self.data_val,   shuffle=False,)
 
     @override
     def test_dataloader(self) -> DataLoader:
@@ -244,5 +295,5 @@ class CifarLightningDataModule(pl.LightningDataModule):
         if self.data_test is None:
             raise ValueError("Test dataset undefined: bad setup")
         
-        return DataLoader( self.data_test,  batch_size=self.batch_size, num_workers=self.num_workers, drop_last=True, shuffle=False,)
+        return self._dataloader( self.data_test,  shuffle=False,)
 
@@ -8,6 +8,12 @@ from torchvision.datasets import MNIST
 
 import torch
 
+from pybiscus.ml.data.imagecache import CachedImageDataset, load_image_cache
+from pybiscus.ml.data.tensorbatchloader import tensor_batch_loader
+
+MNIST_MEAN = (0.1307,)
+MNIST_STD  = (0.3081,)
+
 
 class ConfigMnistData(BaseModel):
     """A Pydantic Model to validate the MnistLitDataModule config givent by the user.
@@ -24,6 +30,11 @@ class ConfigMnistData(BaseModel):
         the batch size (default to 64)
     num_workers: int, optional
         the number of workers for the DataLoaders (default to 2)
+    cache: str, optional
+        "uint8" or "float16" : serve the images from a memory-mapped cache
+        written in the data directory on first setup (default to None, torchvision path)
+    augment: bool, optional
+        random crop (padding 2) of the training images (default to False)
     """
 
     PYBISCUS_CONFIG: ClassVar[str] = "config"
@@ -33,6 +44,8 @@ class ConfigMnistData(BaseModel):
     dir_test: Optional[str] = "${root_dir}/datasets/test/"
     batch_size: int = 64
     num_workers: int = 2
+    cache: Optional[Literal["uint8", "float16"]] = None
+    augment: bool = False
 
     model_config = ConfigDict(extra="forbid")
 
@@ -56,6 +69,8 @@ class MnistLitDataModule(pl.LightningDataModule):
         dir_test,
         batch_size,
         num_workers: int = 2,
+        cache: Optional[str] = None,
+        augment: bool = False,
     ):
         super().__init__()
         self.data_dir_train = dir_train
@@ -63,15 +78,26 @@ class MnistLitDataModule(pl.LightningDataModule):
         self.data_dir_test = dir_test
         self.num_workers = num_workers
         self.batch_size = batch_size
-        self.transform = transforms.Compose([transforms.ToTensor(), transforms.Normalize((0.1307,), (0.3081,))]) # transforms.ToTensor()
+        self.cache = cache
+        self.augment = augment
+        self.transform = transforms.Compose([transforms.ToTensor(), transforms.Normalize(MNIST_MEAN, MNIST_STD)]) # transforms.ToTensor()
+        self.train_transform = (
+            transforms.Compose([transforms.RandomCrop(28, padding=2), self.transform])
+            if augment
+            else self.transform
+        )
 
     def setup(self, stage: Optional[str] = None):
+        if self.cache is not None:
+            self._setup_cached(stage)
+            return
+
         if stage == "fit" or stage is None:
             self.data_train = MNIST(
                 root=self.data_dir_train,
                 train=True,
                 download=True,
-                transform=self.transform,
+                transform=self.train_transform,
             )
             self.data_val = MNIST(
                 root=self.data_dir_val,
@@ -88,7 +114,37 @@ class MnistLitDataModule(pl.LightningDataModule):
                 transform=self.transform,
             )
 
+    def _cached_dataset(self, root, train, augment=False):
+        """dataset served from the memory-mapped cache, built from torchvision MNIST on first use"""
+
+        def source():
+            dataset = MNIST(root=root, train=train, download=True)
+            return dataset.data.numpy()[:, None], dataset.targets.numpy()
+
+        images, targets = load_image_cache(
+            f"{root}/pybiscus-cache",
+            f"mnist-{'train' if train else 'test'}",
+            source,
+            self.cache,
+            MNIST_MEAN,
+            MNIST_STD,
+        )
+        return CachedImageDataset(
+            images, targets, MNIST_MEAN, MNIST_STD, crop_padding=2 if augment else 0
+        )
+
+    def _setup_cached(self, stage: Optional[str] = None):
+        if stage == "fit" or stage is None:
+            self.data_train = self._cached_dataset(self.data_dir_train, train=True, augment=self.augment)
+            self.data_val = self._cached_dataset(self.data_dir_val, train=False)
+
+        if stage == "test" or stage is None:
+            self.data_test = self._cached_dataset(self.data_dir_test, train=False)
+
     def train_dataloader(self):
+        if self.cache is not None:
+            # whole batches sliced out of the cache
+            return tensor_batch_loader(self.data_train, self.batch_size, shuffle=True, drop_last=True, num_workers=self.num_workers)
         return DataLoader(
             self.data_train,
             batch_size=self.batch_size,
@@ -99,6 +155,8 @@ class MnistLitDataModule(pl.LightningDataModule):
         )
 
     def val_dataloader(self):
+        if self.cache is not None:
+            return tensor_batch_loader(self.data_val, self.batch_size, shuffle=False, drop_last=True, num_workers=self.num_workers)
         return DataLoader(
             self.data_val,
             batch_size=self.batch_size,
@@ -109,6 +167,8 @@ class MnistLitDataModule(pl.LightningDataModule):
         )
 
     def test_dataloader(self):
+        if self.cache is not None:
+            return tensor_batch_loader(self.data_test, self.batch_size, shuffle=False, drop_last=True, num_workers=self.num_workers)
         return DataLoader(
             self.data_test,
             batch_size=self.batch_size,
@@ -1,21 +1,17 @@
 import lightning.pytorch as pl
 import torch
-from torch.utils.data import DataLoader, Dataset
+from torch.utils.data import DataLoader
 
-class RandomVectorDataset(Dataset):
+from pybiscus.ml.data.tensorbatchloader import TensorBatchDataset, tensor_batch_loader
+
+class RandomVectorDataset(TensorBatchDataset):
     def __init__(self, num_samples, feature_dim, seed=42):
-        super().__init__()
         self.num_samples = num_samples
         self.feature_dim = feature_dim
         self.seed = seed
         torch.manual_seed(self.seed)
         self.data = torch.randn(num_samples, feature_dim)
-
-    def __len__(self):
-        return self.num_samples
-
-    def __getitem__(self, idx):
-        return self.data[idx], self.data[idx]  # returns the same vector as label
+        super().__init__(self.data, self.data)  # returns the same vector as label
 
 #               -------------------------------
 
@@ -33,14 +29,16 @@ class RandomVectorLightningDataModule(pl.LightningDataModule):
         self.val_dataset   = RandomVectorDataset(self.num_samples // 2, self.feature_dim, self.seed + 1)
         self.test_dataset  = RandomVectorDataset(self.num_samples // 2, self.feature_dim, self.seed + 2)
 
-    def train_dataloader(self):
-        return DataLoader(self.train_dataset, batch_size=self.batch_size, shuffle=True)
+    # whole batches sliced out of the data tensor
+
+    def train_dataloader(self) -> DataLoader:
+        return tensor_batch_loader(self.train_dataset, batch_size=self.batch_size, shuffle=True)
 
-    def val_dataloader(self):
-        return DataLoader(self.val_dataset, batch_size=self.batch_size)
+    def val_dataloader(self) -> DataLoader:
+        return tensor_batch_loader(self.val_dataset, batch_size=self.batch_size)
 
-    def test_dataloader(self):
-        return DataLoader(self.test_dataset, batch_size=self.batch_size)
+    def test_dataloader(self) -> DataLoader:
+        return tensor_batch_loader(self.test_dataset, batch_size=self.batch_size)
 
 if __name__ == "__main__":
 
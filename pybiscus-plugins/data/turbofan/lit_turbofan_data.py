@@ -21,6 +21,8 @@ class ConfigTurbofanData(BaseModel):
         the batch size (default to 32)
     num_workers: int, optional
         the number of workers for the DataLoaders (default to 0)
+    cache: bool, optional
+        keep the parsed csv as memory-mapped .npy files next to it (default to True)
     """
 
     PYBISCUS_CONFIG: ClassVar[str] = "config"
@@ -33,6 +35,7 @@ class ConfigTurbofanData(BaseModel):
     window: int = 20
     batch_size: int = 8
     num_workers: int = 0
+    cache: bool = True
 
     model_config = ConfigDict(extra="forbid")
 
@@ -57,6 +60,7 @@ class LitTurbofanDataModule(pl.LightningDataModule):
         window,
         batch_size,
         num_workers,
+        cache=True,
     ):
         super().__init__()
         self.data_path = data_path
@@ -66,6 +70,7 @@ class LitTurbofanDataModule(pl.LightningDataModule):
         self.window = window
         self.num_workers = num_workers
         self.batch_size = batch_size
+        self.cache = cache
 
     def setup(self, stage: Optional[str] = None):
         if stage == "fit" or stage is None:
@@ -73,17 +78,20 @@ class LitTurbofanDataModule(pl.LightningDataModule):
                 engines_list=self.engines_train_list,
                 window=self.window,
                 datapath=self.data_path,
+                cache=self.cache,
             )
             self.data_val = turbofan_dataset(
                 engines_list=self.engines_val_list,
                 window=self.window,
                 datapath=self.data_path,
+                cache=self.cache,
             )
         if stage == "test" or stage is None:
             self.data_test = turbofan_dataset(
                 engines_list=self.engines_test_list,
                 window=self.window,
                 datapath=self.data_path,
+                cache=self.cache,
             )
 
     def train_dataloader(self):
@@ -1,36 +1,113 @@
-from torch.utils.data import Dataset
+import json
+import os
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from torch.utils.data import Dataset
 
 # Example taken from https://www.kaggle.com/code/jinsolkwon/rul-predictions-using-pytorch-lstm#1.-Data-Processing
 
+_CACHE_VERSION = 1
+_NON_FEATURE_COLUMNS = ["time_in_cycles", "engine_no"]
+
+
+def parse_turbofan_csv(datapath):
+    """Parse the csv : float32 features (N, F), engine numbers (N,) and remaining useful lifetime (N,).
+
+    Rows are (stably) grouped by engine, so that each engine is a contiguous block.
+    """
+    df = pd.read_csv(datapath, sep=",")
+    df = df.dropna(axis=1)
+    df = df.sort_values("engine_no", kind="stable")
+
+    # remaining useful lifetime, the value we want to be able to predict
+    tot_time = df.groupby("engine_no")["engine_no"].transform("size")
+    rul = (tot_time - df["time_in_cycles"]).to_numpy(dtype=np.float32)
+
+    features = np.ascontiguousarray(df.drop(_NON_FEATURE_COLUMNS, axis=1).to_numpy(dtype=np.float32))
+    engine_no = df["engine_no"].to_numpy(dtype=np.int64)
+
+    return features, engine_no, rul
+
+
+def load_turbofan_arrays(datapath, cache=True):
+    """Parsed arrays, from a .npy cache (memory-mapped, copy on write) kept next to the csv when cache is set.
+
+    The cache is rebuilt when the csv size or modification time changes.
+    """
+    if not cache:
+        return parse_turbofan_csv(datapath)
+
+    datapath = Path(datapath)
+    cache_dir = datapath.with_name(datapath.name + ".cache")
+    stat = datapath.stat()
+    meta = {"version": _CACHE_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    names = ("features", "engine_no", "rul")
+
+    try:
+        if json.loads((cache_dir / "meta.json").read_text()) == meta:
+            return tuple(np.load(cache_dir / f"{name}.npy", mmap_mode="c") for name in names)
+    except (OSError, ValueError):
+        pass
+
+    arrays = parse_turbofan_csv(datapath)
+
+    try:
+        cache_dir.mkdir(exist_ok=True)
+        # written aside then renamed : clients sharing the data dir never read a partial file
+        for name, array in zip(names, arrays):
+            tmp_path = cache_dir / f"{name}.{os.getpid()}.tmp.npy"
+            np.save(tmp_path, array)
+            os.replace(tmp_path, cache_dir / f"{name}.npy")
+        tmp_path = cache_dir / f"meta.{os.getpid()}.tmp.json"
+        tmp_path.write_text(json.dumps(meta))
+        os.replace(tmp_path, cache_dir / "meta.json")
+    except OSError:
+        # read-only data dir : work without cache
+        pass
+
+    return arrays
+
 
 class turbofan_dataset(Dataset):
-    def __init__(self, engines_list, window=20, datapath="turbofan.txt"):
-        df = pd.read_csv(datapath, sep=",")
-        df = df.dropna(axis=1)
-        self.df = df[df.engine_no.isin(engines_list)].__deepcopy__()
-        self.add_rul()
+    """Sliding windows over the engines time series.
+
+    Samples are strided views of the single float32 array of all the engines (no copy per item,
+    nor per split : the rows of the selected engines are not gathered, so a memory-mapped cache stays on disk),
+    and a window never crosses an engine boundary : an engine of n cycles
+    gives n - window + 1 windows, labelled with the RUL of their last cycle.
+    """
+
+    def __init__(self, engines_list, window=20, datapath="turbofan.txt", cache=True):
+        features, engine_no, rul = load_turbofan_arrays(datapath, cache)
+
+        self.features = features
+        self.rul = rul
         self.window = window
 
+        # (rows - window + 1, window, F) view over all the rows
+        if len(self.features) >= window:
+            self.windows = sliding_window_view(self.features, window, axis=0, writeable=True).transpose(0, 2, 1)
+        else:
+            self.windows = np.empty((0, window, self.features.shape[1]), dtype=np.float32)
+
+        # first row of each window fitting inside one of the selected engines (contiguous blocks of rows)
+        boundaries = np.flatnonzero(np.diff(engine_no)) + 1
+        begins, ends = np.r_[0, boundaries], np.r_[boundaries, len(engine_no)]
+        selected = np.isin(engine_no[begins], engines_list) if len(engine_no) else np.empty(0, dtype=bool)
+        starts = [
+            np.arange(begin, end - window + 1)
+            for begin, end in zip(begins[selected], ends[selected])
+        ]
+        self.starts = np.concatenate(starts) if starts else np.empty(0, dtype=np.int64)
+
     def __len__(self):
-        return len(self.df) - self.window
+        return len(self.starts)
 
     def __getitem__(self, idx):
-        X = (
-            self.df.iloc[idx : idx + self.window, :]
-            .drop(["time_in_cycles", "engine_no", "rul"], axis=1)
-            .copy()
-            .to_numpy()
-        )
-        y = self.df.iloc[idx + self.window - 1]["rul"]
+        start = self.starts[idx]
+        X = self.windows[start]
+        y = self.rul[start + self.window - 1]
         return X, y
-
-    def add_rul(self):
-        """Add remaining useful lifetime values, the value we want to be able to predict"""
-        tot_time = {}
-        for engine in self.df.engine_no.unique():
-            df_engine = self.df[self.df.engine_no == engine]
-            tot_time[engine] = len(df_engine)
-        self.df["rul"] = self.df[["engine_no", "time_in_cycles"]].apply(
-            lambda x: tot_time[x.iloc[0]] - x.iloc[1], axis=1
-        )
\ No newline at end of file
@@ -1,10 +1,13 @@
 from collections import defaultdict
 from logging import WARNING
+import time
 from typing import Callable, Literal, Optional, Union, ClassVar
 
 import flwr as fl
 from flwr.common import (
+    EvaluateIns,
     EvaluateRes,
+    FitIns,
     FitRes,
     MetricsAggregationFn,
     Parameters,
@@ -12,14 +15,19 @@ from flwr.common import (
     parameters_to_ndarrays as flw_parameters_to_ndarrays,
 )
 from flwr.common.logger import log
+from flwr.server.client_manager import ClientManager
 from flwr.server.client_proxy import ClientProxy
 from flwr.server.strategy.aggregate import weighted_loss_avg  as flw_weighted_loss_avg
 
 from lightning.fabric import Fabric
 from lightning.pytorch import LightningModule
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 from pybiscus.interfaces.flower.fabricstrategyfactory import FabricStrategyFactory
+from pybiscus.flower.flatparameters import FlatParametersLayout
+from pybiscus.flower.rounddeadline import ConfigRoundDeadline, RoundDeadline
+from pybiscus.flower.serverevaluation import ConfigServerEvaluation, ServerEvaluation
+from pybiscus.flower.workloadscheduler import ConfigWorkloadScheduler, WorkloadScheduler
 import pybiscus.core.pybiscus_logger as logm
 from pybiscus.flower.utils_server import (
     evaluate_config    as pyb_evaluate_config, 
@@ -63,6 +71,19 @@ class ConfigFabricFedAvgStrategyData3(BaseModel):
         Whether or not accept rounds containing failures. Defaults to True.
     inplace : bool (default: True)
         Enable (True) or disable (False) in-place aggregation of model updates.
+    round_deadline : optional
+        Wall-clock deadline of the fit phase : the round is aggregated from the results arrived
+        in time (once min_results arrived), late results being dropped or carried into the next round.
+        Clients receive a time budget in their fit config.
+    server_evaluation : optional
+        Centralized evaluation every n rounds, on a fixed random subset of the test set, and
+        in background (overlapping the next fit round) rather than inside the flower round.
+    workload_scheduler : optional
+        Per-client number of steps (or epochs) in the fit config, from the throughput measured
+        by each client, so that all the clients of a round finish at about the same time.
+    proximal_mu : optional
+        Weight of the FedProx proximal term, sent to the clients as fit_config["proximal_mu"]
+        (used by the fedprox client class).
     """
 
     PYBISCUS_CONFIG: ClassVar[str] = "config"
@@ -75,6 +96,10 @@ class ConfigFabricFedAvgStrategyData3(BaseModel):
     accept_failures:       bool  = True
     inplace:               bool  = True
     flower_fit_results_aggregator: FlowerFitResultsAggregatorConfig() # pyright: ignore[reportInvalidTypeForm]
+    round_deadline:        Optional[ConfigRoundDeadline]       = None
+    server_evaluation:     Optional[ConfigServerEvaluation]    = None
+    workload_scheduler:    Optional[ConfigWorkloadScheduler]   = None
+    proximal_mu:           Optional[float]                     = Field(default=None, ge=0)
 
     model_config = ConfigDict(extra="forbid")
 
@@ -126,6 +151,10 @@ class FabricFedAvgStrategy3(fl.server.strategy.FedAvg):
         evaluate_metrics_aggregation_fn: Optional[MetricsAggregationFn] = None,
         inplace: bool = True,
         flower_fit_results_aggregator,
+        round_deadline: Optional[dict] = None,
+        server_evaluation: Optional[dict] = None,
+        workload_scheduler: Optional[dict] = None,
+        proximal_mu: Optional[float] = None,
     ) -> None:
         super().__init__(
             fraction_fit=fraction_fit,
@@ -146,11 +175,27 @@ class FabricFedAvgStrategy3(fl.server.strategy.FedAvg):
         self.model = model
         self.fabric = fabric
 
+        # flat parameters layout computed once, and buffer reused round after round
+        self.flat_layout     = FlatParametersLayout.from_module(model)
+        self.flat_parameters = None
+
         from pybiscus.flower.flowerfitresultsaggregator.flowerfitresultsaggregatorusingweightedaverage.flowerfitresultsaggregatorusingweightedaverage import FlowerFitResultsAggregatorUsingWeightedAverage
 
         flowerfitresultsaggregator_class = flowerfitresultsaggregator_registry()[flower_fit_results_aggregator['name']]
         self.flower_fit_results_aggregator = flowerfitresultsaggregator_class(**flower_fit_results_aggregator['config'])
 
+        # optional cut of the fit phase at a wall-clock deadline
+        self.round_deadline = RoundDeadline(**round_deadline) if round_deadline is not None else None
+
+        # centralized evaluation every n rounds, optionally in background
+        self.server_evaluation = ServerEvaluation(model, **(server_evaluation or {}))
+
+        # optional per-client workload, from the measured client throughputs
+        self.workload_scheduler = WorkloadScheduler(**workload_scheduler) if workload_scheduler is not None else None
+
+        # FedProx proximal term weight, sent to the clients in their fit config
+        self.proximal_mu = proximal_mu
+
     # -------------------------------------------------------------------------
 
     def evaluate(self, server_round: int, parameters: Parameters) -> Optional[tuple[float, dict[str, Scalar]]]:
@@ -160,15 +205,20 @@ class FabricFedAvgStrategy3(fl.server.strategy.FedAvg):
         if self.evaluate_fn is None:
             return None
         
-        parameters_ndarrays = flw_parameters_to_ndarrays(parameters)
+        if self.flat_layout.flat_dtype is None:
+            # mixed with integer layers : the layers are not all held exactly by a floating flat buffer
+            parameters_ndarrays  = flw_parameters_to_ndarrays(parameters)
+        else:
+            self.flat_parameters = self.flat_layout.parameters_to_flat(parameters, out=self.flat_parameters, dtype=self.flat_layout.flat_dtype)
+            parameters_ndarrays  = self.flat_layout.views(self.flat_parameters)
 
-        eval_res = self.evaluate_fn(server_round, parameters_ndarrays, {})
+        return self.server_evaluation.evaluate(server_round, parameters_ndarrays, self.evaluate_fn, self.report_evaluation)
+
+    # -------------------------------------------------------------------------
+
+    def report_evaluation(self, server_round: int, loss: float, metrics: dict[str, Scalar]) -> None:
+        """Log the centralized evaluation results of a round."""
 
-        if eval_res is None:
-            return None
-        
-        loss, metrics = eval_res
-        
         emo = defaultdict(str)
         emo["loss"]     = "📉"
         emo["accuracy"] = "🎯"
@@ -180,7 +230,30 @@ class FabricFedAvgStrategy3(fl.server.strategy.FedAvg):
 
         logm.console.log(f"🔁 Round {server_round} 🧪 Test {logmsg}")
 
-        return loss, metrics
+    # -------------------------------------------------------------------------
+
+    def configure_fit( self,
+        server_round:   int,
+        parameters:     Parameters,
+        client_manager: ClientManager,
+    ) -> list[tuple[ClientProxy, FitIns]]:
+        """Configure the next round of training, sharing the global parameters with the aggregator."""
+
+        # e.g. reference of the delta encoded updates
+        self.flower_fit_results_aggregator.on_configure_fit(server_round, parameters)
+
+        instructions = super().configure_fit(server_round, parameters, client_manager)
+
+        if self.proximal_mu is not None:
+            instructions = [ (proxy, FitIns(ins.parameters, {**ins.config, "proximal_mu": self.proximal_mu})) for proxy, ins in instructions ]
+
+        if self.workload_scheduler is not None:
+            instructions = self.workload_scheduler.configure(server_round, instructions)
+
+        if self.round_deadline is not None:
+            instructions = self.round_deadline.configure(server_round, instructions)
+
+        return instructions
 
     # -------------------------------------------------------------------------
 
@@ -191,6 +264,17 @@ class FabricFedAvgStrategy3(fl.server.strategy.FedAvg):
     ) -> tuple[Optional[Parameters], dict[str, Scalar]]:
         """Aggregate fit results using weighted average."""
 
+        if self.round_deadline is not None:
+            # results in time (and carried late ones), missed deadlines are not failures
+            results, failures, completion_times = self.round_deadline.collect(server_round, results, failures)
+            for cid, completion_time in completion_times.items():
+                self.fabric.log(f"fit_time_{cid}", completion_time, step=server_round)
+
+        if self.workload_scheduler is not None:
+            self.workload_scheduler.update(server_round, results)
+            for key, value in self.workload_scheduler.metrics().items():
+                self.fabric.log(key, value, step=server_round)
+
         if not results:
             return None, {}
         
@@ -199,7 +283,16 @@ class FabricFedAvgStrategy3(fl.server.strategy.FedAvg):
             return None, {}
 
         # Aggregate results using configurated aggregator
+        aggregation_start     = time.perf_counter()
         parameters_aggregated = self.flower_fit_results_aggregator.aggregate( server_round, results, failures )
+        aggregation_time      = time.perf_counter() - aggregation_start
+
+        logm.console.log(f"🔁 Round:{server_round} ⏱️ aggregation time {aggregation_time:.3f}s")
+        self.fabric.log("aggregation_time", aggregation_time, step=server_round)
+
+        # no weight to average with (e.g. the results total no example) : global model kept
+        if parameters_aggregated is None:
+            return None, {}
 
         # Aggregate custom metrics if aggregation fn was provided
         metrics_aggregated = {}
@@ -224,10 +317,35 @@ class FabricFedAvgStrategy3(fl.server.strategy.FedAvg):
         elif server_round == 1:  # Only log this warning once
             log(WARNING, "No fit_metrics_aggregation_fn provided")
 
+        metrics_aggregated["aggregation_time"] = aggregation_time
+
         return parameters_aggregated, metrics_aggregated
 
     # -------------------------------------------------------------------------
 
+    def configure_evaluate( self,
+        server_round:   int,
+        parameters:     Parameters,
+        client_manager: ClientManager,
+    ) -> list[tuple[ClientProxy, EvaluateIns]]:
+        """Configure the next round of evaluation, without the clients still training past the round deadline."""
+
+        instructions = super().configure_evaluate(server_round, parameters, client_manager)
+
+        if self.round_deadline is not None:
+            instructions = self.round_deadline.configure_evaluate(server_round, instructions)
+
+        return instructions
+
+    # -------------------------------------------------------------------------
+
+    def close(self) -> None:
+        """releases the aggregator resources, once the Federated Learning ended"""
+
+        self.flower_fit_results_aggregator.close()
+
+    # -------------------------------------------------------------------------
+
     def aggregate_evaluate( self,
         server_round: int,
         results:      list[tuple[ClientProxy, EvaluateRes]],
@@ -287,7 +405,7 @@ class FabricFedAvgStrategyFactory3(FabricStrategyFactory):
             evaluate_metrics_aggregation_fn = pyb_weighted_average,
             model                           = self.model,
             fabric                          = self.fabric,
-            evaluate_fn                     = pyb_get_evaluate_fn(testset=self.testset, model=self.model, fabric=self.fabric),
+            evaluate_fn                     = pyb_get_evaluate_fn(testset=self.testset, model=self.model, fabric=self.fabric, server_evaluation=self.config.server_evaluation),
             on_fit_config_fn                = pyb_fit_config,
             on_evaluate_config_fn           = pyb_evaluate_config,
             initial_parameters              = self.initial_parameters,
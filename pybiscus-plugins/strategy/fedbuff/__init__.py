@@ -0,0 +1,15 @@
+from typing import Dict, List, Tuple
+from pydantic import BaseModel
+
+from pybiscus.interfaces.flower.fabricstrategyfactory import FabricStrategyFactory
+
+def get_modules_and_configs() -> Tuple[Dict[str, FabricStrategyFactory], List[BaseModel]]:
+
+    # imported once the plugins are loaded : fedbuffstrategy derives from the fedavg3 plugin strategy,
+    # whose import loads the plugins (through the fit results aggregators registry)
+    from fedbuff.fedbuffstrategy import ConfigFabricFedBuffStrategy, FabricFedBuffStrategyFactory
+
+    registry = { "fedbuff": FabricFedBuffStrategyFactory, }
+    configs  = [ConfigFabricFedBuffStrategy,]
+
+    return registry, configs
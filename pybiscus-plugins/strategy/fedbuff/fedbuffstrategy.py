@@ -0,0 +1,461 @@
+import queue
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, ClassVar, Literal, Optional, Union
+
+import flwr as fl
+import numpy as np
+from flwr.common import (
+    Code,
+    DisconnectRes,
+    EvaluateIns,
+    EvaluateRes,
+    FitIns,
+    FitRes,
+    GetParametersIns,
+    GetParametersRes,
+    GetPropertiesIns,
+    GetPropertiesRes,
+    MetricsAggregationFn,
+    NDArrays,
+    Parameters,
+    ReconnectIns,
+    Scalar,
+    ndarrays_to_parameters,
+    parameters_to_ndarrays,
+)
+from flwr.server.client_manager import ClientManager
+from flwr.server.client_proxy import ClientProxy
+from lightning.fabric import Fabric
+from lightning.pytorch import LightningModule
+from pydantic import BaseModel, ConfigDict, Field
+
+from fedavg3.fedavgstrategy3 import FabricFedAvgStrategy3
+from pybiscus.interfaces.flower.fabricstrategyfactory import FabricStrategyFactory
+from pybiscus.core.pybiscusexception import PybiscusInternalException
+from pybiscus.flower.serverevaluation import ConfigServerEvaluation
+from pybiscus.flower.updatecodec import decode_update, is_encoded_update
+import pybiscus.core.pybiscus_logger as logm
+from pybiscus.flower.utils_server import (
+    evaluate_config    as pyb_evaluate_config,
+    fit_config         as pyb_fit_config,
+    get_evaluate_fn    as pyb_get_evaluate_fn,
+    weighted_average   as pyb_weighted_average,
+)
+from pybiscus.plugin.registries2 import FlowerFitResultsAggregatorConfig
+
+# #############################################################################################
+
+class ConfigFabricFedBuffStrategyData(BaseModel):
+    """    buffer_size : int
+        Number K of client updates aggregated into each new global model (one flower round).
+    max_concurrency : int, optional
+        Maximum number of clients training at the same time, the clients connected at the first round if None.
+    min_available_clients : int, optional
+        Minimum number of connected clients before the first dispatch. Defaults to 2.
+    staleness_exponent : float
+        An update computed from the global model of version v, aggregated into version V,
+        is scaled down by (1 + V - v) ** -staleness_exponent (0 : no down-weighting).
+    max_staleness : int, optional
+        Updates lagging more versions are dropped.
+    server_learning_rate : float
+        Step applied to the buffered average update : the new global model is
+        current + server_learning_rate * sum(num_examples * discount * update) / sum(num_examples).
+    accept_failures : bool, optional
+        Whether or not accept rounds containing failures. Defaults to True.
+    server_evaluation : optional
+        Centralized evaluation every n aggregations, on a fixed random subset of the test set,
+        and in background rather than blocking the aggregation loop.
+    """
+
+    PYBISCUS_CONFIG: ClassVar[str] = "config"
+
+    buffer_size:           int             = Field( default=2,   gt=0 )
+    max_concurrency:       Optional[int]   = Field( default=None, gt=0 )
+    min_available_clients: int             = Field( default=2,   gt=0 )
+    staleness_exponent:    float           = Field( default=0.5, ge=0 )
+    max_staleness:         Optional[int]   = Field( default=None, ge=0 )
+    server_learning_rate:  float           = Field( default=1.0, gt=0 )
+    accept_failures:       bool            = True
+    flower_fit_results_aggregator: FlowerFitResultsAggregatorConfig() # pyright: ignore[reportInvalidTypeForm]
+    server_evaluation:     Optional[ConfigServerEvaluation]    = None
+
+    model_config = ConfigDict(extra="forbid")
+
+# #############################################################################################
+
+class ConfigFabricFedBuffStrategy(BaseModel):
+
+    PYBISCUS_ALIAS: ClassVar[str] = "FedBuff (asynchronous buffered aggregation)"
+
+    name:   Literal["fedbuff"]
+    config: ConfigFabricFedBuffStrategyData
+
+    model_config = ConfigDict(extra="forbid")
+
+# #############################################################################################
+
+@dataclass
+class _Arrival:
+    """the outcome of one client training, started from the global model of a given version"""
+
+    proxy:   ClientProxy
+    version: int
+    fit_res: Optional[FitRes]           = None
+    failure: Optional[BaseException]    = None
+
+
+class _BufferSlotProxy(ClientProxy):
+    """Placeholder client handed to the flower server : its fit returns the next buffered client update.
+
+    The flower round thus completes as soon as buffer_size updates have arrived,
+    while the real clients keep training in the background.
+    """
+
+    def __init__(self, strategy: "FabricFedBuffStrategy", slot: int):
+        super().__init__(f"fedbuff-slot-{slot}")
+        self.strategy = strategy
+        self.arrival: Optional[_Arrival] = None
+
+    def fit(self, ins: FitIns, timeout: Optional[float], group_id: Optional[int]) -> FitRes:
+        self.arrival = self.strategy.next_arrival(timeout)
+        if self.arrival.failure is not None:
+            raise self.arrival.failure
+        return self.arrival.fit_res
+
+    def get_properties(self, ins: GetPropertiesIns, timeout: Optional[float], group_id: Optional[int]) -> GetPropertiesRes:
+        raise PybiscusInternalException("a FedBuff buffer slot only serves fit")
+
+    def get_parameters(self, ins: GetParametersIns, timeout: Optional[float], group_id: Optional[int]) -> GetParametersRes:
+        raise PybiscusInternalException("a FedBuff buffer slot only serves fit")
+
+    def evaluate(self, ins: EvaluateIns, timeout: Optional[float], group_id: Optional[int]) -> EvaluateRes:
+        raise PybiscusInternalException("a FedBuff buffer slot only serves fit")
+
+    def reconnect(self, ins: ReconnectIns, timeout: Optional[float], group_id: Optional[int]) -> DisconnectRes:
+        return DisconnectRes(reason="")
+
+# #############################################################################################
+
+class FabricFedBuffStrategy(FabricFedAvgStrategy3):
+    """Asynchronous buffered aggregation (FedBuff, Nguyen et al. 2022) on top of the synchronous flower server.
+
+    Clients train in a bounded thread pool (max_concurrency workers), each from the latest global model,
+    and are given new work as soon as they return their update. A flower round ends when buffer_size
+    updates are buffered : each update is scaled down by its staleness and rebased onto the current
+    global model (current + discount * (update - model it started from)), then averaged by the
+    configured FlowerFitResultsAggregator. Slow clients thus never hold a round : their (stale) update
+    lands in a later one. close waits for the trainings in flight, once the Federated Learning ended.
+
+    Clients being kept busy training, there is no federated evaluation : the global model
+    is evaluated by the server (evaluate_fn) after each aggregation.
+    """
+
+    def __init__(
+        self,
+        *,
+        model: LightningModule,
+        fabric: Fabric,
+        evaluate_fn: Callable[[fl.common.NDArrays], Optional[tuple[float, float]]],
+        buffer_size: int = 2,
+        max_concurrency: Optional[int] = None,
+        min_available_clients: int = 2,
+        staleness_exponent: float = 0.5,
+        max_staleness: Optional[int] = None,
+        server_learning_rate: float = 1.0,
+        on_fit_config_fn: Optional[Callable[[int], dict[str, Scalar]]] = None,
+        on_evaluate_config_fn: Optional[Callable[[int], dict[str, Scalar]]] = None,
+        accept_failures: bool = True,
+        initial_parameters: Optional[Parameters] = None,
+        fit_metrics_aggregation_fn: Optional[MetricsAggregationFn] = None,
+        evaluate_metrics_aggregation_fn: Optional[MetricsAggregationFn] = None,
+        flower_fit_results_aggregator,
+        server_evaluation: Optional[dict] = None,
+    ) -> None:
+        super().__init__(
+            model=model,
+            fabric=fabric,
+            fraction_fit=1,
+            fraction_evaluate=0,
+            min_fit_clients=buffer_size,
+            min_evaluate_clients=0,
+            min_available_clients=min_available_clients,
+            evaluate_fn=evaluate_fn,
+            on_fit_config_fn=on_fit_config_fn,
+            on_evaluate_config_fn=on_evaluate_config_fn,
+            accept_failures=accept_failures,
+            initial_parameters=initial_parameters,
+            fit_metrics_aggregation_fn=fit_metrics_aggregation_fn,
+            evaluate_metrics_aggregation_fn=evaluate_metrics_aggregation_fn,
+            flower_fit_results_aggregator=flower_fit_results_aggregator,
+            server_evaluation=server_evaluation,
+        )
+
+        self.buffer_size          = buffer_size
+        self.max_concurrency      = max_concurrency
+        self.staleness_exponent   = staleness_exponent
+        self.max_staleness        = max_staleness
+        self.server_learning_rate = server_learning_rate
+
+        self._lock           = threading.Lock()
+        self._arrivals       = queue.Queue()
+        self._client_manager: Optional[ClientManager] = None
+        self._busy: set[str] = set()
+
+        # global model versions : the current one, and the ones clients are still training from
+        self._version: int                        = -1
+        self._server_round: int                   = 0
+        self._global_parameters: Optional[Parameters] = None
+        self._versions: dict[int, NDArrays]       = {}
+        self._in_flight: Counter                  = Counter()
+
+        # trainings pool, sized on the first round
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._max_workers: int = 0
+        self._closed = False
+
+    def __repr__(self) -> str:
+        return f"FabricFedBuffStrategy(buffer_size={self.buffer_size}, max_concurrency={self.max_concurrency})"
+
+    # -------------------------------------------------------------------------
+
+    def _set_global(self, parameters: Parameters, ndarrays: NDArrays):
+        """new global model version (lock held), older versions kept while clients train from them"""
+
+        self._version += 1
+        self._global_parameters = parameters
+        self._versions[self._version] = ndarrays
+
+        for version in [ version for version in self._versions if version < self._version and self._in_flight[version] == 0 ]:
+            del self._versions[version]
+
+    def _dispatch(self, proxy: ClientProxy):
+        """start a training of the client from the current global model (lock held)"""
+
+        if self._closed:
+            return
+
+        config = {}
+        if self.on_fit_config_fn is not None:
+            config = self.on_fit_config_fn(self._server_round)
+
+        version = self._version
+        self._busy.add(proxy.cid)
+        self._in_flight[version] += 1
+
+        self._executor.submit(self._run_fit, proxy, version, FitIns(self._global_parameters, config))
+
+    def _buffer_full(self) -> bool:
+        """the next aggregation is already covered by the buffered updates : new work would only grow staleness"""
+        return self._arrivals.qsize() >= self.buffer_size
+
+    def _dispatch_idle_clients(self):
+        """give work to the connected idle clients, within the pool size and while the buffer is not full (lock held)"""
+
+        for cid, proxy in self._client_manager.all().items():
+            if self._buffer_full():
+                break
+            if len(self._busy) >= self._max_workers:
+                break
+            if cid not in self._busy:
+                self._dispatch(proxy)
+
+    def _run_fit(self, proxy: ClientProxy, version: int, ins: FitIns):
+
+        arrival = _Arrival(proxy=proxy, version=version)
+
+        try:
+            fit_res = proxy.fit(ins, timeout=None, group_id=version)
+            if fit_res.status.code != Code.OK:
+                raise PybiscusInternalException(f"client {proxy.cid} fit status {fit_res.status}")
+            arrival.fit_res = fit_res
+        except BaseException as e:
+            arrival.failure = e
+
+        with self._lock:
+            self._busy.discard(proxy.cid)
+            self._arrivals.put(arrival)
+
+            # immediate re-dispatch, unless the buffer is full (the client is then given work after
+            # an aggregation, from the new global model) ; a failed client is only retried after an aggregation
+            if arrival.failure is None and not self._buffer_full() and proxy.cid in self._client_manager.all():
+                self._dispatch(proxy)
+
+    def next_arrival(self, timeout: Optional[float]) -> _Arrival:
+        """next client outcome, waiting at most timeout (None : while clients are training)"""
+
+        waited = 0.0
+
+        while True:
+            try:
+                arrival = self._arrivals.get(timeout=1.0)
+            except queue.Empty:
+                waited += 1.0
+            else:
+                if arrival.failure is not None:
+                    # reported to flower as a failure : the model it started from is no longer needed
+                    with self._lock:
+                        self._in_flight[arrival.version] -= 1
+                return arrival
+
+            with self._lock:
+                if not self._busy and self._arrivals.empty():
+                    raise PybiscusInternalException("FedBuff: no client is training, the buffer can not be filled")
+
+            if timeout is not None and waited >= timeout:
+                raise TimeoutError(f"FedBuff: no client update within {timeout}s")
+
+    # -------------------------------------------------------------------------
+
+    def configure_fit( self,
+        server_round:   int,
+        parameters:     Parameters,
+        client_manager: ClientManager,
+    ) -> list[tuple[ClientProxy, FitIns]]:
+        """Start (or keep) the clients training, and hand buffer_size buffer slots to the flower server."""
+
+        client_manager.wait_for(self.min_available_clients)
+
+        with self._lock:
+            self._client_manager = client_manager
+            self._server_round   = server_round
+
+            if self._global_parameters is None:
+                self._set_global(parameters, parameters_to_ndarrays(parameters))
+
+            if self._executor is None and not self._closed:
+                self._max_workers = self.max_concurrency or client_manager.num_available()
+                self._executor    = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="pyb_fedbuff")
+
+            self._dispatch_idle_clients()
+
+            logm.console.log(f"🔁 Round:{server_round} ⏳ FedBuff v{self._version} {len(self._busy)} clients training, {self._arrivals.qsize()} updates buffered")
+
+        self.flower_fit_results_aggregator.on_configure_fit(server_round, parameters)
+
+        return [ (_BufferSlotProxy(self, slot), FitIns(parameters, {})) for slot in range(self.buffer_size) ]
+
+    # -------------------------------------------------------------------------
+
+    def _rebase(self, arrival: _Arrival, current: NDArrays, discount: float = 1.0) -> NDArrays:
+        """client model moved onto the current global model : current + discount * (client model - model it started from)"""
+
+        base     = self._versions[arrival.version]
+        ndarrays = parameters_to_ndarrays(arrival.fit_res.parameters)
+
+        # update codec (delta, quantization) : decoded against the model the client started from
+        if ndarrays and is_encoded_update(ndarrays[0]):
+            ndarrays = decode_update(ndarrays, base)
+
+        if arrival.version == self._version and discount == 1.0:
+            return ndarrays
+
+        return [ (layer_current + discount * (layer - layer_base)).astype(layer_current.dtype, copy=False)
+                 for layer_current, layer, layer_base in zip(current, ndarrays, base) ]
+
+    def aggregate_fit( self,
+        server_round: int,
+        results:      list[tuple[ClientProxy, FitRes]],
+        failures:     list[Union[tuple[ClientProxy, FitRes], BaseException]],
+    ) -> tuple[Optional[Parameters], dict[str, Scalar]]:
+        """Aggregate the buffered updates, scaled down by their staleness and rebased."""
+
+        with self._lock:
+            current = self._versions[self._version]
+            rebased_results = []
+            stalenesses     = []
+
+            for slot, _ in results:
+                arrival   = slot.arrival
+                staleness = self._version - arrival.version
+
+                if self.max_staleness is not None and staleness > self.max_staleness:
+                    logm.console.log(f"🔁 Round:{server_round} 🗑️ FedBuff drops update of 🆔{arrival.proxy.cid}, staleness {staleness}")
+                else:
+                    fit_res  = arrival.fit_res
+                    # the discount scales the update, the weight of the client stays its num_examples
+                    discount = (1 + staleness) ** -self.staleness_exponent
+                    rebased  = FitRes(fit_res.status, ndarrays_to_parameters(self._rebase(arrival, current, discount)), fit_res.num_examples, fit_res.metrics)
+                    rebased_results.append((arrival.proxy, rebased))
+                    stalenesses.append(staleness)
+
+                self._in_flight[arrival.version] -= 1
+
+            for failure in failures:
+                logm.console.log(f"🔁 Round:{server_round} ❌ FedBuff client failure: {failure!r}")
+
+        parameters_aggregated, metrics_aggregated = super().aggregate_fit(server_round, rebased_results, failures)
+
+        with self._lock:
+
+            if parameters_aggregated is not None:
+                ndarrays = parameters_to_ndarrays(parameters_aggregated)
+
+                if self.server_learning_rate != 1.0:
+                    ndarrays = [ (layer_current + self.server_learning_rate * (layer - layer_current)).astype(layer_current.dtype, copy=False)
+                                 for layer_current, layer in zip(current, ndarrays) ]
+                    parameters_aggregated = ndarrays_to_parameters(ndarrays)
+
+                self._set_global(parameters_aggregated, ndarrays)
+
+                metrics_aggregated["staleness_mean"] = float(np.mean(stalenesses))
+                metrics_aggregated["staleness_max"]  = int(max(stalenesses))
+                logm.console.log(f"🔁 Round:{server_round} 📬 FedBuff v{self._version} from {len(stalenesses)} updates, staleness {stalenesses}")
+
+            # clients paused while the buffer was full restart from the new global model
+            self._dispatch_idle_clients()
+
+        return parameters_aggregated, metrics_aggregated
+
+    # -------------------------------------------------------------------------
+
+    def close(self) -> None:
+        """waits for the trainings in flight (their updates are discarded) and releases the global model versions"""
+
+        with self._lock:
+            if self._closed:
+                return
+            # no training is started anymore
+            self._closed = True
+            executor, self._executor = self._executor, None
+            in_flight = len(self._busy)
+
+        if executor is not None:
+            if in_flight:
+                logm.console.log(f"⏳ FedBuff waiting for {in_flight} trainings in flight")
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        with self._lock:
+            self._busy.clear()
+            self._versions.clear()
+            self._in_flight.clear()
+            self._arrivals = queue.Queue()
+
+        super().close()
+
+# #############################################################################################
+
+class FabricFedBuffStrategyFactory(FabricStrategyFactory):
+
+    def __init__(self,model,fabric,testset,initial_parameters,config,):
+        self.model              = model
+        self.fabric             = fabric
+        self.testset            = testset
+        self.initial_parameters = initial_parameters
+        self.config             = config
+
+    def get_strategy(self):
+
+        return FabricFedBuffStrategy(
+            fit_metrics_aggregation_fn      = pyb_weighted_average,
+            evaluate_metrics_aggregation_fn = pyb_weighted_average,
+            model                           = self.model,
+            fabric                          = self.fabric,
+            evaluate_fn                     = pyb_get_evaluate_fn(testset=self.testset, model=self.model, fabric=self.fabric, server_evaluation=self.config.server_evaluation),
+            on_fit_config_fn                = pyb_fit_config,
+            on_evaluate_config_fn           = pyb_evaluate_config,
+            initial_parameters              = self.initial_parameters,
+            **self.config.model_dump()
+        )
@@ -34,6 +34,12 @@ class MetricDiffComputeStrategyDecorator(StrategyDecorator):
         super().__init__(base_strategy)
 
         self.previous_metric: Optional[float] = None
+
+    def state_dict(self) -> dict:
+        return {"previous_metric": self.previous_metric}
+
+    def load_state_dict(self, state: dict) -> None:
+        self.previous_metric = state.get("previous_metric")
         
     def aggregate_evaluate( self, 
                         server_round: int,
@@ -26,6 +26,38 @@ def check_and_build_client_config(config: dict) -> ConfigClient:
     return _conf
 
 
+def build_client(conf: ConfigClient, data=None):
+    """datamodule, model and initialized flower client of a client configuration
+
+    data, when given, is an already set up datamodule (e.g. shared by simulated clients).
+    """
+
+    if data is None:
+        # load the data management module from registry
+        data_class = datamodule_registry()[conf.data.name]
+        data = data_class(**conf.data.config.model_dump())
+        data.setup(stage="fit")
+
+    num_examples = {
+        "trainset": len(data.train_dataloader()),
+        "valset": len(data.val_dataloader()),
+    }
+
+    # load the model
+    model_class = model_registry()[conf.model.name]
+    model = model_class(**conf.model.config.model_dump())
+
+    # load the client
+    if conf.flower_client.alternate_client_class is None:
+        client_factory = FlowerFabricClientFactory(conf,data,model,num_examples)
+    else:
+        client_factory = client_registry()[conf.flower_client.alternate_client_class.name](conf,data,model,num_examples)
+    client = client_factory.get_client()
+    client.initialize()
+
+    return client
+
+
 app = typer.Typer(pretty_exceptions_show_locals=False, rich_markup_mode="rich")
 
 
@@ -145,27 +177,7 @@ def launch_config(
 
     conf = check_and_build_client_config(config=conf_loaded)
 
-    # load the data management module from registry
-    data_class = datamodule_registry()[conf.data.name]
-    data = data_class(**conf.data.config.model_dump())
-
-    data.setup(stage="fit")
-    num_examples = {
-        "trainset": len(data.train_dataloader()),
-        "valset": len(data.val_dataloader()),
-    }
-
-    # load the model
-    model_class = model_registry()[conf.model.name]
-    model = model_class(**conf.model.config.model_dump())
-
-    # load the client
-    if conf.flower_client.alternate_client_class is None:
-        client_factory = FlowerFabricClientFactory(conf,data,model,num_examples)
-    else:
-        client_factory = client_registry()[conf.flower_client.alternate_client_class.name](config,data,model,num_examples)
-    client = client_factory.get_client()
-    client.initialize()
+    client = build_client(conf)
 
     if conf.flower_client.ssl is None:
         ssl_secure_cnx=None
@@ -0,0 +1,141 @@
+from pathlib import Path
+from typing import Annotated
+
+import flwr as fl
+import typer
+from flwr.server.client_manager import SimpleClientManager
+from flwr.server.superlink.fleet.grpc_bidi.grpc_server import start_grpc_server
+from pydantic import ValidationError
+
+import pybiscus.core.pybiscus_logger as logm
+from pybiscus.commands.app_server import server_certificates
+from pybiscus.commands.apps_common import load_config
+from pybiscus.core.logger.multiplelogger.multipleloggerfactory import MultipleLoggerFactory
+from pybiscus.flower.edgeaggregator import EdgeAggregatorClient
+from pybiscus.flower_config.config_edge import ConfigEdge
+from pybiscus.plugin.registries import logger_registry
+from pybiscus.plugin.registries2 import flowerfitresultsaggregator_registry
+
+#                    ------------------------------------------------
+
+def check_and_build_edge_config(conf_loaded: dict) -> ConfigEdge:
+
+    logm.console.log(conf_loaded)
+    _conf = ConfigEdge(**conf_loaded)
+    logm.console.log(_conf)
+
+    return _conf
+
+#                    ------------------------------------------------
+
+app = typer.Typer(pretty_exceptions_show_locals=False, rich_markup_mode="rich")
+
+
+@app.callback()
+def edge():
+    """The edge part of Pybiscus, for a hierarchical Federated Learning.
+
+    An edge node runs a flower server for its local clients, pre-aggregates their results,
+    and takes part in the upstream Federated Learning as a single client. It is made of two commands:
+
+    * The command launch launches an edge node, using the given config file.
+    * The command check checks if the provided configuration file satisfies the Pydantic constraints.
+    """
+
+
+@app.command(name="check")
+def check_edge_config(
+    config: Annotated[Path, typer.Argument()],
+) -> None:
+    """Check the provided edge configuration file."""
+
+    conf_loaded = load_config(config)
+
+    try:
+        _ = check_and_build_edge_config(conf_loaded)
+        logm.console.log("This is a valid conf!")
+    except ValidationError as e:
+        logm.console.log(f"This is not a valid config ! {e}")
+        raise e
+
+
+@app.command(name="launch")
+def launch_config(
+    config:         Annotated[Path, typer.Argument()],
+    cid:            Annotated[int, typer.Option(rich_help_panel="Overriding some parameters")] = None,
+    listen_address: Annotated[str, typer.Option(rich_help_panel="Overriding some parameters")] = None,
+    server_address: Annotated[str, typer.Option(rich_help_panel="Overriding some parameters")] = None,
+) -> None:
+    """Launch an edge node.
+
+    The local clients connect to the edge listen address, as to a server; the edge node connects to the
+    upstream server, as a client. Each upstream round is run by all the connected local clients (waiting
+    for edge_run.min_clients of them), and their results are pre-aggregated by the flower_fit_results_aggregator.
+
+    Parameters
+    ----------
+    config:
+        path to a config file
+    cid: optional
+        the edge identifier, as a client of the upstream server
+    listen_address: optional
+        the address and port the local clients connect to
+    server_address: optional
+        the address and port of the upstream server
+    """
+
+    conf_loaded = load_config(config)
+
+    if cid is not None:
+        conf_loaded.edge_run.cid = cid
+    if listen_address is not None:
+        conf_loaded.flower_edge.listen_address = listen_address
+    if server_address is not None:
+        conf_loaded.flower_edge.server_address = server_address
+
+    conf = check_and_build_edge_config(conf_loaded)
+
+    if len(conf.edge_run.loggers) > 0:
+        logm.console = MultipleLoggerFactory([ logger_registry()[logger.name](config=logger.config) for logger in conf.edge_run.loggers ]).get_logger()
+
+    aggregator_class = flowerfitresultsaggregator_registry()[conf.flower_fit_results_aggregator.name]
+    aggregator = aggregator_class(**conf.flower_fit_results_aggregator.config.model_dump())
+    logm.console.log(f"setting 🛠️ edge aggregator <{conf.flower_fit_results_aggregator.name}>")
+
+    # local server : the local clients connect to it, the edge drives their rounds
+    client_manager = SimpleClientManager()
+    grpc_server = start_grpc_server(
+        client_manager = client_manager,
+        server_address = conf.flower_edge.listen_address,
+        certificates   = server_certificates(conf.flower_edge.ssl),
+    )
+    logm.console.log(f"start of 🌺🛰️ edge local server on {conf.flower_edge.listen_address}")
+
+    edge_client = EdgeAggregatorClient(
+        client_manager = client_manager,
+        aggregator     = aggregator,
+        cid            = conf.edge_run.cid,
+        min_clients    = conf.edge_run.min_clients,
+        max_workers    = conf.edge_run.max_workers,
+        round_timeout  = conf.edge_run.round_timeout,
+    )
+
+    upstream_ssl = conf.flower_edge.upstream_ssl
+
+    try:
+        # upstream : the edge is a client of the upstream server, until its session ends
+        fl.client.start_client(
+            server_address    = conf.flower_edge.server_address,
+            client            = edge_client,
+            root_certificates = upstream_ssl.root_certificate if upstream_ssl is not None else None,
+            insecure          = upstream_ssl is None or not upstream_ssl.secure_cnx,
+        )
+    finally:
+        edge_client.disconnect_local_clients()
+        grpc_server.stop(grace=1)
+
+    logm.console.log("🌺🛰️ edge node ended")
+
+
+if __name__ == "__main__":
+    app()
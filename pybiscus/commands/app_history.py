@@ -0,0 +1,106 @@
+from pathlib import Path
+from typing import Annotated
+
+import numpy as np
+import torch
+import typer
+
+import pybiscus.core.pybiscus_logger as logm
+from pybiscus.core.pybiscusexception import PybiscusValueException
+from pybiscus.flower.roundhistory import RoundHistoryStore
+
+#                    ------------------------------------------------
+
+app = typer.Typer(pretty_exceptions_show_locals=False, rich_markup_mode="rich")
+
+
+@app.callback()
+def history():
+    """The round history part of Pybiscus.
+
+    It reads the global model of every round, stored by a server whose reporting has a round_history.
+    It is made of three commands:
+
+    * The command list lists the stored rounds.
+    * The command extract saves the model of a round as a checkpoint (usable as --weights-path).
+    * The command diff compares the models of two rounds, layer by layer.
+    """
+
+
+def open_store(store: Path) -> RoundHistoryStore:
+
+    round_history = RoundHistoryStore(store)
+
+    if round_history.layout is None:
+        raise PybiscusValueException(f"no round history in {store}")
+
+    return round_history
+
+#                    ------------------------------------------------
+
+@app.command(name="list")
+def list_rounds(
+    store: Annotated[Path, typer.Argument(help="round history directory")],
+) -> None:
+    """List the rounds of a round history, with their storage (full or delta) and the size of the store."""
+
+    round_history = open_store(store)
+    rounds = round_history.rounds()
+    layout = round_history.layout
+
+    for record in rounds:
+        kind = "full" if record["full"] else "delta float16" if record["float16"] else "delta float32"
+        logm.console.log(f"🗃️ round {int(record['server_round']):5d} : {kind}, {int(record['num_refs'])} chunks")
+
+    full_size   = len(rounds) * layout.numel * 4
+    stored_size = (round_history.directory / RoundHistoryStore.CHUNKS).stat().st_size
+
+    logm.console.log(
+        f"🗃️ {len(rounds)} rounds of {len(layout)} layers ({layout.numel} parameters) : "
+        f"{stored_size / 2**20:.2f} MiB stored for {full_size / 2**20:.2f} MiB of float32 parameters"
+    )
+
+#                    ------------------------------------------------
+
+@app.command(name="extract")
+def extract_round(
+    store:        Annotated[Path, typer.Argument(help="round history directory")],
+    server_round: Annotated[int,  typer.Argument(help="round to extract")],
+    output:       Annotated[Path, typer.Argument(help="checkpoint file")],
+) -> None:
+    """Save the global model of a round as a checkpoint ({"model": state_dict}, usable as --weights-path)."""
+
+    round_history = open_store(store)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    torch.save({"model": round_history.state_dict(server_round)}, output)
+
+    logm.console.log(f"🗃️ round {server_round} 💾 saved to : {output}")
+
+#                    ------------------------------------------------
+
+@app.command(name="diff")
+def diff_rounds(
+    store:   Annotated[Path, typer.Argument(help="round history directory")],
+    round_a: Annotated[int,  typer.Argument()],
+    round_b: Annotated[int,  typer.Argument()],
+) -> None:
+    """Compare the global models of two rounds : per layer norm of the difference, relative to the norm of round_a, and largest difference."""
+
+    round_history = open_store(store)
+    layout = round_history.layout
+
+    flat_a = round_history.rebuild(round_a)
+    difference = round_history.rebuild(round_b) - flat_a
+
+    for name, view_a, view_difference in zip(layout.names, layout.views(flat_a), layout.views(difference)):
+        norm = float(np.linalg.norm(view_difference))
+        relative = norm / max(float(np.linalg.norm(view_a)), np.finfo(np.float32).tiny)
+        largest = float(np.abs(view_difference).max(initial=0))
+        logm.console.log(f"🗃️ {name:40s} |Δ|={norm:.4g} |Δ|/|a|={relative:.4g} max|Δ|={largest:.4g}")
+
+    logm.console.log(f"🗃️ rounds {round_a} → {round_b} : |Δ|={float(np.linalg.norm(difference)):.4g}")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,92 @@
+import csv
+from pathlib import Path
+from typing import Annotated, Optional
+
+import typer
+
+import pybiscus.core.pybiscus_logger as logm
+from pybiscus.core.metricslogger.sqlite.metricsstore import MetricsStore
+from pybiscus.core.pybiscusexception import PybiscusValueException
+
+#                    ------------------------------------------------
+
+app = typer.Typer(pretty_exceptions_show_locals=False, rich_markup_mode="rich")
+
+
+@app.callback()
+def metrics():
+    """The metrics part of Pybiscus.
+
+    It reads the metrics stored by the sqlite metrics logger of a session. It is made of two commands:
+
+    * The command list lists the logged metrics.
+    * The command query prints (or saves as csv) the time series of the metrics matching the given criteria.
+    """
+
+
+def open_store(store: Path) -> MetricsStore:
+    """the store is a metrics file, or a reporting directory containing a metrics.sqlite file"""
+
+    if store.is_dir():
+        store = store / "metrics.sqlite"
+
+    if not store.is_file():
+        raise PybiscusValueException(f"no metrics store {store}")
+
+    return MetricsStore(store, readonly=True)
+
+#                    ------------------------------------------------
+
+@app.command(name="list")
+def list_metrics(
+    store: Annotated[Path, typer.Argument(help="metrics file, or reporting directory")],
+) -> None:
+    """List the logged metrics, with their phase, key, client, number of values and rounds."""
+
+    metrics_store = open_store(store)
+
+    for name, phase, key, client, count, first_round, last_round in metrics_store.names():
+        logm.console.log(f"📊 {name:40s} phase={phase or '-':4s} key={key:24s} client={client or '-':5s} {count:6d} values, rounds {first_round} → {last_round}")
+
+    metrics_store.close()
+
+#                    ------------------------------------------------
+
+@app.command(name="query")
+def query_metrics(
+    store:       Annotated[Path, typer.Argument(help="metrics file, or reporting directory")],
+    key:         Annotated[Optional[str],  typer.Option(help="e.g. loss, accuracy, time")] = None,
+    phase:       Annotated[Optional[str],  typer.Option(help="fit or val")] = None,
+    client:      Annotated[Optional[str],  typer.Option(help="a client cid, or glob for the server metrics")] = None,
+    name:        Annotated[Optional[str],  typer.Option(help="a logged metric name, e.g. val_accuracy_glob")] = None,
+    first_round: Annotated[Optional[int],  typer.Option()] = None,
+    last_round:  Annotated[Optional[int],  typer.Option()] = None,
+    output:      Annotated[Optional[Path], typer.Option(help="csv file of the matching rows")] = None,
+) -> None:
+    """Print the time series (one per metric name) of the metrics matching all the given criteria."""
+
+    metrics_store = open_store(store)
+    rows = metrics_store.query(key=key, phase=phase, client=client, name=name, first_round=first_round, last_round=last_round)
+    metrics_store.close()
+
+    if output is not None:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(MetricsStore.COLUMNS)
+            writer.writerows(rows)
+        logm.console.log(f"📊 {len(rows)} rows 💾 saved to : {output}")
+        return
+
+    series: dict[str, list[str]] = {}
+    for server_round, _, _, _, metric_name, value, _ in rows:
+        series.setdefault(metric_name, []).append(f"{server_round}:{value:.4g}")
+
+    for metric_name, points in series.items():
+        logm.console.log(f"📊 {metric_name} [round:value] {' '.join(points)}")
+
+    logm.console.log(f"📊 {len(rows)} rows, {len(series)} metrics")
+
+
+if __name__ == "__main__":
+    app()
@@ -9,7 +9,7 @@ from pydantic import ValidationError
 from typing import Annotated
 
 from pybiscus.core.logger.filelogger.filelogger import FileLoggerFactory
-from pybiscus.core.logger.richlogger.richloggerfactory import RichLoggerFactory
+from pybiscus.core.logger.richlogger.richloggerfactory import ConfigRichLoggerFactoryData, RichLoggerFactory
 from pybiscus.core.metricslogger.file.filemetricslogger import FileMetricsLoggerFactory
 import pybiscus.core.pybiscus_logger as logm
 from pybiscus.core.logger.multiplelogger.multipleloggerfactory import MultipleLoggerFactory
@@ -18,6 +18,20 @@ from pybiscus.plugin.registries import datamodule_registry, logger_registry, met
 from pybiscus.flower_config.config_server import ConfigServer
 from pybiscus.commands.onnx_mngt import to_onnx_with_datamodule
 from pybiscus.commands.apps_common import load_config
+from pybiscus.core.pybiscusexception import PybiscusValueException
+from pybiscus.flower.roundhistory import RoundHistoryStrategyDecorator, close_round_history
+from pybiscus.flower.prometheusexporter import PrometheusExporter, PrometheusExporterStrategyDecorator, close_prometheus_exporter
+from pybiscus.flower.serverevaluation import drain_server_evaluation
+from pybiscus.flower.sessiontrace import TracingStrategyDecorator, close_session_trace
+from pybiscus.interfaces.flower.strategydecorator import close_strategy
+from pybiscus.flower.servercheckpoint import (
+    ServerCheckpointStrategyDecorator,
+    close_server_checkpoints,
+    latest_server_checkpoint,
+    load_strategy_state,
+    resumed_round,
+    strategy_state,
+)
 
 #                    ------------------------------------------------
 
@@ -148,43 +162,8 @@ def server_certificates(conf_ssl):
 
 #                    ------------------------------------------------
 
-@app.command(name="launch")
-def launch_config(
-    config:                Annotated[Path, typer.Argument()],
-    num_rounds:            Annotated[int, typer.Option(rich_help_panel="Overriding some parameters")] = None,
-    server_listen_address: Annotated[str, typer.Option(rich_help_panel="Overriding some parameters")] = None,
-    weights_path:          Annotated[Path,typer.Option(rich_help_panel="Overriding some parameters")] = None,
-):
-    """Launch a Flower Server.
-
-    This is a Typer command to launch a Flower Server, using the configuration given by config.
-    Apart from the config parameter, other parameters are optional and, if given, override the associated parameter given by the parameter config.
-
-    Parameters
-    ----------
-    config:
-        path to a config file
-    num_rounds: optional
-        the number of Federated rounds
-    server_listen_address: optional
-        the IP address and port of the Flower Server.
-    weights_path: optional
-        path to the weights of the model to be loaded at the beginning of the Federated Learning.
-    """
-
-    # handling mandatory config path parameter
-
-    conf_loaded = load_config(config)
-
-    # handling optional num rounds and server address parameters
-    # it overrides the values from configuration file
-
-    if num_rounds is not None:
-        conf_loaded.server_run.num_rounds = num_rounds
-    if server_listen_address is not None:
-        conf_loaded.flower_server.listen_address = server_listen_address
-
-    conf = check_and_build_server_config(conf_loaded)
+def compute_reporting_path(conf: ConfigServer) -> Path:
+    """the reporting directory (created), or the root directory when there is no reporting"""
 
     # compute the reporting path
     if conf.server_run.reporting:
@@ -201,6 +180,13 @@ def launch_config(
     else:
         reporting_path = conf.root_dir
 
+    return reporting_path
+
+#                    ------------------------------------------------
+
+def setup_server_loggers(conf: ConfigServer, reporting_path: Path):
+    """install the server loggers (console and reporting directory), and return the metrics logger"""
+
     logm.console.log(f"reporting 💾 path is set to : {reporting_path}")
 
     # load the loggers
@@ -214,7 +200,7 @@ def launch_config(
         _logger_classes.append( _file_logger_factory )
     else:
         # default is : log to the console and to reporting directory
-        _logger_classes = [ RichLoggerFactory(), _file_logger_factory ]
+        _logger_classes = [ RichLoggerFactory(config=ConfigRichLoggerFactoryData()), _file_logger_factory ]
 
     logm.console = MultipleLoggerFactory(_logger_classes).get_logger()
 
@@ -227,9 +213,17 @@ def launch_config(
     # add this factory to the list
     _metricslogger_classes.append( _file_metrics_logger_factory )
 
-    _metricslogger = MultipleMetricsLoggerFactory(_metricslogger_classes).get_metricslogger(reporting_path)
+    return MultipleMetricsLoggerFactory(_metricslogger_classes).get_metricslogger(reporting_path)
+
+#                    ------------------------------------------------
+
+def build_server_strategy(conf: ConfigServer, metricslogger, weights_path: Path = None, reporting_path: Path = None, resume: bool = False):
+    """fabric, model, datamodule and (decorated) flower strategy of a server configuration
+
+    With resume, weights_path is a periodic checkpoint : the strategy decorators state and the round are restored too.
+    """
 
-    fabric = Fabric(**conf.server_compute_context.hardware.model_dump(), loggers=[_metricslogger])
+    fabric = Fabric(**conf.server_compute_context.hardware.model_dump(), loggers=[metricslogger])
     fabric.launch()
 
     # load the model
@@ -248,9 +242,11 @@ def launch_config(
     initial_parameters = None
     initial_parameters_log_message = "No weights provided, random server-side initialization instead."
 
+    checkpoint = None
+
     if weights_path is not None:
-        state = fabric.load(weights_path)["model"]
-        model.load_state_dict(state)
+        checkpoint = fabric.load(weights_path)
+        model.load_state_dict(checkpoint["model"])
         initial_parameters_log_message = f"Loaded weights from {weights_path}"
 
     params = torch.nn.ParameterList(
@@ -278,18 +274,84 @@ def launch_config(
         logm.console.log(f"setting 🛠️🎀 strategy decorator <{conf_decorator.name}>")
         decorator_class = strategydecorator_registry()[conf_decorator.name]
         strategy = decorator_class(strategy,conf_decorator.config)
-    
-    logm.console.log("start of 🌺🖥️ flower server")
 
-    # starting flower server
-    fl.server.start_server(
-        server_address = conf.flower_server.listen_address,
-        config         = fl.server.ServerConfig(num_rounds=conf.server_run.num_rounds),
-        strategy       = strategy,
-        certificates   = server_certificates(conf.flower_server.ssl),
-    )
+    # server optimizer state (e.g. FedAdam moments) of the checkpoint
+    round_offset = 0
+    if checkpoint is not None:
+        load_strategy_state(strategy, checkpoint, decorators=resume)
+        if resume:
+            round_offset = int(checkpoint.get("server_round", 0))
+            logm.console.log(f"♻️ resuming the Federated Learning after round {round_offset}")
+
+    # global model of every round
+    round_history = conf.server_run.reporting.round_history if conf.server_run.reporting else None
+
+    if round_history is not None:
+        strategy = RoundHistoryStrategyDecorator(
+            strategy,
+            reporting_path / round_history.dirname,
+            **round_history.model_dump(exclude={"dirname"}),
+        )
+
+    # spans of the rounds, on the server and the clients
+    trace = conf.server_run.reporting.trace if conf.server_run.reporting else None
+
+    if trace is not None:
+        strategy = TracingStrategyDecorator(
+            strategy,
+            reporting_path / trace.filename,
+            client_spans      = trace.client_spans,
+            max_client_events = trace.max_client_events,
+        )
+
+    # metrics scraped by prometheus
+    prometheus_exporter = conf.server_compute_context.prometheus_exporter
+
+    if prometheus_exporter is not None:
+        strategy = PrometheusExporterStrategyDecorator(strategy, PrometheusExporter(**prometheus_exporter.model_dump()))
+
+    # periodic checkpoints, and round numbering of a resumed session
+    periodic_checkpoint = conf.server_run.reporting.save_every_n_rounds if conf.server_run.reporting else None
+
+    if periodic_checkpoint is not None or round_offset > 0:
+        strategy = ServerCheckpointStrategyDecorator(
+            strategy,
+            model,
+            every_n_rounds = periodic_checkpoint.every_n_rounds if periodic_checkpoint else None,
+            directory      = reporting_path / periodic_checkpoint.dirname if periodic_checkpoint else None,
+            keep_last      = periodic_checkpoint.keep_last if periodic_checkpoint else None,
+            round_offset   = round_offset,
+        )
+
+    return fabric, model, data, strategy
 
-    logm.console.log("🌺🖥️ flower server ended")
+#                    ------------------------------------------------
+
+def resume_checkpoint_path(conf: ConfigServer, weights_path: Path = None) -> Path:
+    """the latest periodic checkpoint of the reporting basedir, to resume from"""
+
+    if weights_path is not None:
+        raise PybiscusValueException("--resume and --weights-path are exclusive")
+
+    reporting = conf.server_run.reporting
+    if not reporting or not reporting.save_every_n_rounds:
+        raise PybiscusValueException("--resume needs periodic checkpoints (server_run.reporting.save_every_n_rounds)")
+
+    checkpoint_path = latest_server_checkpoint(Path(reporting.basedir), reporting.save_every_n_rounds.dirname)
+    if checkpoint_path is None:
+        raise PybiscusValueException(f"--resume : no checkpoint found under {reporting.basedir}")
+
+    logm.console.log(f"♻️ resuming from checkpoint {checkpoint_path}")
+    return checkpoint_path
+
+def remaining_rounds(conf: ConfigServer, strategy) -> int:
+    """number of rounds of the session : all of them, or those after the resumed round"""
+    return max(conf.server_run.num_rounds - resumed_round(strategy), 0)
+
+#                    ------------------------------------------------
+
+def save_server_reporting(conf: ConfigServer, conf_loaded, reporting_path: Path, fabric, model, data, strategy=None):
+    """optional checkpoint, onnx export and server config, saved into the reporting directory"""
 
     # produce reporting
     if conf.server_run.reporting:
@@ -298,6 +360,10 @@ def launch_config(
         if conf.server_run.reporting.save_on_train_end:
             state = {"model": model}
 
+            # server optimizer and strategy decorators states (e.g. FedAdam moments)
+            if strategy is not None:
+                state.update(strategy_state(strategy))
+
             checkpoint_path = reporting_path / conf.server_run.reporting.save_on_train_end.filename
             ensure_file_dir_exists(checkpoint_path)
             fabric.save(checkpoint_path, state)
@@ -320,6 +386,79 @@ def launch_config(
             OmegaConf.save(config=conf_loaded, f=file)
             logm.console.log(f"[pybiscus] save server config 💾🖧⚙️ to : {serverconfig_path}")
 
+#                    ------------------------------------------------
+
+@app.command(name="launch")
+def launch_config(
+    config:                Annotated[Path, typer.Argument()],
+    num_rounds:            Annotated[int, typer.Option(rich_help_panel="Overriding some parameters")] = None,
+    server_listen_address: Annotated[str, typer.Option(rich_help_panel="Overriding some parameters")] = None,
+    weights_path:          Annotated[Path,typer.Option(rich_help_panel="Overriding some parameters")] = None,
+    resume:                Annotated[bool,typer.Option(rich_help_panel="Overriding some parameters", help="restart from the latest periodic checkpoint")] = False,
+):
+    """Launch a Flower Server.
+
+    This is a Typer command to launch a Flower Server, using the configuration given by config.
+    Apart from the config parameter, other parameters are optional and, if given, override the associated parameter given by the parameter config.
+
+    Parameters
+    ----------
+    config:
+        path to a config file
+    num_rounds: optional
+        the number of Federated rounds
+    server_listen_address: optional
+        the IP address and port of the Flower Server.
+    weights_path: optional
+        path to the weights of the model to be loaded at the beginning of the Federated Learning.
+    resume: optional
+        restart from the latest periodic checkpoint of the reporting basedir (weights, server optimizer
+        and strategy decorators states), for the rounds after the checkpointed one.
+    """
+
+    # handling mandatory config path parameter
+
+    conf_loaded = load_config(config)
+
+    # handling optional num rounds and server address parameters
+    # it overrides the values from configuration file
+
+    if num_rounds is not None:
+        conf_loaded.server_run.num_rounds = num_rounds
+    if server_listen_address is not None:
+        conf_loaded.flower_server.listen_address = server_listen_address
+
+    conf = check_and_build_server_config(conf_loaded)
+
+    if resume:
+        weights_path = resume_checkpoint_path(conf, weights_path)
+
+    reporting_path = compute_reporting_path(conf)
+    metricslogger  = setup_server_loggers(conf, reporting_path)
+
+    fabric, model, data, strategy = build_server_strategy(conf, metricslogger, weights_path, reporting_path, resume)
+
+    logm.console.log("start of 🌺🖥️ flower server")
+
+    # starting flower server
+    history = fl.server.start_server(
+        server_address = conf.flower_server.listen_address,
+        config         = fl.server.ServerConfig(num_rounds=remaining_rounds(conf, strategy)),
+        strategy       = strategy,
+        certificates   = server_certificates(conf.flower_server.ssl),
+    )
+
+    # background server evaluations, checkpoints and round history still running
+    drain_server_evaluation(strategy, history)
+    close_server_checkpoints(strategy)
+    close_round_history(strategy)
+    close_session_trace(strategy)
+    close_prometheus_exporter(strategy)
+    close_strategy(strategy)
+
+    logm.console.log("🌺🖥️ flower server ended")
+
+    save_server_reporting(conf, conf_loaded, reporting_path, fabric, model, data, strategy)
 
     # optional clients config logging
     # manage statically clients config (path defined in server config: legacy CLI mode)
@@ -0,0 +1,233 @@
+import copy
+from pathlib import Path
+from typing import Annotated, Any, Optional
+
+import flwr as fl
+import typer
+from flwr.client import Client
+from flwr.server.client_manager import SimpleClientManager
+from omegaconf import OmegaConf
+
+import pybiscus.core.pybiscus_logger as logm
+from pybiscus.commands.app_server import build_server_strategy, check_and_build_server_config, compute_reporting_path, remaining_rounds, resume_checkpoint_path, save_server_reporting, setup_server_loggers
+from pybiscus.commands.app_client import build_client, check_and_build_client_config
+from pybiscus.commands.apps_common import load_config
+from pybiscus.core.pybiscusexception import PybiscusValueException
+from pybiscus.flower.inmemorytransport import ClientProcessPool, InMemoryClientProxy
+from pybiscus.flower.roundhistory import close_round_history
+from pybiscus.flower.servercheckpoint import close_server_checkpoints
+from pybiscus.flower.prometheusexporter import close_prometheus_exporter
+from pybiscus.flower.sessiontrace import close_session_trace
+from pybiscus.flower.serverevaluation import drain_server_evaluation
+from pybiscus.interfaces.flower.strategydecorator import close_strategy
+from pybiscus.ml.data.partition import PartitionDataModule, dataset_targets, partition_indices
+from pybiscus.plugin.registries import datamodule_registry
+
+#                    ------------------------------------------------
+
+def build_simulated_clients(specs: list[dict[str, Any]]) -> dict[str, Client]:
+    """flower clients of the given specifications, cid -> Client
+
+    A specification is a client configuration (plain dict) and an optional partition
+    (method, num_partitions, index, seed, alpha) of the training set.
+    Clients with the same data configuration share one datamodule (set up once),
+    partitioned clients get their share of its training set.
+    """
+
+    datamodules = {}
+    partitions  = {}
+    clients     = {}
+
+    for spec in specs:
+
+        conf = check_and_build_client_config(spec["config"])
+        cid  = str(conf.client_run.cid)
+
+        if cid in clients:
+            raise PybiscusValueException(f"simulated clients must have distinct cids, {cid} is used twice")
+
+        data_key = conf.data.model_dump_json()
+
+        if data_key not in datamodules:
+            logm.console.log(f"📂 setting up datamodule <{conf.data.name}> for simulated clients")
+            data = datamodule_registry()[conf.data.name](**conf.data.config.model_dump())
+            data.setup(stage="fit")
+            datamodules[data_key] = data
+
+        data = datamodules[data_key]
+
+        if spec["partition"] is not None:
+            method, num_partitions, index, seed, alpha = spec["partition"]
+            partition_key = (data_key, method, num_partitions, seed, alpha)
+
+            if partition_key not in partitions:
+                trainset = data.train_dataloader().dataset
+                partitions[partition_key] = partition_indices(len(trainset), num_partitions, method, seed, dataset_targets(trainset), alpha)
+
+            indices = partitions[partition_key][index]
+            logm.console.log(f"🆔{cid} {method} partition {index + 1}/{num_partitions} : {len(indices)} training samples")
+            data = PartitionDataModule(data, indices)
+
+        clients[cid] = build_client(conf, data).to_client()
+
+    return clients
+
+#                    ------------------------------------------------
+
+def client_specs(
+    client_configs: list[Path],
+    num_clients: Optional[int],
+    partition: Optional[str],
+    seed: int,
+    dirichlet_alpha: float,
+) -> list[dict[str, Any]]:
+    """one specification per simulated client : the given client configs, or num_clients copies of a single one"""
+
+    if len(client_configs) == 0:
+        raise PybiscusValueException("at least one client configuration is needed")
+
+    if num_clients is None:
+        if partition is not None:
+            raise PybiscusValueException("--partition needs a single client configuration and --num-clients")
+        return [ { "config": OmegaConf.to_container(load_config(path), resolve=True), "partition": None } for path in client_configs ]
+
+    if len(client_configs) != 1:
+        raise PybiscusValueException("--num-clients needs exactly one (template) client configuration")
+
+    template = OmegaConf.to_container(load_config(client_configs[0]), resolve=True)
+    specs = []
+
+    for index in range(num_clients):
+        config = copy.deepcopy(template)
+        config["client_run"]["cid"] = index + 1
+        specs.append({
+            "config":    config,
+            "partition": (partition, num_clients, index, seed, dirichlet_alpha) if partition is not None else None,
+        })
+
+    return specs
+
+#                    ------------------------------------------------
+
+app = typer.Typer(pretty_exceptions_show_locals=False, rich_markup_mode="rich")
+
+
+@app.callback()
+def simulate():
+    """The simulation part of Pybiscus.
+
+    It is made of one command:
+
+    * The command launch runs a whole Federated Learning in a single command: the server strategy and all the clients,
+      exchanging through memory instead of grpc.
+    """
+
+
+@app.command(name="launch")
+def launch_simulation(
+    server_config:   Annotated[Path, typer.Argument()],
+    client_configs:  Annotated[list[Path], typer.Argument()],
+    num_clients:     Annotated[int,   typer.Option(rich_help_panel="Clients", help="number of clients built from a single client config")] = None,
+    partition:       Annotated[str,   typer.Option(rich_help_panel="Clients", help="split of the training set among the clients: iid or dirichlet")] = None,
+    dirichlet_alpha: Annotated[float, typer.Option(rich_help_panel="Clients")] = 0.5,
+    seed:            Annotated[int,   typer.Option(rich_help_panel="Clients")] = 0,
+    executor:        Annotated[str,   typer.Option(rich_help_panel="Execution", help="thread: clients in the server process, process: clients in worker processes")] = "thread",
+    max_workers:     Annotated[int,   typer.Option(rich_help_panel="Execution", help="number of clients running concurrently")] = 4,
+    num_rounds:      Annotated[int,   typer.Option(rich_help_panel="Overriding some parameters")] = None,
+    weights_path:    Annotated[Path,  typer.Option(rich_help_panel="Overriding some parameters")] = None,
+    resume:          Annotated[bool,  typer.Option(rich_help_panel="Overriding some parameters", help="restart from the latest periodic checkpoint")] = False,
+) -> None:
+    """Simulate a Federated Learning.
+
+    The server strategy (with its decorators) is the one of the server config, as for server launch;
+    the clients are FlowerFabricClient instances, built from the client configs, or from one client config
+    and --num-clients with an optional --partition of its training set.
+    Server and clients exchange instructions and results in memory: no grpc with the thread executor, pickled
+    through pipes with the process executor. The parameters are serialized ndarrays (bytes) in both cases, as
+    exchanged by flower clients. Clients sharing a data config share one datamodule (per worker process).
+
+    Parameters
+    ----------
+    server_config:
+        path to the server config file
+    client_configs:
+        paths to the client config files (a single one with --num-clients)
+    num_clients: optional
+        number of clients built from the single client config (cids 1..num_clients)
+    partition: optional
+        iid or dirichlet (label skew, see --dirichlet-alpha) split of the training set among the num_clients clients
+    executor:
+        thread or process
+    max_workers:
+        number of clients running concurrently (threads or worker processes)
+    num_rounds: optional
+        the number of Federated rounds
+    weights_path: optional
+        path to the weights of the model to be loaded at the beginning of the Federated Learning.
+    resume: optional
+        restart from the latest periodic checkpoint, as server launch --resume
+    """
+
+    if executor not in ("thread", "process"):
+        raise PybiscusValueException(f"unknown executor {executor}, expected thread or process")
+    if partition not in (None, "iid", "dirichlet"):
+        raise PybiscusValueException(f"unknown partition {partition}, expected iid or dirichlet")
+    if max_workers <= 0:
+        raise PybiscusValueException(f"max_workers should be positive, got {max_workers}")
+
+    conf_loaded = load_config(server_config)
+
+    if num_rounds is not None:
+        conf_loaded.server_run.num_rounds = num_rounds
+
+    conf = check_and_build_server_config(conf_loaded)
+
+    specs = client_specs(client_configs, num_clients, partition, seed, dirichlet_alpha)
+
+    if resume:
+        weights_path = resume_checkpoint_path(conf, weights_path)
+
+    reporting_path = compute_reporting_path(conf)
+    metricslogger  = setup_server_loggers(conf, reporting_path)
+
+    fabric, model, data, strategy = build_server_strategy(conf, metricslogger, weights_path, reporting_path, resume)
+
+    pool = None
+
+    if executor == "process":
+        # clients distributed round robin among the workers
+        nb_workers = min(max_workers, len(specs))
+        pool = ClientProcessPool(build_simulated_clients, [ specs[worker::nb_workers] for worker in range(nb_workers) ])
+        proxies = pool.proxies()
+    else:
+        proxies = [ InMemoryClientProxy(cid, client) for cid, client in build_simulated_clients(specs).items() ]
+
+    client_manager = SimpleClientManager()
+    for proxy in proxies:
+        client_manager.register(proxy)
+
+    server = fl.server.Server(client_manager=client_manager, strategy=strategy)
+    server.set_max_workers(max_workers)
+
+    logm.console.log(f"start of 🌺🧪 flower simulation : {len(proxies)} clients, {executor} executor, {max_workers} workers")
+
+    try:
+        history, elapsed = server.fit(num_rounds=remaining_rounds(conf, strategy), timeout=None)
+        drain_server_evaluation(strategy, history)
+        close_server_checkpoints(strategy)
+        close_round_history(strategy)
+        close_session_trace(strategy)
+        close_prometheus_exporter(strategy)
+    finally:
+        close_strategy(strategy)
+        if pool is not None:
+            pool.shutdown()
+
+    logm.console.log(f"🌺🧪 flower simulation ended in {elapsed:.2f}s")
+    logm.console.log(history)
+
+    save_server_reporting(conf, conf_loaded, reporting_path, fabric, model, data, strategy)
+
+
+if __name__ == "__main__":
+    app()
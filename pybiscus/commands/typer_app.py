@@ -3,13 +3,21 @@ from trogon import Trogon
 from typer.main import get_group
 
 import pybiscus.commands.app_client as client
+import pybiscus.commands.app_edge as edge
+import pybiscus.commands.app_history as round_history
 import pybiscus.commands.app_local as local_train
+import pybiscus.commands.app_metrics as metrics
 import pybiscus.commands.app_server as server
+import pybiscus.commands.app_simulate as simulate
 
 app = typer.Typer(pretty_exceptions_show_locals=False, rich_markup_mode="rich")
 app.add_typer(server.app, name="server")
 app.add_typer(client.app, name="client")
+app.add_typer(edge.app, name="edge")
 app.add_typer(local_train.app, name="local")
+app.add_typer(simulate.app, name="simulate")
+app.add_typer(round_history.app, name="history")
+app.add_typer(metrics.app, name="metrics")
 
 
 @app.command()
@@ -21,14 +29,22 @@ def tui(ctx: typer.Context):
 def explain():
     """
 
-    **The Pybiscus app is made of three commands:**
+    **The Pybiscus app is made of seven commands:**
 
     * server: to launch a server for a Federated Learning session.
 
     * client: to launch a client for a Federated Learning session.
 
+    * edge: to launch an edge node, aggregating its local clients for a hierarchical Federated Learning session.
+
     * local: to train locally a model.
 
+    * simulate: to run a whole Federated Learning session (server and clients) in a single command.
+
+    * history: to list, extract or compare the global models of the rounds of a session.
+
+    * metrics: to list or query the metrics of a session, stored by the sqlite metrics logger.
+
     ---
 
     Build on top of Flower using Typer for the CLI and script parts,
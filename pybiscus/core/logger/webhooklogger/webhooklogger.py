@@ -1,47 +1,37 @@
-import requests
+from pybiscus.core.webhooksender import WebHookSender
 
 class WebHookLogger:
 
-    def __init__(self, webhook_url, logger_id):
+    def __init__(self, webhook_url, logger_id, **sender_options):
         """
         Initialise le logger avec l'URL du webhook et l'identifiant unique du logger.
         
         :param webhook_url: URL du webhook pour envoyer les messages
         :param logger_id: Identifiant unique à ajouter dans la payload sous 'source'
+        :param sender_options: batching des messages (voir ConfigWebHookSender)
         """
         self.webhook_url = webhook_url
         self.logger_id = logger_id
 
+        # messages are sent in batches by a background thread
+        self.sender = WebHookSender(webhook_url, logger_id, **sender_options)
+
     def log(self, *msgs):
         """
-        Envoie un message de log au webhook en ajoutant un champ 'source' à la payload.
+        Ajoute un message de log à la file d'envoi au webhook (non bloquant).
         
         :param msgs: Messages à loguer, qui seront concaténés et envoyés
         """
         # create the message to be sent
         message = " ".join(str(msg) for msg in msgs)
-        
-        # create the payload with the id the field 'source'
-        payload = {
-            'content': message,
-            'source': self.logger_id
-        }
-        
-        try:
-            # send the message to the webhook using a POST request
-            response = requests.post(self.webhook_url, json=payload)
-            response.raise_for_status()  # check error in case of error status
-
-            print("✅ Log Webhook call success : ", payload)
 
-        except requests.Timeout:
-            print("❌ Log Webhook Failure on timeout")
+        self.sender.put({'content': message})
 
-        except requests.HTTPError as http_err:
-            print(f"❌ Log Webhook HTTP error : {response.status_code} – {http_err}")
-
-        except requests.exceptions.RequestException as err:
-            print(f"❌ Log Webhook Other error : {err}")
+    def close(self):
+        """
+        Envoie les messages en attente.
+        """
+        self.sender.close()
 
 
 
@@ -52,3 +42,4 @@ if __name__ == "__main__":
 
     logger.log("C'est un message de log", "avec plusieurs parties", 123)
     logger.log("Un autre message de log")
+    logger.close()
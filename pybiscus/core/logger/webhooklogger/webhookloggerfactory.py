@@ -4,6 +4,7 @@ from pydantic import BaseModel, ConfigDict
 
 from pybiscus.interfaces.core.logger import LoggerFactory
 from pybiscus.core.logger.webhooklogger.webhooklogger import WebHookLogger
+from pybiscus.core.webhooksender import ConfigWebHookSender
 
 class ConfigWebHookLoggerFactoryData(BaseModel):
 
@@ -11,6 +12,7 @@ class ConfigWebHookLoggerFactoryData(BaseModel):
 
     webhook_url: str = "http://localhost:5555/webhook/logs"
     logger_id: str   = "🖧"
+    sender: ConfigWebHookSender = ConfigWebHookSender()
 
     model_config = ConfigDict(extra="forbid")
 
@@ -34,4 +36,4 @@ class WebHookLoggerFactory(LoggerFactory):
 
     def get_logger(self):
 
-        return WebHookLogger(webhook_url=self.config.webhook_url,logger_id=self.config.logger_id )
+        return WebHookLogger(webhook_url=self.config.webhook_url,logger_id=self.config.logger_id,**self.config.sender.model_dump())
@@ -0,0 +1,13 @@
+from typing import Dict, List, Tuple
+from pydantic import BaseModel
+
+from pybiscus.interfaces.core.metricsloggerfactory import MetricsLoggerFactory
+from pybiscus.core.metricslogger.sqlite.sqlitemetricsloggerfactory import ConfigSQLiteMetricsLoggerFactory, SQLiteMetricsLoggerFactory
+
+
+def get_modules_and_configs() -> Tuple[Dict[str, MetricsLoggerFactory], List[BaseModel]]:
+
+    registry = {"sqlite": SQLiteMetricsLoggerFactory, }
+    configs  = [ConfigSQLiteMetricsLoggerFactory, ]
+
+    return registry, configs
@@ -0,0 +1,101 @@
+import re
+import sqlite3
+from pathlib import Path
+from typing import ClassVar, Optional, Union
+
+
+class MetricsStore:
+    """Metrics of a session, in an append-only SQLite table (WAL mode) : one row per logged value.
+
+    The columns of a row are : server_round, client, phase, key, name, value, timestamp.
+    The name is the logged metric name ; the strategies name their metrics <phase>_<key>_<client>
+    (e.g. fit_loss_3, val_accuracy_glob), which are split into the phase, key and client columns.
+    Other names (e.g. aggregation_time) are stored with the name as key, and no phase nor client.
+    """
+
+    TABLE: ClassVar[str] = "metrics"
+
+    COLUMNS: ClassVar[tuple[str, ...]] = ("server_round", "client", "phase", "key", "name", "value", "timestamp")
+
+    # <phase>_<key>_<client> : the client is a cid, or glob for the global (server) metrics
+    NAME_PATTERN: ClassVar[re.Pattern] = re.compile(r"^(fit|val)_(.+)_(\d+|glob)$")
+
+    def __init__(self, path: Union[str, Path], readonly: bool = False):
+
+        self.path = Path(path)
+
+        if readonly:
+            self.connection = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+
+        # readers (e.g. pybiscus metrics query) do not block the running session
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.TABLE} ("
+            "server_round INTEGER, client TEXT, phase TEXT, key TEXT NOT NULL, name TEXT NOT NULL, value REAL, timestamp REAL)"
+        )
+        self.connection.execute(f"CREATE INDEX IF NOT EXISTS {self.TABLE}_series ON {self.TABLE} (key, phase, client, server_round)")
+        self.connection.commit()
+
+    @classmethod
+    def split_name(cls, name: str) -> tuple[Optional[str], str, Optional[str]]:
+        """phase, key and client of a metric name"""
+
+        match = cls.NAME_PATTERN.match(name)
+        if match is None:
+            return None, name, None
+
+        phase, key, client = match.groups()
+        return phase, key, client
+
+    def append(self, rows: list[tuple]) -> None:
+        """appends rows (in the COLUMNS order), in a single transaction"""
+
+        with self.connection:
+            self.connection.executemany(f"INSERT INTO {self.TABLE} VALUES ({', '.join('?' * len(self.COLUMNS))})", rows)
+
+    def names(self) -> list[tuple]:
+        """the logged metrics : (name, phase, key, client, number of rows, first round, last round)"""
+
+        return self.connection.execute(
+            f"SELECT name, phase, key, client, COUNT(*), MIN(server_round), MAX(server_round) FROM {self.TABLE} "
+            "GROUP BY name ORDER BY phase, key, client"
+        ).fetchall()
+
+    def query(
+            self,
+            key: Optional[str] = None,
+            phase: Optional[str] = None,
+            client: Optional[str] = None,
+            name: Optional[str] = None,
+            first_round: Optional[int] = None,
+            last_round: Optional[int] = None,
+            ) -> list[tuple]:
+        """the rows matching all the given criteria, by round then timestamp"""
+
+        criteria = [ ("key = ?", key), ("phase = ?", phase), ("client = ?", client), ("name = ?", name),
+                     ("server_round >= ?", first_round), ("server_round <= ?", last_round) ]
+        criteria = [ (condition, value) for condition, value in criteria if value is not None ]
+
+        where = f" WHERE {' AND '.join(condition for condition, _ in criteria)}" if criteria else ""
+
+        return self.connection.execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM {self.TABLE}{where} ORDER BY server_round, timestamp",
+            [ value for _, value in criteria ],
+        ).fetchall()
+
+    def series(self, key: str, phase: Optional[str] = None, client: Optional[str] = None) -> dict[str, list[tuple[int, float]]]:
+        """the time series of a key : (round, value) lists, by metric name (e.g. one per client)"""
+
+        series: dict[str, list[tuple[int, float]]] = {}
+        for row in self.query(key=key, phase=phase, client=client):
+            series.setdefault(row[4], []).append((row[0], row[5]))
+
+        return series
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,87 @@
+import atexit
+import threading
+import time
+from typing import Optional
+
+from pybiscus.core.metricslogger.sqlite.metricsstore import MetricsStore
+
+
+class SQLiteMetricsLogger():
+    """Appends the logged metrics to a MetricsStore, in batches.
+
+    The rows are buffered, and written in a single transaction once batch_size rows are buffered,
+    or by a background thread at most flush_interval seconds after they were logged (at each call if 0) ;
+    the buffer is flushed on close and at exit.
+    """
+
+    def __init__(self, path, batch_size=256, flush_interval=5.0):
+
+        self.store          = MetricsStore(path)
+        self.batch_size     = batch_size
+        self.flush_interval = flush_interval
+
+        self.rows      = []
+        self.condition = threading.Condition()
+        self.closed    = False
+        self.thread: Optional[threading.Thread] = None
+
+        atexit.register(self.close)
+
+    def log_metrics(self, metrics, step=None):
+
+        timestamp = time.time()
+        rows = []
+
+        for name, value in metrics.items():
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                # the store is numeric
+                continue
+
+            phase, key, client = MetricsStore.split_name(name)
+            rows.append((step, client, phase, key, name, value, timestamp))
+
+        with self.condition:
+            if self.closed:
+                return
+
+            self.rows.extend(rows)
+
+            if len(self.rows) >= self.batch_size or self.flush_interval == 0:
+                self._flush()
+            elif self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="pyb_sqlite_metrics", daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        """writes the buffered rows every flush_interval seconds, until closed"""
+
+        with self.condition:
+            while not self.closed:
+                self.condition.wait(timeout=self.flush_interval)
+                if not self.closed:
+                    self._flush()
+
+    def _flush(self):
+
+        if self.rows:
+            self.store.append(self.rows)
+            self.rows = []
+
+    def flush(self):
+        with self.condition:
+            if not self.closed:
+                self._flush()
+
+    def close(self):
+        with self.condition:
+            if self.closed:
+                return
+            self._flush()
+            self.closed = True
+            self.store.close()
+            self.condition.notify_all()
+
+        if self.thread is not None:
+            self.thread.join()
@@ -0,0 +1,50 @@
+from pathlib import Path
+from typing import ClassVar, Literal
+from pydantic import BaseModel, ConfigDict, Field
+from pybiscus.interfaces.core.metricsloggerfactory import MetricsLoggerFactory
+from pybiscus.core.metricslogger.sqlite.sqlitemetricslogger import SQLiteMetricsLogger
+import pybiscus.core.pybiscus_logger as logm
+
+class ConfigSQLiteMetricsLoggerFactoryData(BaseModel):
+    """The filename is relative to the path defined by :
+server_run.reporting.basedir
+whose default is $(root_dir)/experiments/date-hour/
+The metrics are written in batches of batch_size rows, or every flush_interval seconds.
+Query them with : pybiscus metrics query"""
+
+    PYBISCUS_CONFIG: ClassVar[str] = "config"
+
+    filename:       str   = "metrics.sqlite"
+    batch_size:     int   = Field( default=256, gt=0 )
+    flush_interval: float = Field( default=5.0, ge=0 )
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class ConfigSQLiteMetricsLoggerFactory(BaseModel):
+
+    name:   Literal["sqlite"]
+
+    PYBISCUS_ALIAS: ClassVar[str] = "SQLite"
+
+    config: ConfigSQLiteMetricsLoggerFactoryData
+
+    model_config = ConfigDict(extra="forbid")
+
+    # to emulate a dict
+    def __getitem__(self, attName):
+        return getattr(self, attName, None)
+
+
+class SQLiteMetricsLoggerFactory(MetricsLoggerFactory):
+
+    def __init__(self, config):
+        super().__init__()
+        self.config = config
+
+    def get_metricslogger(self,reporting_path):
+
+        path = Path(reporting_path) / Path(self.config.filename)
+
+        logm.console.log(f"SQLiteMetricsLogger allocated with 💾 {str(path)}")
+        return SQLiteMetricsLogger(path, batch_size=self.config.batch_size, flush_interval=self.config.flush_interval)
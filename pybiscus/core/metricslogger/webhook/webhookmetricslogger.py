@@ -1,32 +1,23 @@
-import requests
-from requests.exceptions import RequestException, Timeout
+from pybiscus.core.webhooksender import WebHookSender
 
 class WebHookMetricsLogger():
 
-    def __init__(self, webhook_url, logger_id):
+    def __init__(self, webhook_url, logger_id, **sender_options):
         self.webhook_url = webhook_url
         self.logger_id = logger_id
 
+        # metrics are sent in batches by a background thread
+        self.sender = WebHookSender(webhook_url, logger_id, **sender_options)
+
     def log_metrics(self, metrics, step=-1):
         
         if step is None:
             step = -1
 
-        try:
-            _metrics = metrics.copy()
-            _metrics['step'] = step
-            msg = { 'source' : self.logger_id, 'metrics' : _metrics }
-
-            response = requests.post(self.webhook_url, json=msg, timeout=5)
-            response.raise_for_status()  # raise an exception upon codes 4xx/5xx
-
-            print("✅ Metrics log Webhook call success")
-
-        except Timeout:
-            print("❌ Metrics log Webhook Failure on timeout")
+        _metrics = dict(metrics)
+        _metrics['step'] = step
 
-        except requests.HTTPError as http_err:
-            print(f"❌ Metrics log Webhook HTTP error : {response.status_code} – {http_err}")
+        self.sender.put({ 'metrics' : _metrics })
 
-        except RequestException as err:
-            print(f"❌ Metrics log Webhook Other error : {err}")
+    def close(self):
+        self.sender.close()
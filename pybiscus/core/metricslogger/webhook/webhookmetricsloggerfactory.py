@@ -3,6 +3,7 @@ from typing import ClassVar, Literal
 from pydantic import BaseModel, ConfigDict
 from pybiscus.interfaces.core.metricsloggerfactory import MetricsLoggerFactory
 from pybiscus.core.metricslogger.webhook.webhookmetricslogger import WebHookMetricsLogger
+from pybiscus.core.webhooksender import ConfigWebHookSender
 
 class ConfigWebHookMetricsLoggerFactoryData(BaseModel):
 
@@ -10,6 +11,7 @@ class ConfigWebHookMetricsLoggerFactoryData(BaseModel):
 
     webhook_url: str = "http://localhost:5555/webhook/metrics"
     logger_id: str   = "🖧"
+    sender: ConfigWebHookSender = ConfigWebHookSender()
 
     model_config = ConfigDict(extra="forbid")
 
@@ -33,4 +35,4 @@ class WebHookMetricsLoggerFactory(MetricsLoggerFactory):
 
     def get_metricslogger(self,reporting_path):
 
-        return WebHookMetricsLogger(webhook_url=self.config.webhook_url,logger_id=self.config.logger_id)
+        return WebHookMetricsLogger(webhook_url=self.config.webhook_url,logger_id=self.config.logger_id,**self.config.sender.model_dump())
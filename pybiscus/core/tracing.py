@@ -0,0 +1,71 @@
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Iterable, Iterator, Optional
+
+# fit metric carrying the client spans back to the server (a json string, see Tracer.payload)
+TRACE_METRIC = "trace"
+
+_NO_SPAN = nullcontext()
+
+
+class Tracer:
+    """Spans of a process : [name, start, duration] events, in microseconds since the epoch.
+
+    Durations are measured with perf_counter, anchored once on the wall clock, so that the spans of the
+    clients and of the server can be merged into a single trace. On accelerators, the spans measure the
+    host side (kernel launches), the device running asynchronously.
+    Beyond max_events, the spans are counted as dropped.
+    """
+
+    def __init__(self, max_events: Optional[int] = None):
+
+        self.origin     = time.time() - time.perf_counter()
+        self.max_events = max_events
+        self.events: list[list] = []
+        self.dropped    = 0
+        self._lock      = threading.Lock()
+
+    def record(self, name: str, start: float, duration: float) -> None:
+        """records a span, start being a perf_counter value (seconds)"""
+
+        with self._lock:
+            if self.max_events is not None and len(self.events) >= self.max_events:
+                self.dropped += 1
+                return
+            self.events.append([ name, round((self.origin + start) * 1e6), round(duration * 1e6) ])
+
+    @contextmanager
+    def span(self, name: str):
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter() - start)
+
+    def iterate(self, iterable: Iterable, name: str) -> Iterator:
+        """iterates, recording the time spent fetching each item (e.g. the data loading of a batch)"""
+
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.record(name, start, time.perf_counter() - start)
+            yield item
+
+    def payload(self) -> str:
+        """the recorded spans, as a json string (a flower Scalar)"""
+
+        with self._lock:
+            return json.dumps({ "events": self.events, "dropped": self.dropped }, separators=(",", ":"))
+
+
+def span(tracer: Optional[Tracer], name: str):
+    """a span of the tracer, or a no-op context if there is no tracer"""
+
+    return _NO_SPAN if tracer is None else tracer.span(name)
@@ -0,0 +1,181 @@
+import atexit
+import json
+import threading
+import time
+from collections import deque
+from typing import ClassVar, Literal, Optional
+
+import requests
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class ConfigWebHookSender(BaseModel):
+    """Batching of the webhook messages (see WebHookSender).
+
+    Attributes
+    ----------
+    flush_interval: seconds between the first queued message and the POST of the batch
+    max_batch:      highest number of messages of a POST
+    max_queue:      highest number of queued messages
+    overflow:       messages dropped when the queue is full : the oldest queued ones, or the newest (not queued)
+    max_retries:    retries of a failed POST (exponential backoff), before its messages are dropped
+    timeout:        timeout (seconds) of a POST
+    """
+
+    PYBISCUS_CONFIG: ClassVar[str] = "sender"
+
+    flush_interval: float                                = Field( default=1.0,   gt=0 )
+    max_batch:      int                                  = Field( default=500,   gt=0 )
+    max_queue:      int                                  = Field( default=10000, gt=0 )
+    overflow:       Literal["drop_oldest", "drop_newest"] = "drop_oldest"
+    max_retries:    int                                  = Field( default=3,     ge=0 )
+    timeout:        float                                = Field( default=5.0,   gt=0 )
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class WebHookSender:
+    """Sends the messages of a webhook logger in batches, from a background thread.
+
+    put only appends to a bounded in-memory queue : a slow or unreachable webhook never blocks the caller.
+    flush_interval seconds after the first queued message (or as soon as max_batch messages are queued),
+    the sender thread POSTs the queued messages as one payload
+    {"source": source, "batch": [message, ...]} on a pooled requests.Session, retrying with exponential
+    backoff. The queue is flushed by close, and at interpreter exit.
+    """
+
+    BACKOFF: ClassVar[float] = 0.5
+
+    def __init__(
+            self,
+            webhook_url: str,
+            source: str,
+            flush_interval: float = 1.0,
+            max_batch: int = 500,
+            max_queue: int = 10000,
+            overflow: str = "drop_oldest",
+            max_retries: int = 3,
+            timeout: float = 5.0,
+            ):
+
+        self.webhook_url    = webhook_url
+        self.source         = source
+        self.flush_interval = flush_interval
+        self.max_batch      = max_batch
+        self.max_queue      = max_queue
+        self.overflow       = overflow
+        self.max_retries    = max_retries
+        self.timeout        = timeout
+
+        self.dropped = 0
+
+        self._queue: deque = deque()
+        self._condition = threading.Condition()
+        self._closed    = False
+        self._sending   = False
+        self._flushing  = False
+        self._thread: Optional[threading.Thread] = None
+        self._session: Optional[requests.Session] = None
+
+    def put(self, message: dict) -> None:
+
+        with self._condition:
+
+            if self._closed:
+                return
+
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                if self.overflow == "drop_newest":
+                    return
+                self._queue.popleft()
+
+            self._queue.append(message)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="pyb_webhook_sender", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+            # wakes the sender on the first message (it starts the interval), then on a full batch
+            if len(self._queue) == 1 or len(self._queue) >= self.max_batch:
+                self._condition.notify_all()
+
+    def _run(self) -> None:
+
+        self._session = requests.Session()
+
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+
+                # gathers the messages of the interval, from the first one, into the batch
+                self._condition.wait_for(lambda: len(self._queue) >= self.max_batch or self._closed or self._flushing,
+                                         timeout=self.flush_interval)
+
+                if not self._queue:
+                    break
+
+                batch = [ self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue))) ]
+                self._flushing = self._flushing and bool(self._queue)
+                self._sending = True
+
+            self._send(batch)
+
+            with self._condition:
+                self._sending = False
+                self._condition.notify_all()
+
+        self._session.close()
+
+    def _send(self, batch: list[dict]) -> None:
+
+        # non JSON values (e.g. tensors, rich renderables) are sent as strings
+        data = json.dumps({ "source": self.source, "batch": batch }, default=str)
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self._session.post(self.webhook_url, data=data, headers={"Content-Type": "application/json"}, timeout=self.timeout)
+                response.raise_for_status()
+                return
+
+            except requests.RequestException as err:
+                if attempt < self.max_retries and not self._closed:
+                    time.sleep(self.BACKOFF * 2 ** attempt)
+                    continue
+
+                # no logm.console here : the webhook loggers are part of it
+                print(f"❌ Webhook {self.webhook_url} : {len(batch)} messages dropped after {attempt + 1} attempts ({err})")
+                return
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """waits until the queued messages are sent ; False on timeout"""
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._condition:
+            self._flushing = bool(self._queue)
+            self._condition.notify_all()
+            while (self._queue or self._sending) and self._thread is not None and self._thread.is_alive():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(timeout=remaining)
+
+        return True
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """sends the queued messages, then stops the sender thread"""
+
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+        if self.dropped:
+            print(f"❌ Webhook {self.webhook_url} : {self.dropped} messages dropped on a full queue")
@@ -0,0 +1,136 @@
+from typing import Optional
+
+from flwr.client import Client
+from flwr.common import (
+    Code,
+    EvaluateIns,
+    EvaluateRes,
+    FitIns,
+    FitRes,
+    GetParametersIns,
+    GetParametersRes,
+    GetPropertiesIns,
+    GetPropertiesRes,
+    Parameters,
+    ReconnectIns,
+    Status,
+)
+from flwr.server.client_manager import ClientManager
+from flwr.server.server import evaluate_clients, fit_clients, reconnect_clients
+from flwr.server.strategy.aggregate import weighted_loss_avg
+
+import pybiscus.core.pybiscus_logger as logm
+from pybiscus.core.tracing import TRACE_METRIC
+from pybiscus.flower.utils_server import weighted_average
+from pybiscus.interfaces.flower.flowerfitresultsaggregator import FlowerFitResultsAggregator
+
+
+class EdgeAggregatorClient(Client):
+    """Edge node of a hierarchical Federated Learning : one client of the upstream server, standing for its local clients.
+
+    Each upstream fit instruction (parameters and fit config, unchanged) is sent to all the local
+    clients connected (at least min_clients), whose results are pre-aggregated by the configured
+    FlowerFitResultsAggregator : the upstream server gets a single result, weighted by the sum of
+    the local num_examples, and the weighted average of the local fit metrics. Evaluations are
+    forwarded the same way (weighted average of the losses and metrics).
+    """
+
+    def __init__(
+            self,
+            client_manager: ClientManager,
+            aggregator: FlowerFitResultsAggregator,
+            cid: int = 1,
+            min_clients: int = 1,
+            max_workers: Optional[int] = None,
+            round_timeout: Optional[float] = None,
+            ):
+        super().__init__()
+
+        self.client_manager = client_manager
+        self.aggregator     = aggregator
+        self.cid            = cid
+        self.min_clients    = min_clients
+        self.max_workers    = max_workers
+        self.round_timeout  = round_timeout
+
+    def _local_clients(self, server_round: int, action: str) -> list:
+        """all the local clients connected, once at least min_clients are"""
+
+        if self.client_manager.num_available() < self.min_clients:
+            logm.console.log(f"🔁 Round {server_round} 🛰️ waiting for {self.min_clients} local clients to {action}")
+
+        return self.client_manager.sample(num_clients=max(self.min_clients, self.client_manager.num_available()), min_num_clients=self.min_clients)
+
+    def get_properties(self, ins: GetPropertiesIns) -> GetPropertiesRes:
+        return GetPropertiesRes(status=Status(code=Code.OK, message="Success"), properties={"edge_clients": self.client_manager.num_available()})
+
+    def get_parameters(self, ins: GetParametersIns) -> GetParametersRes:
+        """parameters of one local client (the upstream server has no initial parameters)"""
+
+        client = self.client_manager.sample(num_clients=1, min_num_clients=1)[0]
+        return client.get_parameters(ins, timeout=self.round_timeout, group_id=None)
+
+    def fit(self, ins: FitIns) -> FitRes:
+
+        server_round = int(ins.config.get("server_round", 0))
+        clients = self._local_clients(server_round, "fit")
+
+        # e.g. reference of the delta encoded updates
+        self.aggregator.on_configure_fit(server_round, ins.parameters)
+
+        # the local clients spans are not forwarded : the upstream trace sees the edge fit as a whole
+        if TRACE_METRIC in ins.config:
+            ins = FitIns(ins.parameters, { key: value for key, value in ins.config.items() if key != TRACE_METRIC })
+
+        results, failures = fit_clients([ (client, ins) for client in clients ], self.max_workers, self.round_timeout, group_id=server_round)
+
+        logm.console.log(f"🔁 Round {server_round} 🛰️ {len(results)} local results, {len(failures)} failures")
+
+        if not results:
+            # a failure for the upstream server
+            return FitRes(
+                status=Status(code=Code.FIT_NOT_IMPLEMENTED, message=f"no local result in round {server_round} ({len(failures)} failures)"),
+                parameters=Parameters(tensors=[], tensor_type=""),
+                num_examples=0,
+                metrics={},
+            )
+
+        parameters   = self.aggregator.aggregate(server_round, results, failures)
+        num_examples = sum(fit_res.num_examples for _, fit_res in results)
+
+        metrics = weighted_average([ (fit_res.num_examples, fit_res.metrics) for _, fit_res in results ])
+        metrics["edge_clients"] = len(results)
+        metrics["cid"]          = self.cid
+
+        return FitRes(status=Status(code=Code.OK, message="Success"), parameters=parameters, num_examples=num_examples, metrics=metrics)
+
+    def evaluate(self, ins: EvaluateIns) -> EvaluateRes:
+
+        server_round = int(ins.config.get("server_round", 0))
+        clients = self._local_clients(server_round, "evaluate")
+
+        results, failures = evaluate_clients([ (client, ins) for client in clients ], self.max_workers, self.round_timeout, group_id=server_round)
+
+        if not results:
+            return EvaluateRes(
+                status=Status(code=Code.EVALUATE_NOT_IMPLEMENTED, message=f"no local evaluation in round {server_round} ({len(failures)} failures)"),
+                loss=0.0,
+                num_examples=0,
+                metrics={},
+            )
+
+        loss         = weighted_loss_avg([ (evaluate_res.num_examples, evaluate_res.loss) for _, evaluate_res in results ])
+        num_examples = sum(evaluate_res.num_examples for _, evaluate_res in results)
+        metrics      = weighted_average([ (evaluate_res.num_examples, evaluate_res.metrics) for _, evaluate_res in results ])
+        metrics["cid"] = self.cid
+
+        logm.console.log(f"🔁 Round {server_round} 🛰️ local evaluation of {len(results)} clients : loss={loss:.3f}")
+
+        return EvaluateRes(status=Status(code=Code.OK, message="Success"), loss=loss, num_examples=num_examples, metrics=metrics)
+
+    def disconnect_local_clients(self) -> None:
+        """asks the local clients to leave, once the upstream session ended"""
+
+        clients = list(self.client_manager.all().values())
+        reconnect_clients([ (client, ReconnectIns(seconds=None)) for client in clients ], self.max_workers, self.round_timeout)
+        logm.console.log(f"🛰️ {len(clients)} local clients disconnected")
@@ -0,0 +1,207 @@
+from collections import OrderedDict
+from typing import Optional, Sequence
+
+import numpy as np
+import torch
+from flwr.common import (
+    NDArrays,
+    Parameters,
+    bytes_to_ndarray as flw_bytes_to_ndarray,
+    ndarrays_to_parameters as flw_ndarrays_to_parameters,
+)
+
+from pybiscus.core.pybiscusexception import PybiscusValueException
+
+
+def torch_to_numpy_dtype(dtype: torch.dtype) -> np.dtype:
+    """numpy equivalent of a torch dtype (bfloat16, unknown to numpy, is widened to float32)"""
+
+    if dtype == torch.bfloat16:
+        return np.dtype(np.float32)
+
+    return torch.empty((), dtype=dtype).numpy().dtype
+
+
+class FlatParametersLayout:
+    """Layout of a model parameters list inside one contiguous 1-D buffer.
+
+    The layout (names, shapes, dtypes, offsets) is computed once, then each layer
+    is reached as a reshaped view of the flat buffer: aggregation, server evaluation
+    and checkpointing can work on a single vector instead of per-layer copies.
+
+    A flat buffer has a single (floating) dtype : the dtype of each layer is only
+    restored when leaving the flat representation (flat_to_ndarrays, flat_to_module).
+
+    Attributes:
+    -----------
+    names   (list[str]):             state_dict keys (or positional names)
+    shapes  (list[tuple[int, ...]]): shape of each layer
+    dtypes  (list[np.dtype]):        dtype of each layer, as exchanged with the clients
+    sizes   (list[int]):             number of elements of each layer
+    offsets (list[int]):             position of each layer inside the flat buffer
+    numel   (int):                   total number of elements
+    """
+
+    def __init__(self, names: Sequence[str], shapes: Sequence[tuple], dtypes: Sequence[np.dtype]):
+
+        self.names   = list(names)
+        self.shapes  = [ tuple(int(dim) for dim in shape) for shape in shapes ]
+        self.dtypes  = [ np.dtype(dtype) for dtype in dtypes ]
+        self.sizes   = [ int(np.prod(shape, dtype=np.int64)) for shape in self.shapes ]
+        self.offsets = [ int(offset) for offset in np.cumsum([0] + self.sizes[:-1]) ]
+        self.numel   = int(sum(self.sizes))
+
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    def from_state_dict(cls, state_dict: "OrderedDict[str, torch.Tensor]") -> "FlatParametersLayout":
+        return cls(
+            names  = state_dict.keys(),
+            shapes = [ tensor.shape for tensor in state_dict.values() ],
+            dtypes = [ torch_to_numpy_dtype(tensor.dtype) for tensor in state_dict.values() ],
+        )
+
+    @classmethod
+    def from_module(cls, model: torch.nn.Module) -> "FlatParametersLayout":
+        return cls.from_state_dict(model.state_dict())
+
+    @classmethod
+    def from_ndarrays(cls, ndarrays: NDArrays, names: Optional[Sequence[str]] = None) -> "FlatParametersLayout":
+        return cls(
+            names  = names if names is not None else [ str(index) for index in range(len(ndarrays)) ],
+            shapes = [ ndarray.shape for ndarray in ndarrays ],
+            dtypes = [ ndarray.dtype for ndarray in ndarrays ],
+        )
+
+    @classmethod
+    def from_parameters(cls, parameters: Parameters) -> "FlatParametersLayout":
+        """layout of serialized parameters, deserializing one layer at a time"""
+
+        shapes, dtypes = [], []
+        for tensor in parameters.tensors:
+            layer = flw_bytes_to_ndarray(tensor)
+            shapes.append(layer.shape)
+            dtypes.append(layer.dtype)
+            del layer
+
+        return cls( [ str(index) for index in range(len(shapes)) ], shapes, dtypes )
+
+    # -------------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def flat_dtype(self) -> Optional[np.dtype]:
+        """widest floating dtype of the layers, holding every layer without loss ; None if a layer is not floating (e.g. int64 counters)"""
+
+        if not all(np.issubdtype(dtype, np.floating) for dtype in self.dtypes):
+            return None
+
+        return np.result_type(np.float16, *self.dtypes)
+
+    def _check_length(self, count: int):
+        if count != len(self.names):
+            raise PybiscusValueException(f"flat parameters layout expects {len(self.names)} layers, got {count}")
+
+    def allocate(self, dtype=np.float32) -> np.ndarray:
+        """a zeroed flat buffer matching the layout"""
+        return np.zeros(self.numel, dtype=dtype)
+
+    def _check_or_allocate(self, out: Optional[np.ndarray], dtype) -> np.ndarray:
+        if out is None:
+            return self.allocate(dtype)
+        if out.ndim != 1 or out.shape[0] != self.numel:
+            raise PybiscusValueException(f"flat buffer of shape {out.shape} does not match layout size {self.numel}")
+        return out
+
+    def views(self, flat: np.ndarray) -> NDArrays:
+        """per-layer reshaped views of the flat buffer (no copy, flat buffer dtype)"""
+        return [ flat[offset:offset + size].reshape(shape)
+                 for offset, size, shape in zip(self.offsets, self.sizes, self.shapes) ]
+
+    # -------------------------------------------------------------------------
+
+    def ndarrays_to_flat(self, ndarrays: NDArrays, out: Optional[np.ndarray] = None, dtype=np.float32) -> np.ndarray:
+        self._check_length(len(ndarrays))
+        flat = self._check_or_allocate(out, dtype)
+        for ndarray, offset, size in zip(ndarrays, self.offsets, self.sizes):
+            flat[offset:offset + size] = np.ravel(ndarray)
+        return flat
+
+    def flat_to_ndarrays(self, flat: np.ndarray) -> NDArrays:
+        """per-layer arrays with their original dtypes (views when the dtype already matches)"""
+
+        ndarrays = []
+        for view, dtype in zip(self.views(flat), self.dtypes):
+            if view.dtype != dtype and not np.issubdtype(dtype, np.floating):
+                # integer layers (e.g. batchnorm counters) are rounded, not truncated
+                view = np.rint(view)
+            ndarrays.append(view.astype(dtype, copy=False))
+        return ndarrays
+
+    def parameters_to_flat(self, parameters: Parameters, out: Optional[np.ndarray] = None, dtype=np.float32) -> np.ndarray:
+        """deserialize each layer directly into its slot of the flat buffer"""
+        self._check_length(len(parameters.tensors))
+        flat = self._check_or_allocate(out, dtype)
+        for tensor, offset, size in zip(parameters.tensors, self.offsets, self.sizes):
+            flat[offset:offset + size] = flw_bytes_to_ndarray(tensor).reshape(-1)
+        return flat
+
+    def flat_to_parameters(self, flat: np.ndarray) -> Parameters:
+        return flw_ndarrays_to_parameters(self.flat_to_ndarrays(flat))
+
+    def fold_parameters(self, flat: np.ndarray, parameters: Parameters, weight: float) -> np.ndarray:
+        """flat += weight * parameters, deserializing (then freeing) one layer at a time"""
+
+        self._check_length(len(parameters.tensors))
+
+        for tensor, offset, size in zip(parameters.tensors, self.offsets, self.sizes):
+
+            layer = flw_bytes_to_ndarray(tensor).reshape(-1)
+
+            if np.issubdtype(layer.dtype, np.floating) and layer.flags.writeable:
+                # scale in place, then fold (no temporary)
+                np.multiply(layer, weight, out=layer)
+                flat[offset:offset + size] += layer
+            else:
+                flat[offset:offset + size] += layer * weight
+
+            del layer
+
+        return flat
+
+    def fold_ndarrays(self, flat: np.ndarray, ndarrays: NDArrays, weight: float) -> np.ndarray:
+        """flat += weight * ndarrays"""
+
+        self._check_length(len(ndarrays))
+
+        for ndarray, offset, size in zip(ndarrays, self.offsets, self.sizes):
+            flat[offset:offset + size] += np.ravel(ndarray) * weight
+
+        return flat
+
+    # -------------------------------------------------------------------------
+
+    def module_to_flat(self, model: torch.nn.Module, out: Optional[np.ndarray] = None, dtype=np.float32) -> np.ndarray:
+        state_dict = model.state_dict()
+        self._check_length(len(state_dict))
+        flat = self._check_or_allocate(out, dtype)
+        target = torch.from_numpy(flat)
+        for tensor, offset, size in zip(state_dict.values(), self.offsets, self.sizes):
+            target[offset:offset + size].copy_(tensor.detach().reshape(-1))
+        return flat
+
+    def flat_to_module(self, model: torch.nn.Module, flat: np.ndarray) -> None:
+        """copy the flat buffer in place into the model storage (dtype and device conversions done by copy_)"""
+        state_dict = model.state_dict()
+        self._check_length(len(state_dict))
+        source = torch.from_numpy(flat)
+        with torch.no_grad():
+            for tensor, offset, size in zip(state_dict.values(), self.offsets, self.sizes):
+                tensor.copy_(source[offset:offset + size].view(tensor.shape))
+
+    def flat_to_state_dict(self, flat: np.ndarray) -> "OrderedDict[str, torch.Tensor]":
+        """a state_dict whose tensors are views of the flat buffer (e.g. for checkpointing)"""
+        return OrderedDict( (name, torch.from_numpy(view))
+                            for name, view in zip(self.names, self.views(flat)) )
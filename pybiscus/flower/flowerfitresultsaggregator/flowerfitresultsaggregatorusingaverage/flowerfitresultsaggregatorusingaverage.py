@@ -4,6 +4,7 @@ from typing import ClassVar, Literal, Union
 import numpy as np
 from pydantic import BaseModel, ConfigDict
 from pybiscus.interfaces.flower.flowerfitresultsaggregator import FlowerFitResultsAggregator
+from pybiscus.flower.updatecodec import check_not_encoded
 import pybiscus.core.pybiscus_logger as logm
 
 from flwr.common import (
@@ -54,6 +55,8 @@ class FlowerFitResultsAggregatorUsingAverage(FlowerFitResultsAggregator):
             failures: list[Union[tuple[ClientProxy, FitRes], BaseException]],
             ) -> Parameters :
         """ Aggregate results : weighted average (with examples number as weight)"""
+
+        check_not_encoded(results, "Average")
         
         ndarrays = [ flw_parameters_to_ndarrays(fit_res.parameters) 
             for _, fit_res in results ]
@@ -0,0 +1,16 @@
+from typing import Dict, List, Tuple
+from pydantic import BaseModel
+
+from pybiscus.flower.flowerfitresultsaggregator.flowerfitresultsaggregatorusingcompressedweightedaverage.flowerfitresultsaggregatorusingcompressedweightedaverage import (
+    ConfigFlowerFitResultsAggregatorUsingCompressedWeightedAverage, 
+    FlowerFitResultsAggregatorUsingCompressedWeightedAverage,
+)
+
+from pybiscus.interfaces.flower.flowerfitresultsaggregator import FlowerFitResultsAggregator
+
+def get_modules_and_configs() -> Tuple[Dict[str, FlowerFitResultsAggregator], List[BaseModel]]:
+
+    registry = {"compressedweightedaverage": FlowerFitResultsAggregatorUsingCompressedWeightedAverage,}
+    configs  = [ConfigFlowerFitResultsAggregatorUsingCompressedWeightedAverage,]
+
+    return registry, configs
@@ -0,0 +1,99 @@
+
+from typing import ClassVar, Literal, Union
+
+from pydantic import BaseModel, ConfigDict, Field
+from pybiscus.interfaces.flower.flowerfitresultsaggregator import FlowerFitResultsAggregator
+from pybiscus.core.pybiscusexception import PybiscusInternalException
+from pybiscus.flower.flatparameters import FlatParametersLayout
+from pybiscus.flower.updatecodec import decode_update, is_encoded_update
+import pybiscus.core.pybiscus_logger as logm
+
+from flwr.common import (
+    FitRes,
+    Parameters,
+    bytes_to_ndarray as flw_bytes_to_ndarray,
+    parameters_to_ndarrays as flw_parameters_to_ndarrays,
+)
+from flwr.server.client_proxy import ClientProxy
+
+
+
+class ConfigFlowerFitResultsAggregatorUsingCompressedWeightedAverageData(BaseModel):
+    """
+    accumulator_dtype: precision of the preallocated accumulator (float64 is the safest, float32 halves its memory)
+
+    The codec (delta, quantization, top-k) is chosen by each client (flower_client.update_codec)
+    and described in the header of its update : clients not encoding their update are also accepted.
+    """
+
+    PYBISCUS_CONFIG: ClassVar[str] = "config"
+
+    accumulator_dtype: Literal["float64", "float32"] = Field( default="float64", description="precision of the accumulator" )
+
+    model_config = ConfigDict(extra="forbid")
+
+class ConfigFlowerFitResultsAggregatorUsingCompressedWeightedAverage(BaseModel):
+    PYBISCUS_ALIAS: ClassVar[str] = "CompressedWeightedAverage"
+    name:   Literal["compressedweightedaverage"]
+    config: ConfigFlowerFitResultsAggregatorUsingCompressedWeightedAverageData
+    model_config = ConfigDict(extra="forbid")
+
+
+
+class FlowerFitResultsAggregatorUsingCompressedWeightedAverage(FlowerFitResultsAggregator):
+    """Weighted average of encoded client updates (see pybiscus.flower.updatecodec).
+
+    Each update is decoded against the global parameters sent for the round
+    (delta reference, layers shapes and dtypes), then folded into a flat accumulator.
+    """
+
+    def __init__(self, accumulator_dtype: str = "float64"):
+        self.accumulator_dtype = accumulator_dtype
+        self.reference_round   = None
+        self.reference         = None
+        self.flat_layout       = None
+
+    def on_configure_fit(self, server_round: int, parameters: Parameters) -> None:
+        self.reference_round = server_round
+        self.reference       = flw_parameters_to_ndarrays(parameters)
+
+        if self.flat_layout is None:
+            self.flat_layout = FlatParametersLayout.from_ndarrays(self.reference)
+
+    def aggregate(
+            self,
+            server_round: int,
+            results: list[tuple[ClientProxy, FitRes]],
+            failures: list[Union[tuple[ClientProxy, FitRes], BaseException]],
+            ) -> Parameters :
+        """ Aggregate results : decode each client update, then weighted average (with examples number as weight)"""
+
+        if self.reference is None or self.reference_round != server_round:
+            raise PybiscusInternalException(
+                f"CompressedWeightedAverage: no global parameters for round {server_round} (strategy must call on_configure_fit)")
+
+        num_examples_total = sum(fit_res.num_examples for _, fit_res in results)
+        accumulator        = self.flat_layout.allocate(self.accumulator_dtype)
+
+        logmsg = []
+
+        for client, fit_res in results:
+
+            tensors    = fit_res.parameters.tensors
+            wire_bytes = sum(len(tensor) for tensor in tensors)
+
+            if tensors and is_encoded_update(flw_bytes_to_ndarray(tensors[0])):
+                ndarrays = decode_update(flw_parameters_to_ndarrays(fit_res.parameters), self.reference)
+                encoded  = "📦"
+            else:
+                ndarrays = flw_parameters_to_ndarrays(fit_res.parameters)
+                encoded  = "🧱"
+
+            self.flat_layout.fold_ndarrays(accumulator, ndarrays, fit_res.num_examples / num_examples_total)
+            del ndarrays
+
+            logmsg.append(f"🆔{client.cid} ⚖️{fit_res.num_examples} {encoded} {wire_bytes} bytes")
+
+        logm.console.log(f"🔁 Round:{server_round} CompressedWeightedAverage\n" + "\n".join(logmsg))
+
+        return self.flat_layout.flat_to_parameters(accumulator)
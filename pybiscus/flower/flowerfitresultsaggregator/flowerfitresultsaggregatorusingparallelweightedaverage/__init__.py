@@ -0,0 +1,16 @@
+from typing import Dict, List, Tuple
+from pydantic import BaseModel
+
+from pybiscus.flower.flowerfitresultsaggregator.flowerfitresultsaggregatorusingparallelweightedaverage.flowerfitresultsaggregatorusingparallelweightedaverage import (
+    ConfigFlowerFitResultsAggregatorUsingParallelWeightedAverage, 
+    FlowerFitResultsAggregatorUsingParallelWeightedAverage,
+)
+
+from pybiscus.interfaces.flower.flowerfitresultsaggregator import FlowerFitResultsAggregator
+
+def get_modules_and_configs() -> Tuple[Dict[str, FlowerFitResultsAggregator], List[BaseModel]]:
+
+    registry = {"parallelweightedaverage": FlowerFitResultsAggregatorUsingParallelWeightedAverage,}
+    configs  = [ConfigFlowerFitResultsAggregatorUsingParallelWeightedAverage,]
+
+    return registry, configs
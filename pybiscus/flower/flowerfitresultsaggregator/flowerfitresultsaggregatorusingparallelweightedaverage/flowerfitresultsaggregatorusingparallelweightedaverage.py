@@ -0,0 +1,231 @@
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import ClassVar, Literal, Optional, Union
+
+import numpy as np
+from flwr.common import (
+    FitRes,
+    NDArrays,
+    Parameters,
+    bytes_to_ndarray as flw_bytes_to_ndarray,
+    ndarrays_to_parameters as flw_ndarrays_to_parameters,
+)
+from flwr.server.client_proxy import ClientProxy
+from pydantic import BaseModel, ConfigDict, Field
+
+from pybiscus.interfaces.flower.flowerfitresultsaggregator import FlowerFitResultsAggregator
+from pybiscus.flower.updatecodec import check_not_encoded
+import pybiscus.core.pybiscus_logger as logm
+
+
+class ConfigFlowerFitResultsAggregatorUsingParallelWeightedAverageData(BaseModel):
+    """Sharding of the weighted average over a pool of workers.
+
+    Attributes
+    ----------
+    executor:    "thread" (numpy releases the GIL) or "process" (client tensors exchanged through shared memory)
+    max_workers: size of the pool
+    shard:       "layer" (one task per layer) or "chunk" (layers split into chunk_size elements tasks)
+    chunk_size:  number of elements of a chunk task
+    """
+
+    PYBISCUS_CONFIG: ClassVar[str] = "config"
+
+    executor:    Literal["thread", "process"] = "thread"
+    max_workers: int                          = Field( default=4,         gt=0 )
+    shard:       Literal["layer", "chunk"]    = "chunk"
+    chunk_size:  int                          = Field( default=1_048_576, gt=0 )
+
+    model_config = ConfigDict(extra="forbid")
+
+class ConfigFlowerFitResultsAggregatorUsingParallelWeightedAverage(BaseModel):
+    PYBISCUS_ALIAS: ClassVar[str] = "ParallelWeightedAverage"
+    name:   Literal["parallelweightedaverage"]
+    config: ConfigFlowerFitResultsAggregatorUsingParallelWeightedAverageData
+    model_config = ConfigDict(extra="forbid")
+
+
+def _align(offset: int, alignment: int = 64) -> int:
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def _weighted_sum_slice(inputs: np.ndarray, output: np.ndarray, num_examples: list[int], num_examples_total: int, start: int, stop: int):
+    """output[start:stop] = sum(inputs[c, start:stop] * num_examples[c]) / total
+
+    The operations (and their order) are the ones of flwr.server.strategy.aggregate.aggregate,
+    being elementwise the result is bit-identical whatever the sharding.
+    """
+
+    accumulator = inputs[0, start:stop] * num_examples[0]
+
+    for client in range(1, len(num_examples)):
+        accumulator = np.add(accumulator, inputs[client, start:stop] * num_examples[client])
+
+    output[start:stop] = accumulator / num_examples_total
+
+
+def _weighted_sum_slice_in_shared_memory(
+        inputs_name: str, outputs_name: str,
+        inputs_offset: int, outputs_offset: int,
+        dtype: str, output_dtype: str, nb_clients: int, size: int,
+        num_examples: list[int], num_examples_total: int, start: int, stop: int):
+    """process pool task : only the shared memory names and the slice bounds are pickled"""
+
+    inputs_shm  = SharedMemory(name=inputs_name)
+    outputs_shm = SharedMemory(name=outputs_name)
+
+    try:
+        inputs = np.ndarray((nb_clients, size), dtype=dtype,        buffer=inputs_shm.buf,  offset=inputs_offset)
+        output = np.ndarray((size,),            dtype=output_dtype, buffer=outputs_shm.buf, offset=outputs_offset)
+        _weighted_sum_slice(inputs, output, num_examples, num_examples_total, start, stop)
+        del inputs, output
+    finally:
+        inputs_shm.close()
+        outputs_shm.close()
+
+
+class FlowerFitResultsAggregatorUsingParallelWeightedAverage(FlowerFitResultsAggregator):
+    """Weighted average of the clients results, sharded by layer or by chunk over a thread or process pool.
+
+    Clients layers are deserialized once into a per-layer (clients x elements) block,
+    in shared memory for the process pool, then workers each reduce a slice of a layer.
+    The result is bit-identical to flwr.server.strategy.aggregate.aggregate.
+    """
+
+    def __init__(self, executor: str = "thread", max_workers: int = 4, shard: str = "chunk", chunk_size: int = 1_048_576):
+
+        self.executor_kind = executor
+        self.max_workers   = max_workers
+        self.shard         = shard
+        self.chunk_size    = chunk_size
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+
+        # pool is created once and reused round after round
+        if self._executor is None:
+            if self.executor_kind == "process":
+                # forkserver : workers are not forked from the (multi-threaded) flower server
+                method  = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                context = multiprocessing.get_context(method)
+                if method == "forkserver":
+                    context.set_forkserver_preload([__name__])
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pyb_aggregate")
+
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _slices(self, size: int) -> list[tuple[int, int]]:
+        if self.shard == "layer" or size <= self.chunk_size:
+            return [(0, size)]
+        return [ (start, min(start + self.chunk_size, size)) for start in range(0, size, self.chunk_size) ]
+
+    def aggregate(
+            self,
+            server_round: int,
+            results: list[tuple[ClientProxy, FitRes]],
+            failures: list[Union[tuple[ClientProxy, FitRes], BaseException]],
+            ) -> Parameters :
+        """ Aggregate results : weighted average (with examples number as weight), sharded over the pool"""
+
+        logm.console.log(
+            f"🔁 Round:{server_round} ParallelWeightedAverage {self.executor_kind}×{self.max_workers} by {self.shard}\n" +
+            "\n".join(f"🆔{client.cid} ⚖️{fit_res.num_examples}" for client, fit_res in results)
+        )
+
+        return flw_ndarrays_to_parameters(self.aggregate_ndarrays(results))
+
+    def aggregate_ndarrays(self, results: list[tuple[ClientProxy, FitRes]]) -> NDArrays:
+
+        check_not_encoded(results, "ParallelWeightedAverage")
+
+        nb_clients         = len(results)
+        num_examples       = [ fit_res.num_examples for _, fit_res in results ]
+        num_examples_total = sum(num_examples)
+
+        # layers description, from the first client
+        first_layers  = [ flw_bytes_to_ndarray(tensor) for tensor in results[0][1].parameters.tensors ]
+        shapes        = [ layer.shape for layer in first_layers ]
+        dtypes        = [ layer.dtype for layer in first_layers ]
+        sizes         = [ layer.size  for layer in first_layers ]
+        # dtype of (layer * int) / int, as computed by flwr aggregate
+        output_dtypes = [ ((np.zeros(1, dtype=dtype) * num_examples[0]) / num_examples_total).dtype for dtype in dtypes ]
+
+        inputs_offsets, outputs_offsets = [], []
+        inputs_nbytes,  outputs_nbytes  = 0, 0
+
+        for dtype, output_dtype, size in zip(dtypes, output_dtypes, sizes):
+            inputs_offsets.append(inputs_nbytes)
+            outputs_offsets.append(outputs_nbytes)
+            inputs_nbytes  = _align(inputs_nbytes  + nb_clients * size * dtype.itemsize)
+            outputs_nbytes = _align(outputs_nbytes + size * output_dtype.itemsize)
+
+        use_shared_memory = self.executor_kind == "process"
+
+        if use_shared_memory:
+            inputs_shm    = SharedMemory(create=True, size=max(inputs_nbytes, 1))
+            outputs_shm   = SharedMemory(create=True, size=max(outputs_nbytes, 1))
+            inputs_buffer, outputs_buffer = inputs_shm.buf, outputs_shm.buf
+        else:
+            inputs_buffer  = bytearray(max(inputs_nbytes, 1))
+            outputs_buffer = bytearray(max(outputs_nbytes, 1))
+
+        inputs, outputs = [], []
+
+        try:
+            inputs  = [ np.ndarray((nb_clients, size), dtype=dtype, buffer=inputs_buffer, offset=offset)
+                        for dtype, size, offset in zip(dtypes, sizes, inputs_offsets) ]
+            outputs = [ np.ndarray((size,), dtype=dtype, buffer=outputs_buffer, offset=offset)
+                        for dtype, size, offset in zip(output_dtypes, sizes, outputs_offsets) ]
+
+            # deserialize each client layer straight into its row
+            for index, layer in enumerate(first_layers):
+                inputs[index][0] = layer.reshape(-1)
+            del first_layers
+
+            for client, (_, fit_res) in enumerate(results[1:], start=1):
+                for index, tensor in enumerate(fit_res.parameters.tensors):
+                    inputs[index][client] = flw_bytes_to_ndarray(tensor).reshape(-1)
+
+            executor = self._get_executor()
+            futures  = []
+
+            for index, size in enumerate(sizes):
+                for start, stop in self._slices(size):
+                    if use_shared_memory:
+                        futures.append(executor.submit(
+                            _weighted_sum_slice_in_shared_memory,
+                            inputs_shm.name, outputs_shm.name,
+                            inputs_offsets[index], outputs_offsets[index],
+                            dtypes[index].str, output_dtypes[index].str, nb_clients, size,
+                            num_examples, num_examples_total, start, stop,
+                        ))
+                    else:
+                        futures.append(executor.submit(
+                            _weighted_sum_slice, inputs[index], outputs[index], num_examples, num_examples_total, start, stop,
+                        ))
+
+            for future in futures:
+                future.result()
+
+            # copy out of the pooled buffers, with the layers shapes
+            aggregated = [ output.reshape(shape).copy() for output, shape in zip(outputs, shapes) ]
+
+        finally:
+            # views must be released before the shared memory is closed
+            del inputs, outputs
+
+            if use_shared_memory:
+                inputs_shm.close()
+                inputs_shm.unlink()
+                outputs_shm.close()
+                outputs_shm.unlink()
+
+        return aggregated
@@ -0,0 +1,28 @@
+from typing import Dict, List, Tuple
+from pydantic import BaseModel
+
+from pybiscus.flower.flowerfitresultsaggregator.flowerfitresultsaggregatorusingserveroptimizer.flowerfitresultsaggregatorusingserveroptimizer import (
+    ConfigFlowerFitResultsAggregatorUsingFedAdam,
+    ConfigFlowerFitResultsAggregatorUsingFedAvgM,
+    ConfigFlowerFitResultsAggregatorUsingFedYogi,
+    FlowerFitResultsAggregatorUsingFedAdam,
+    FlowerFitResultsAggregatorUsingFedAvgM,
+    FlowerFitResultsAggregatorUsingFedYogi,
+)
+
+from pybiscus.interfaces.flower.flowerfitresultsaggregator import FlowerFitResultsAggregator
+
+def get_modules_and_configs() -> Tuple[Dict[str, FlowerFitResultsAggregator], List[BaseModel]]:
+
+    registry = {
+        "fedadam": FlowerFitResultsAggregatorUsingFedAdam,
+        "fedyogi": FlowerFitResultsAggregatorUsingFedYogi,
+        "fedavgm": FlowerFitResultsAggregatorUsingFedAvgM,
+    }
+    configs  = [
+        ConfigFlowerFitResultsAggregatorUsingFedAdam,
+        ConfigFlowerFitResultsAggregatorUsingFedYogi,
+        ConfigFlowerFitResultsAggregatorUsingFedAvgM,
+    ]
+
+    return registry, configs
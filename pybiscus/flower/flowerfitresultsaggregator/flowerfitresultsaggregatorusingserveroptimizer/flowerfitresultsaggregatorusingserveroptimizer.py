@@ -0,0 +1,300 @@
+from abc import ABC, abstractmethod
+from typing import ClassVar, Literal, Optional, Union
+
+import numpy as np
+import torch
+from pydantic import BaseModel, ConfigDict, Field
+from pybiscus.interfaces.flower.flowerfitresultsaggregator import FlowerFitResultsAggregator
+from pybiscus.core.pybiscusexception import PybiscusInternalException, PybiscusValueException
+from pybiscus.flower.flatparameters import FlatParametersLayout
+from pybiscus.flower.updatecodec import decode_update, is_encoded_update
+import pybiscus.core.pybiscus_logger as logm
+
+from flwr.common import (
+    FitRes,
+    NDArrays,
+    Parameters,
+    bytes_to_ndarray as flw_bytes_to_ndarray,
+    parameters_to_ndarrays as flw_parameters_to_ndarrays,
+)
+from flwr.server.client_proxy import ClientProxy
+
+
+
+class ConfigFlowerFitResultsAggregatorUsingFedAdamData(BaseModel):
+    """
+    server_learning_rate: step size of the server optimizer (eta)
+    beta_1:               decay of the first moment (momentum) of the pseudo-gradient
+    beta_2:               decay of the second moment of the pseudo-gradient
+    tau:                  adaptivity (added to the square root of the second moment)
+    """
+
+    PYBISCUS_CONFIG: ClassVar[str] = "config"
+
+    server_learning_rate: float = Field( default=1e-1, gt=0 )
+    beta_1:               float = Field( default=0.9,  ge=0, lt=1 )
+    beta_2:               float = Field( default=0.99, ge=0, lt=1 )
+    tau:                  float = Field( default=1e-9, gt=0 )
+
+    model_config = ConfigDict(extra="forbid")
+
+class ConfigFlowerFitResultsAggregatorUsingFedAdam(BaseModel):
+    PYBISCUS_ALIAS: ClassVar[str] = "FedAdam"
+    name:   Literal["fedadam"]
+    config: ConfigFlowerFitResultsAggregatorUsingFedAdamData
+    model_config = ConfigDict(extra="forbid")
+
+
+class ConfigFlowerFitResultsAggregatorUsingFedYogiData(ConfigFlowerFitResultsAggregatorUsingFedAdamData):
+
+    server_learning_rate: float = Field( default=1e-2, gt=0 )
+    tau:                  float = Field( default=1e-3, gt=0 )
+
+class ConfigFlowerFitResultsAggregatorUsingFedYogi(BaseModel):
+    PYBISCUS_ALIAS: ClassVar[str] = "FedYogi"
+    name:   Literal["fedyogi"]
+    config: ConfigFlowerFitResultsAggregatorUsingFedYogiData
+    model_config = ConfigDict(extra="forbid")
+
+
+class ConfigFlowerFitResultsAggregatorUsingFedAvgMData(BaseModel):
+    """
+    server_learning_rate: step size of the server optimizer (1 without momentum is FedAvg)
+    server_momentum:      momentum of the pseudo-gradient (effective step size : server_learning_rate / (1 - server_momentum))
+    nesterov:             Nesterov momentum
+    """
+
+    PYBISCUS_CONFIG: ClassVar[str] = "config"
+
+    server_learning_rate: float = Field( default=1.0, gt=0 )
+    server_momentum:      float = Field( default=0.9, ge=0, lt=1 )
+    nesterov:             bool  = False
+
+    model_config = ConfigDict(extra="forbid")
+
+class ConfigFlowerFitResultsAggregatorUsingFedAvgM(BaseModel):
+    PYBISCUS_ALIAS: ClassVar[str] = "FedAvgM"
+    name:   Literal["fedavgm"]
+    config: ConfigFlowerFitResultsAggregatorUsingFedAvgMData
+    model_config = ConfigDict(extra="forbid")
+
+
+
+class FlowerFitResultsAggregatorUsingServerOptimizer(FlowerFitResultsAggregator, ABC):
+    """Server optimizer : the weighted average of the client updates minus the global parameters
+    of the round is a pseudo-gradient (delta), applied to the global parameters by an optimizer step.
+
+    Global parameters, delta and the optimizer state are flat buffers (see FlatParametersLayout) of the widest
+    layer dtype, float64 with integer layers (e.g. batchnorm counters) : these are not optimized, they get the weighted average.
+    Results totalling no example are not aggregated (None, the global parameters are kept).
+    Encoded client updates (see pybiscus.flower.updatecodec) are decoded against the global parameters.
+    The optimizer state is part of the server checkpoints (state_dict, load_state_dict).
+    """
+
+    NAME: ClassVar[str] = "ServerOptimizer"
+
+    # names of the flat state buffers
+    STATE: ClassVar[tuple[str, ...]] = ()
+
+    def __init__(self, server_learning_rate: float):
+        self.server_learning_rate = server_learning_rate
+        self.reference_round   = None
+        self.reference         = None
+        self.flat_layout       = None
+        self.current           = None
+        self.dtype             = None
+        self._integer_slices   = []
+        self.state: dict[str, np.ndarray] = {}
+        self.steps             = 0
+        self._restored_state   = None
+
+    def on_configure_fit(self, server_round: int, parameters: Parameters) -> None:
+
+        if self.flat_layout is None:
+            self.flat_layout = FlatParametersLayout.from_parameters(parameters)
+            self._integer_slices = [ slice(offset, offset + size)
+                for offset, size, dtype in zip(self.flat_layout.offsets, self.flat_layout.sizes, self.flat_layout.dtypes)
+                if not np.issubdtype(dtype, np.floating) ]
+            # float64 holds the integer layers exactly
+            self.dtype = self.flat_layout.flat_dtype or np.dtype(np.float64)
+
+        self.reference_round = server_round
+        self.reference       = parameters
+        self.current         = self.flat_layout.parameters_to_flat(parameters, out=self.current, dtype=self.dtype)
+
+        if not self.state:
+            self.state = { name: self.flat_layout.allocate(self.dtype) for name in self.STATE }
+            if self._restored_state is not None:
+                self._load_flat_state(self._restored_state)
+                self._restored_state = None
+
+    def aggregate(
+            self,
+            server_round: int,
+            results: list[tuple[ClientProxy, FitRes]],
+            failures: list[Union[tuple[ClientProxy, FitRes], BaseException]],
+            ) -> Optional[Parameters] :
+        """ Aggregate results : weighted average (with examples number as weight), then optimizer step"""
+
+        if self.reference is None or self.reference_round != server_round:
+            raise PybiscusInternalException(
+                f"{self.NAME}: no global parameters for round {server_round} (strategy must call on_configure_fit)")
+
+        num_examples_total = sum(fit_res.num_examples for _, fit_res in results)
+
+        if num_examples_total == 0:
+            logm.console.log(f"🔁 Round:{server_round} ⚠️ {self.NAME}: no example in the results, no optimizer step")
+            return None
+
+        delta              = self.flat_layout.allocate(self.dtype)
+        reference_ndarrays: Optional[NDArrays] = None
+
+        for _, fit_res in results:
+
+            tensors = fit_res.parameters.tensors
+
+            if tensors and is_encoded_update(flw_bytes_to_ndarray(tensors[0])):
+                if reference_ndarrays is None:
+                    reference_ndarrays = flw_parameters_to_ndarrays(self.reference)
+                self.flat_layout.fold_ndarrays(delta, decode_update(flw_parameters_to_ndarrays(fit_res.parameters), reference_ndarrays),
+                                               fit_res.num_examples / num_examples_total)
+            else:
+                self.flat_layout.fold_parameters(delta, fit_res.parameters, fit_res.num_examples / num_examples_total)
+
+        # average - global parameters
+        delta -= self.current
+
+        for integer_slice in self._integer_slices:
+            # integer layers get the average, a null delta leaves them (and their state) untouched
+            self.current[integer_slice] += delta[integer_slice]
+            delta[integer_slice] = 0
+
+        self.steps += 1
+        self.step(delta)
+
+        logm.console.log(
+            f"🔁 Round:{server_round} {self.NAME} step {self.steps} : |delta|={float(np.linalg.norm(delta)):.4g}\n" +
+            "\n".join(f"🆔{client.cid} ⚖️{fit_res.num_examples}" for client, fit_res in results)
+        )
+
+        return self.flat_layout.flat_to_parameters(self.current)
+
+    @abstractmethod
+    def step(self, delta: np.ndarray) -> None:
+        """updates self.current (and the state buffers) in place from the pseudo-gradient delta (left unchanged)"""
+
+    # -------------------------------------------------------------------------
+
+    def state_dict(self) -> dict:
+        if not self.state:
+            # no round yet : the restored state, if any
+            return dict(self._restored_state) if self._restored_state is not None else {}
+        state = { name: torch.from_numpy(buffer) for name, buffer in self.state.items() }
+        state["steps"] = torch.tensor(self.steps)
+        return state
+
+    def load_state_dict(self, state: dict) -> None:
+        missing = [ name for name in self.STATE if name not in state ]
+        if missing:
+            raise PybiscusValueException(f"{self.NAME}: checkpointed state has no {missing} buffers (state of another server optimizer ?)")
+
+        self.steps = int(state.get("steps", 0))
+        if self.state:
+            self._load_flat_state(state)
+        else:
+            # the layout is only known at the first round
+            self._restored_state = state
+        logm.console.log(f"♻️ {self.NAME} state restored (step {self.steps})")
+
+    def _load_flat_state(self, state: dict) -> None:
+        for name, buffer in self.state.items():
+            values = torch.as_tensor(state[name]).reshape(-1)
+            if values.numel() != buffer.shape[0]:
+                raise PybiscusValueException(f"{self.NAME}: checkpointed {name} of size {values.numel()} does not match the model size {buffer.shape[0]}")
+            buffer[:] = values.numpy()
+
+
+
+class FlowerFitResultsAggregatorUsingFedAdam(FlowerFitResultsAggregatorUsingServerOptimizer):
+    """FedAdam (Reddi et al., Adaptive Federated Optimization), bias corrected step size as in flower"""
+
+    NAME:  ClassVar[str] = "FedAdam"
+    STATE: ClassVar[tuple[str, ...]] = ("m", "v")
+
+    def __init__(self, server_learning_rate: float = 1e-1, beta_1: float = 0.9, beta_2: float = 0.99, tau: float = 1e-9):
+        super().__init__(server_learning_rate)
+        self.beta_1 = beta_1
+        self.beta_2 = beta_2
+        self.tau    = tau
+
+    def second_moment(self, v: np.ndarray, squared: np.ndarray) -> None:
+        # v = beta_2 v + (1 - beta_2) delta²
+        v *= self.beta_2
+        v += (1 - self.beta_2) * squared
+
+    def learning_rate(self) -> float:
+        return self.server_learning_rate * np.sqrt(1 - self.beta_2 ** self.steps) / (1 - self.beta_1 ** self.steps)
+
+    def step(self, delta: np.ndarray) -> None:
+        m, v = self.state["m"], self.state["v"]
+
+        m *= self.beta_1
+        m += (1 - self.beta_1) * delta
+
+        self.second_moment(v, np.square(delta))
+
+        # current += eta m / (sqrt(v) + tau)
+        update = np.sqrt(v)
+        update += self.tau
+        np.divide(m, update, out=update)
+        update *= self.learning_rate()
+        self.current += update
+
+
+
+class FlowerFitResultsAggregatorUsingFedYogi(FlowerFitResultsAggregatorUsingFedAdam):
+    """FedYogi : additive (sign controlled) second moment update, constant step size as in flower"""
+
+    NAME: ClassVar[str] = "FedYogi"
+
+    def __init__(self, server_learning_rate: float = 1e-2, beta_1: float = 0.9, beta_2: float = 0.99, tau: float = 1e-3):
+        super().__init__(server_learning_rate, beta_1, beta_2, tau)
+
+    def second_moment(self, v: np.ndarray, squared: np.ndarray) -> None:
+        # v = v - (1 - beta_2) delta² sign(v - delta²)
+        sign = np.sign(v - squared)
+        squared *= sign
+        v -= (1 - self.beta_2) * squared
+
+    def learning_rate(self) -> float:
+        return self.server_learning_rate
+
+
+
+class FlowerFitResultsAggregatorUsingFedAvgM(FlowerFitResultsAggregatorUsingServerOptimizer):
+    """FedAvgM (Hsu et al.) : server momentum SGD on the pseudo-gradient (global parameters - average)"""
+
+    NAME:  ClassVar[str] = "FedAvgM"
+    STATE: ClassVar[tuple[str, ...]] = ("momentum",)
+
+    def __init__(self, server_learning_rate: float = 1.0, server_momentum: float = 0.9, nesterov: bool = False):
+        super().__init__(server_learning_rate)
+        self.server_momentum = server_momentum
+        self.nesterov        = nesterov
+
+    def step(self, delta: np.ndarray) -> None:
+        momentum = self.state["momentum"]
+
+        # pseudo-gradient is -delta
+        momentum *= self.server_momentum
+        momentum -= delta
+
+        if self.nesterov:
+            # current -= lr (gradient + mu momentum)
+            update = self.server_momentum * momentum
+            update -= delta
+        else:
+            update = momentum.copy()
+
+        update *= self.server_learning_rate
+        self.current -= update
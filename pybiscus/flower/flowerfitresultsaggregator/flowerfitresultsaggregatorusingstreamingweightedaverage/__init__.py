@@ -0,0 +1,17 @@
+
+from typing import Dict, List, Tuple
+from pydantic import BaseModel
+
+from pybiscus.flower.flowerfitresultsaggregator.flowerfitresultsaggregatorusingstreamingweightedaverage.flowerfitresultsaggregatorusingstreamingweightedaverage import (
+    ConfigFlowerFitResultsAggregatorUsingStreamingWeightedAverage, 
+    FlowerFitResultsAggregatorUsingStreamingWeightedAverage,
+)
+
+from pybiscus.interfaces.flower.flowerfitresultsaggregator import FlowerFitResultsAggregator
+
+def get_modules_and_configs() -> Tuple[Dict[str, FlowerFitResultsAggregator], List[BaseModel]]:
+
+    registry = {"streamingweightedaverage": FlowerFitResultsAggregatorUsingStreamingWeightedAverage,}
+    configs  = [ConfigFlowerFitResultsAggregatorUsingStreamingWeightedAverage,]
+
+    return registry, configs
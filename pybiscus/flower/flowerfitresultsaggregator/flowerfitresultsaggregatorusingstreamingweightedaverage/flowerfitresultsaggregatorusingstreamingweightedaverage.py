@@ -0,0 +1,120 @@
+
+from typing import ClassVar, Literal, Optional, Union
+
+from pydantic import BaseModel, ConfigDict, Field
+from pybiscus.interfaces.flower.flowerfitresultsaggregator import FlowerFitResultsAggregator
+from pybiscus.flower.flatparameters import FlatParametersLayout
+from pybiscus.flower.updatecodec import check_not_encoded
+import pybiscus.core.pybiscus_logger as logm
+
+from flwr.common import (
+    FitRes,
+    NDArrays,
+    Parameters,
+    ndarrays_to_parameters as flw_ndarrays_to_parameters,
+)
+from flwr.server.client_proxy import ClientProxy
+
+
+
+class ConfigFlowerFitResultsAggregatorUsingStreamingWeightedAverageData(BaseModel):
+    """
+    accumulator_dtype: precision of the preallocated accumulator (float64 is the safest, float32 halves its memory)
+    release_results:   drop the serialized tensors of each client once folded into the accumulator
+                       (the results are not read after the aggregation by the pybiscus strategies and decorators ;
+                       disable it for a custom decorator reading the clients parameters after aggregate_fit)
+    """
+
+    PYBISCUS_CONFIG: ClassVar[str] = "config"
+
+    accumulator_dtype: Literal["float64", "float32"] = Field( default="float64", description="precision of the accumulator" )
+    release_results:   bool                          = Field( default=True,      description="free the client tensors once folded" )
+
+    model_config = ConfigDict(extra="forbid")
+
+class ConfigFlowerFitResultsAggregatorUsingStreamingWeightedAverage(BaseModel):
+    PYBISCUS_ALIAS: ClassVar[str] = "StreamingWeightedAverage"
+    name:   Literal["streamingweightedaverage"]
+    config: ConfigFlowerFitResultsAggregatorUsingStreamingWeightedAverageData
+    model_config = ConfigDict(extra="forbid")
+
+
+def pyb_aggregate_streaming(
+        results: list[tuple[ClientProxy, FitRes]],
+        accumulator_dtype: str = "float64",
+        release_results: bool = False,
+        layout: Optional[FlatParametersLayout] = None,
+        aggregator: str = "StreamingWeightedAverage",
+        ) -> Optional[NDArrays]:
+    """Weighted average of the clients parameters, computed one layer of one client at a time.
+
+    Each serialized layer is deserialized, scaled by its normalized weight
+    and folded into a preallocated flat accumulator, so that at most one client layer
+    is alive beside the accumulator (instead of the whole list of clients ndarrays).
+    The aggregated layers are returned with the dtype sent by the clients.
+    Encoded updates (update_codec) are refused, aggregator naming the caller in the error.
+    None if there is no result, or if the results total no example (no weight to average with).
+    """
+
+    if not results:
+        return None
+
+    check_not_encoded(results, aggregator)
+
+    num_examples_total = sum(fit_res.num_examples for _, fit_res in results)
+
+    if num_examples_total == 0:
+        return None
+
+    if layout is None:
+        layout = FlatParametersLayout.from_parameters(results[0][1].parameters)
+
+    accumulator = layout.allocate(accumulator_dtype)
+
+    for _, fit_res in results:
+
+        layout.fold_parameters(accumulator, fit_res.parameters, fit_res.num_examples / num_examples_total)
+
+        if release_results:
+            fit_res.parameters.tensors = []
+
+    return layout.flat_to_ndarrays(accumulator)
+
+
+
+class FlowerFitResultsAggregatorUsingStreamingWeightedAverage(FlowerFitResultsAggregator):
+
+    def __init__(self, accumulator_dtype: str = "float64", release_results: bool = True):
+        self.accumulator_dtype = accumulator_dtype
+        self.release_results   = release_results
+        self.flat_layout       = None
+
+    def aggregate(
+            self,
+            server_round: int,
+            results: list[tuple[ClientProxy, FitRes]],
+            failures: list[Union[tuple[ClientProxy, FitRes], BaseException]],
+            ) -> Optional[Parameters] :
+        """ Aggregate results : weighted average (with examples number as weight), streamed client by client
+            None (round not aggregated, global model kept) if the results total no example"""
+
+        logm.console.log(
+            f"🔁 Round:{server_round} StreamingWeightedAverage\n" +
+            "\n".join(f"🆔{client.cid} ⚖️{fit_res.num_examples}" for client, fit_res in results)
+        )
+
+        # layout computed on first round, then cached
+        if self.flat_layout is None and results:
+            self.flat_layout = FlatParametersLayout.from_parameters(results[0][1].parameters)
+
+        # handling of 📥🧬 results
+        aggregated_results    = pyb_aggregate_streaming(results, self.accumulator_dtype, self.release_results, self.flat_layout)
+
+        if aggregated_results is None:
+            logm.console.log(f"🔁 Round:{server_round} ⚠️ StreamingWeightedAverage: no example in the results, round not aggregated")
+            return None
+
+        # handling of 📤🧮🧬 aggregated result
+        parameters_aggregated = flw_ndarrays_to_parameters(aggregated_results)
+
+        return parameters_aggregated
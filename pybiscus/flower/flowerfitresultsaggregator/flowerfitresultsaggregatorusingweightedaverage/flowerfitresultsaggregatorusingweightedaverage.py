@@ -3,6 +3,7 @@ from typing import ClassVar, Literal, Union
 
 from pydantic import BaseModel, ConfigDict
 from pybiscus.interfaces.flower.flowerfitresultsaggregator import FlowerFitResultsAggregator
+from pybiscus.flower.updatecodec import check_not_encoded
 import pybiscus.core.pybiscus_logger as logm
 
 from flwr.common import (
@@ -41,6 +42,8 @@ class FlowerFitResultsAggregatorUsingWeightedAverage(FlowerFitResultsAggregator)
             failures: list[Union[tuple[ClientProxy, FitRes], BaseException]],
             ) -> Parameters :
         """ Aggregate results : weighted average (with examples number as weight)"""
+
+        check_not_encoded(results, "WeightedAverage")
         
         tuples_ndarrays_weight = [ (flw_parameters_to_ndarrays(fit_res.parameters), fit_res.num_examples) 
             for _, fit_res in results ]
@@ -0,0 +1,178 @@
+import multiprocessing
+import threading
+import traceback
+from typing import Any, Callable, Optional
+
+from flwr.client import Client
+from flwr.common import (
+    DisconnectRes,
+    EvaluateIns,
+    EvaluateRes,
+    FitIns,
+    FitRes,
+    GetParametersIns,
+    GetParametersRes,
+    GetPropertiesIns,
+    GetPropertiesRes,
+    ReconnectIns,
+)
+from flwr.server.client_proxy import ClientProxy
+
+import pybiscus.core.pybiscus_logger as logm
+from pybiscus.core.pybiscusexception import PybiscusInternalException
+
+# builds the flower clients of a worker from its client specifications, cid -> Client
+# (a module level function : it is pickled to the worker processes)
+ClientsBuilder = Callable[[list[Any]], dict[str, Client]]
+
+
+class InMemoryClientProxy(ClientProxy):
+    """ClientProxy calling a flower Client of the server process directly : no grpc, no protobuf messages.
+
+    The instructions and results objects are passed as they are, but their parameters stay serialized
+    ndarrays (bytes, as the strategies expect them) : NumPyClient.to_client() converts them on each call.
+    """
+
+    def __init__(self, cid: str, client: Client):
+        super().__init__(cid)
+        self.client = client
+
+    def get_properties(self, ins: GetPropertiesIns, timeout: Optional[float], group_id: Optional[int]) -> GetPropertiesRes:
+        return self.client.get_properties(ins)
+
+    def get_parameters(self, ins: GetParametersIns, timeout: Optional[float], group_id: Optional[int]) -> GetParametersRes:
+        return self.client.get_parameters(ins)
+
+    def fit(self, ins: FitIns, timeout: Optional[float], group_id: Optional[int]) -> FitRes:
+        return self.client.fit(ins)
+
+    def evaluate(self, ins: EvaluateIns, timeout: Optional[float], group_id: Optional[int]) -> EvaluateRes:
+        return self.client.evaluate(ins)
+
+    def reconnect(self, ins: ReconnectIns, timeout: Optional[float], group_id: Optional[int]) -> DisconnectRes:
+        return DisconnectRes(reason="")
+
+
+def _client_worker(connection, build_clients: ClientsBuilder, specs: list[Any]):
+    """worker process : builds its clients once, then serves (method, cid, ins) requests until None"""
+
+    try:
+        clients = build_clients(specs)
+    except Exception:
+        connection.send(("error", traceback.format_exc()))
+        return
+
+    connection.send(("ok", sorted(clients)))
+
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+
+        method, cid, ins = request
+        try:
+            connection.send(("ok", getattr(clients[cid], method)(ins)))
+        except Exception:
+            connection.send(("error", traceback.format_exc()))
+
+    connection.close()
+
+
+class ClientProcessPool:
+    """Flower clients hosted by a bounded pool of worker processes.
+
+    Each worker builds (and keeps) the clients of its specifications, so models, fabrics
+    and datasets are created once per worker and the datasets are shared by its clients.
+    A worker serves one request at a time : at most len(specs_per_worker) clients run concurrently.
+    Only the instructions and the results (parameters as bytes) cross the pipes.
+    """
+
+    def __init__(self, build_clients: ClientsBuilder, specs_per_worker: list[list[Any]]):
+
+        # forkserver : workers are not forked from the (multi-threaded) flower server
+        method  = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        context = multiprocessing.get_context(method)
+
+        self._connections = []
+        self._locks       = []
+        self._processes   = []
+
+        for specs in specs_per_worker:
+            connection, worker_connection = context.Pipe()
+            process = context.Process(target=_client_worker, args=(worker_connection, build_clients, specs), daemon=True)
+            process.start()
+            worker_connection.close()
+
+            self._connections.append(connection)
+            self._locks.append(threading.Lock())
+            self._processes.append(process)
+
+        self.cids: dict[str, int] = {}
+
+        try:
+            for worker, connection in enumerate(self._connections):
+                for cid in self._receive(connection, worker):
+                    self.cids[cid] = worker
+        except Exception:
+            self.shutdown()
+            raise
+
+        logm.console.log(f"🧵 {len(self.cids)} simulated clients in {len(self._processes)} worker processes")
+
+    def _receive(self, connection, worker: int):
+        try:
+            status, value = connection.recv()
+        except EOFError as e:
+            raise PybiscusInternalException(f"simulation worker {worker} died") from e
+
+        if status == "error":
+            raise PybiscusInternalException(f"simulation worker {worker} failed:\n{value}")
+        return value
+
+    def call(self, cid: str, method: str, ins):
+        worker = self.cids[cid]
+        with self._locks[worker]:
+            self._connections[worker].send((method, cid, ins))
+            return self._receive(self._connections[worker], worker)
+
+    def proxies(self) -> list[ClientProxy]:
+        return [ ProcessClientProxy(cid, self) for cid in self.cids ]
+
+    def shutdown(self):
+        for connection, lock in zip(self._connections, self._locks):
+            with lock:
+                try:
+                    connection.send(None)
+                except OSError:
+                    pass
+                connection.close()
+
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+
+        self._connections, self._locks, self._processes = [], [], []
+
+
+class ProcessClientProxy(ClientProxy):
+    """ClientProxy forwarding to a client hosted by a ClientProcessPool worker."""
+
+    def __init__(self, cid: str, pool: ClientProcessPool):
+        super().__init__(cid)
+        self.pool = pool
+
+    def get_properties(self, ins: GetPropertiesIns, timeout: Optional[float], group_id: Optional[int]) -> GetPropertiesRes:
+        return self.pool.call(self.cid, "get_properties", ins)
+
+    def get_parameters(self, ins: GetParametersIns, timeout: Optional[float], group_id: Optional[int]) -> GetParametersRes:
+        return self.pool.call(self.cid, "get_parameters", ins)
+
+    def fit(self, ins: FitIns, timeout: Optional[float], group_id: Optional[int]) -> FitRes:
+        return self.pool.call(self.cid, "fit", ins)
+
+    def evaluate(self, ins: EvaluateIns, timeout: Optional[float], group_id: Optional[int]) -> EvaluateRes:
+        return self.pool.call(self.cid, "evaluate", ins)
+
+    def reconnect(self, ins: ReconnectIns, timeout: Optional[float], group_id: Optional[int]) -> DisconnectRes:
+        return DisconnectRes(reason="")
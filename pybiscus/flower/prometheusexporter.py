@@ -0,0 +1,351 @@
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, ClassVar, Optional, Union
+
+from flwr.common import EvaluateIns, EvaluateRes, FitIns, FitRes, Parameters, Scalar
+from flwr.server.client_manager import ClientManager
+from flwr.server.client_proxy import ClientProxy
+from flwr.server.strategy import Strategy
+from pydantic import BaseModel, ConfigDict, Field
+
+import pybiscus.core.pybiscus_logger as logm
+from pybiscus.interfaces.flower.strategydecorator import StrategyDecorator, undecorated_strategy
+
+
+class ConfigPrometheusExporter(BaseModel):
+    """Prometheus /metrics endpoint of the server process (text exposition format).
+
+    Attributes
+    ----------
+    host:             listen address of the exporter
+    port:             listen port of the exporter
+    duration_buckets: upper bounds (seconds) of the round and phase duration histograms
+    """
+
+    PYBISCUS_CONFIG: ClassVar[str] = "prometheus_exporter"
+
+    host:             str         = "0.0.0.0"
+    port:             int         = Field( default=9400, gt=0, lt=65536 )
+    duration_buckets: list[float] = [ 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600 ]
+
+    model_config = ConfigDict(extra="forbid")
+
+
+# The metrics are written by the strategy thread (and the background server evaluation), and read by
+# the scrapes : no lock, each update being a single assignment (atomic under the GIL). A scrape may see a histogram between the update
+# of its buckets and of its sum, which Prometheus tolerates.
+
+def _labels(label: Optional[str], value: Optional[str], extra: str = "") -> str:
+
+    labels = [ f'{label}="{value}"' ] if label is not None and value is not None else []
+    if extra:
+        labels.append(extra)
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+def _number(value: float) -> str:
+    return "+Inf" if value == math.inf else repr(float(value))
+
+
+class Gauge:
+    """last value (by label value), or the value of a function evaluated at each scrape"""
+
+    kind: ClassVar[str] = "gauge"
+
+    def __init__(self, name: str, help: str, label: Optional[str] = None, function: Optional[Callable[[], Optional[float]]] = None):
+        self.name     = name
+        self.help     = help
+        self.label    = label
+        self.function = function
+        self.values: dict[Optional[str], float] = {}
+
+    def set(self, value: float, label_value: Optional[str] = None) -> None:
+        self.values[label_value] = float(value)
+
+    def samples(self) -> list[str]:
+
+        if self.function is not None:
+            value = self.function()
+            return [] if value is None else [ f"{self.name} {_number(value)}" ]
+
+        return [ f"{self.name}{_labels(self.label, label_value)} {_number(value)}" for label_value, value in list(self.values.items()) ]
+
+
+class Counter(Gauge):
+    """monotonic total"""
+
+    kind: ClassVar[str] = "counter"
+
+    def inc(self, amount: float = 1.0, label_value: Optional[str] = None) -> None:
+        self.values[label_value] = self.values.get(label_value, 0.0) + amount
+
+
+class Histogram:
+    """observations counted into cumulative buckets (by label value)"""
+
+    kind: ClassVar[str] = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: list[float], label: Optional[str] = None):
+        self.name    = name
+        self.help    = help
+        self.label   = label
+        self.buckets = sorted(buckets) + [ math.inf ]
+        # label value -> (per bucket counts, [sum, count])
+        self.states: dict[Optional[str], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, label_value: Optional[str] = None) -> None:
+
+        state = self.states.get(label_value)
+        if state is None:
+            state = self.states[label_value] = ([ 0 ] * len(self.buckets), [ 0.0, 0 ])
+
+        counts, totals = state
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        totals[0] += value
+        totals[1] += 1
+
+    def samples(self) -> list[str]:
+
+        samples = []
+        for label_value, (counts, totals) in list(self.states.items()):
+            cumulated = 0
+            for bound, count in zip(self.buckets, list(counts)):
+                cumulated += count
+                le = 'le="' + _number(bound) + '"'
+                samples.append(f"{self.name}_bucket{_labels(self.label, label_value, le)} {cumulated}")
+            samples.append(f"{self.name}_sum{_labels(self.label, label_value)} {_number(totals[0])}")
+            samples.append(f"{self.name}_count{_labels(self.label, label_value)} {totals[1]}")
+
+        return samples
+
+
+def process_rss_bytes() -> Optional[float]:
+    """resident set size of the process (its peak where /proc is not available)"""
+
+    try:
+        with open("/proc/self/statm") as statm:
+            return float(int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE"))
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        # e.g. windows : not published
+        return None
+
+    # kilobytes on linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return float(peak if os.uname().sysname == "Darwin" else peak * 1024)
+
+
+def parameters_bytes(parameters: Parameters) -> int:
+    return sum(len(tensor) for tensor in parameters.tensors)
+
+
+class PrometheusExporter:
+    """Metrics of the Federated Learning, served on http://host:port/metrics by a daemon thread."""
+
+    def __init__(self, host: str = "0.0.0.0", port: int = 9400, duration_buckets: Optional[list[float]] = None):
+
+        buckets = duration_buckets or ConfigPrometheusExporter.model_fields["duration_buckets"].default
+
+        self.client_manager: Optional[ClientManager] = None
+
+        self.round                = Gauge("pybiscus_round", "Current round of the Federated Learning.")
+        self.round_duration       = Histogram("pybiscus_round_duration_seconds", "Duration of the rounds.", buckets)
+        self.last_round_duration  = Gauge("pybiscus_last_round_duration_seconds", "Duration of the last completed round.")
+        self.phase_duration       = Histogram("pybiscus_phase_duration_seconds", "Duration of the phases of the rounds.", buckets, label="phase")
+        self.aggregation_duration = Gauge("pybiscus_aggregation_seconds", "Duration of the last aggregate_fit.")
+        self.connected_clients    = Gauge("pybiscus_connected_clients", "Clients connected to the server.", function=self._connected_clients)
+        self.round_clients        = Gauge("pybiscus_round_clients", "Clients of the last round, by outcome.", label="outcome")
+        self.round_bytes          = Gauge("pybiscus_round_bytes", "Parameters bytes of the last round fit, by direction.", label="direction")
+        self.bytes_total          = Counter("pybiscus_bytes_total", "Parameters bytes of the fits, by direction.", label="direction")
+        self.eval_loss            = Gauge("pybiscus_eval_loss", "Last global loss, by evaluation (server: centralized, federated: clients).", label="evaluation")
+        self.eval_metric          = Gauge("pybiscus_eval_metric", "Last centralized evaluation metrics of the global model.", label="metric")
+        self.rss                  = Gauge("pybiscus_process_resident_memory_bytes", "Resident memory of the server process.", function=process_rss_bytes)
+
+        self.metrics = [ self.round, self.round_duration, self.last_round_duration, self.phase_duration, self.aggregation_duration,
+                         self.connected_clients, self.round_clients, self.round_bytes, self.bytes_total,
+                         self.eval_loss, self.eval_metric, self.rss ]
+
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="pyb_prometheus", daemon=True)
+        self.thread.start()
+
+        logm.console.log(f"📈 prometheus exporter on http://{host}:{self.server.server_address[1]}/metrics")
+
+    def _connected_clients(self) -> Optional[float]:
+        return None if self.client_manager is None else float(self.client_manager.num_available())
+
+    def render(self) -> str:
+
+        lines = []
+        for metric in self.metrics:
+            samples = metric.samples()
+            if samples:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                lines.extend(samples)
+
+        return "\n".join(lines) + "\n"
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class PrometheusExporterStrategyDecorator(StrategyDecorator):
+    """Updates the metrics of a PrometheusExporter from the strategy calls.
+
+    Phases : configure_fit, fit (clients training, until aggregate_fit), aggregate_fit, evaluate (centralized),
+    configure_evaluate, evaluate_clients (until aggregate_evaluate) and aggregate_evaluate.
+    The centralized evaluation results are the ones reported by the server evaluation of the strategy,
+    if any (background evaluations included), else the ones returned by evaluate.
+    """
+
+    def __init__(self, base_strategy: Strategy, exporter: PrometheusExporter):
+        super().__init__(base_strategy)
+
+        self.exporter = exporter
+
+        self._round_start: Optional[float] = None
+        self._phase_end:   Optional[float] = None
+
+        # in background, evaluate returns None and the results are only reported
+        server_evaluation = getattr(undecorated_strategy(base_strategy), "server_evaluation", None)
+        self._reported = server_evaluation is not None
+        if self._reported:
+            server_evaluation.add_listener(self._report_evaluation)
+
+    def _report_evaluation(self, server_round: int, loss: Optional[float], metrics: dict[str, Scalar]) -> None:
+
+        if loss is not None:
+            self.exporter.eval_loss.set(loss, "server")
+        for key, value in metrics.items():
+            if isinstance(value, (int, float)):
+                self.exporter.eval_metric.set(value, key)
+
+    def _phase(self, phase: str, call, *args):
+
+        start = time.perf_counter()
+        try:
+            return call(*args)
+        finally:
+            self._phase_end = time.perf_counter()
+            self.exporter.phase_duration.observe(self._phase_end - start, phase)
+
+    def _waited(self, phase: str) -> None:
+        """the phase between the end of the previous one and now (e.g. the clients fit)"""
+
+        if self._phase_end is not None:
+            self.exporter.phase_duration.observe(time.perf_counter() - self._phase_end, phase)
+
+    def _end_round(self) -> None:
+
+        if self._round_start is not None and self._phase_end is not None:
+            duration = self._phase_end - self._round_start
+            self.exporter.round_duration.observe(duration)
+            self.exporter.last_round_duration.set(duration)
+            self._round_start = None
+
+    def configure_fit(self, server_round: int, parameters: Parameters, client_manager: ClientManager
+                    ) -> list[tuple[ClientProxy, FitIns]]:
+
+        self._end_round()
+        self._round_start = time.perf_counter()
+
+        self.exporter.client_manager = client_manager
+        self.exporter.round.set(server_round)
+
+        instructions = self._phase("configure_fit", self.base_strategy.configure_fit, server_round, parameters, client_manager)
+
+        sent = sum(parameters_bytes(ins.parameters) for _, ins in instructions)
+        self.exporter.round_bytes.set(sent, "sent")
+        self.exporter.bytes_total.inc(sent, "sent")
+
+        return instructions
+
+    def aggregate_fit(self, server_round: int,
+                        results: list[tuple[ClientProxy, FitRes]], failures: list[Union[tuple[ClientProxy, FitRes], BaseException]],
+                    ) -> tuple[Optional[Parameters], dict[str, Scalar]]:
+
+        self._waited("fit")
+
+        received = sum(parameters_bytes(fit_res.parameters) for _, fit_res in results)
+        self.exporter.round_bytes.set(received, "received")
+        self.exporter.bytes_total.inc(received, "received")
+        self.exporter.round_clients.set(len(results), "results")
+        self.exporter.round_clients.set(len(failures), "failures")
+
+        start = time.perf_counter()
+        aggregated = self._phase("aggregate_fit", self.base_strategy.aggregate_fit, server_round, results, failures)
+        self.exporter.aggregation_duration.set(self._phase_end - start)
+
+        return aggregated
+
+    def evaluate(self, server_round: int, parameters: Parameters) -> Optional[tuple[float, dict[str, Scalar]]]:
+
+        evaluation = self._phase("evaluate", self.base_strategy.evaluate, server_round, parameters)
+
+        if evaluation is not None and not self._reported:
+            self._report_evaluation(server_round, *evaluation)
+
+        return evaluation
+
+    def configure_evaluate(self, server_round: int, parameters: Parameters, client_manager: ClientManager
+                    ) -> list[tuple[ClientProxy, EvaluateIns]]:
+        return self._phase("configure_evaluate", self.base_strategy.configure_evaluate, server_round, parameters, client_manager)
+
+    def aggregate_evaluate(self, server_round: int,
+                        results: list[tuple[ClientProxy, EvaluateRes]], failures: list[Union[tuple[ClientProxy, EvaluateRes], BaseException]],
+                    ) -> tuple[Optional[float], dict[str, Scalar]]:
+
+        self._waited("evaluate_clients")
+
+        loss, metrics = self._phase("aggregate_evaluate", self.base_strategy.aggregate_evaluate, server_round, results, failures)
+
+        if loss is not None:
+            self.exporter.eval_loss.set(loss, "federated")
+
+        return loss, metrics
+
+    def close(self) -> None:
+        """records the last round, and stops the exporter"""
+
+        self._end_round()
+        self.exporter.close()
+
+
+def close_prometheus_exporter(strategy: Strategy) -> None:
+    """stops the prometheus exporter, once the Federated Learning ended"""
+
+    while isinstance(strategy, StrategyDecorator):
+        if isinstance(strategy, PrometheusExporterStrategyDecorator):
+            strategy.close()
+        strategy = strategy.base_strategy
@@ -0,0 +1,252 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import ClassVar, Literal, Optional, Union
+
+from flwr.common import (
+    Code,
+    DisconnectRes,
+    EvaluateIns,
+    EvaluateRes,
+    FitIns,
+    FitRes,
+    GetParametersIns,
+    GetParametersRes,
+    GetPropertiesIns,
+    GetPropertiesRes,
+    ReconnectIns,
+    bytes_to_ndarray as flw_bytes_to_ndarray,
+)
+from flwr.server.client_proxy import ClientProxy
+from pydantic import BaseModel, ConfigDict, Field
+
+import pybiscus.core.pybiscus_logger as logm
+from pybiscus.flower.updatecodec import is_encoded_update
+
+
+class ConfigRoundDeadline(BaseModel):
+    """Wall-clock deadline of the fit phase of each round.
+
+    Attributes
+    ----------
+    deadline:           seconds after which the round is aggregated from the results arrived so far
+    min_results:        quorum : past the deadline, the round still waits for that many results (if reachable)
+    late_results:       "drop" the results arriving after the cut, or "carry" them into the next round aggregation
+    client_time_budget: fraction of the deadline sent to the clients as fit_config["time_budget"] (seconds),
+                        the client training stopping after the last batch fitting the budget ; no budget if None
+    """
+
+    PYBISCUS_CONFIG: ClassVar[str] = "round_deadline"
+
+    deadline:           float                     = Field( gt=0 )
+    min_results:        int                       = Field( default=1,   gt=0 )
+    late_results:       Literal["drop", "carry"]  = "drop"
+    client_time_budget: Optional[float]           = Field( default=0.8, gt=0, le=1 )
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class RoundDeadlineMissed(Exception):
+    """fit result not arrived at the round cut (not a client failure)"""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+
+
+@dataclass
+class _RoundState:
+
+    server_round: int
+    expected:     int
+    start:        float = field(default_factory=time.perf_counter)
+    finished:     int   = 0
+    succeeded:    int   = 0
+    completion_times: dict[str, float] = field(default_factory=dict)
+
+
+class RoundDeadline:
+    """Cuts the fit phase of a round at a deadline, once a quorum of results has arrived.
+
+    The round clients are wrapped into proxies whose fit runs the real one in a background thread
+    and returns its result, or raises RoundDeadlineMissed at the cut. The flower server thus
+    aggregates what arrived in time ; late trainings go on, and their results are dropped or
+    carried into the next round. Clients still training are not selected for the next round, neither
+    for the fit nor for the evaluate.
+    Carried results are aggregated as they are, with no staleness weight, into a global model one
+    round newer than the one they were trained from.
+    """
+
+    def __init__(self, deadline: float, min_results: int = 1, late_results: str = "drop", client_time_budget: Optional[float] = 0.8):
+
+        self.deadline           = deadline
+        self.min_results        = min_results
+        self.late_results       = late_results
+        self.client_time_budget = client_time_budget
+
+        self._condition = threading.Condition()
+        self._busy: set[str] = set()
+        self._carried: list[tuple[ClientProxy, FitRes]] = []
+        self._rounds: dict[int, _RoundState] = {}
+
+    def configure(self, server_round: int, instructions: list[tuple[ClientProxy, FitIns]]) -> list[tuple[ClientProxy, FitIns]]:
+        """the round instructions, with the deadline proxies and the clients time budget"""
+
+        with self._condition:
+            late = [ proxy.cid for proxy, _ in instructions if proxy.cid in self._busy ]
+            if late:
+                logm.console.log(f"🔁 Round:{server_round} 🐢 still training, not selected: {late}")
+
+            instructions = [ (proxy, ins) for proxy, ins in instructions if proxy.cid not in self._busy ]
+            state = _RoundState(server_round=server_round, expected=len(instructions))
+            self._rounds = { server_round: state }
+
+            for proxy, _ in instructions:
+                self._busy.add(proxy.cid)
+
+        wrapped = []
+        for proxy, ins in instructions:
+            config = dict(ins.config)
+            if self.client_time_budget is not None:
+                config["time_budget"] = self.deadline * self.client_time_budget
+            wrapped.append((_DeadlineClientProxy(proxy, self, state), FitIns(ins.parameters, config)))
+
+        return wrapped
+
+    def configure_evaluate(self, server_round: int, instructions: list[tuple[ClientProxy, EvaluateIns]]) -> list[tuple[ClientProxy, EvaluateIns]]:
+        """the round evaluate instructions, without the clients still training"""
+
+        with self._condition:
+            late = [ proxy.cid for proxy, _ in instructions if proxy.cid in self._busy ]
+            instructions = [ (proxy, ins) for proxy, ins in instructions if proxy.cid not in self._busy ]
+
+        if late:
+            logm.console.log(f"🔁 Round:{server_round} 🐢 still training, not evaluated: {late}")
+
+        return instructions
+
+    def _run(self, proxy: ClientProxy, ins: FitIns, timeout: Optional[float], group_id: Optional[int], state: _RoundState, outcome: dict):
+
+        try:
+            fit_res = proxy.fit(ins, timeout=timeout, group_id=group_id)
+            if fit_res.status.code != Code.OK:
+                raise RuntimeError(f"client {proxy.cid} fit status {fit_res.status}")
+            outcome["result"] = fit_res
+        except BaseException as e:
+            outcome["error"] = e
+
+        elapsed = time.perf_counter() - state.start
+
+        with self._condition:
+            self._busy.discard(proxy.cid)
+            state.finished += 1
+            state.completion_times[proxy.cid] = elapsed
+
+            if "result" in outcome:
+                state.succeeded += 1
+
+            if outcome.get("missed"):
+                self._late(proxy, state, outcome, elapsed)
+
+            self._condition.notify_all()
+
+        logm.console.log(f"🔁 Round:{state.server_round} 🆔{proxy.cid} ⏱️ fit completed in {elapsed:.2f}s")
+
+    def _late(self, proxy: ClientProxy, state: _RoundState, outcome: dict, elapsed: float):
+        """result arrived after the cut of its round (condition held)"""
+
+        fit_res = outcome.get("result")
+
+        if fit_res is None:
+            logm.console.log(f"🔁 Round:{state.server_round} 🐢 late failure of 🆔{proxy.cid}: {outcome['error']!r}")
+            return
+
+        tensors = fit_res.parameters.tensors
+        encoded = bool(tensors) and is_encoded_update(flw_bytes_to_ndarray(tensors[0]))
+
+        if self.late_results == "carry" and not encoded:
+            logm.console.log(f"🔁 Round:{state.server_round} 🐢 late result of 🆔{proxy.cid} after {elapsed:.2f}s, carried into the next round")
+            self._carried.append((proxy, fit_res))
+        else:
+            # an encoded update is relative to the parameters of its round : it can not be carried
+            logm.console.log(f"🔁 Round:{state.server_round} 🐢 late result of 🆔{proxy.cid} after {elapsed:.2f}s, dropped")
+
+    def wait(self, state: _RoundState, outcome: dict, cid: str) -> FitRes:
+        """the client fit result, or RoundDeadlineMissed once the round is cut"""
+
+        cut_time = state.start + self.deadline
+
+        with self._condition:
+            while "result" not in outcome and "error" not in outcome:
+
+                remaining = cut_time - time.perf_counter()
+
+                if remaining <= 0:
+                    # quorum reached, or not reachable anymore
+                    quorum  = min(self.min_results, state.expected)
+                    pending = state.expected - state.finished
+                    if state.succeeded >= quorum or state.succeeded + pending < quorum:
+                        outcome["missed"] = True
+                        raise RoundDeadlineMissed(f"client {cid} missed the round {state.server_round} deadline ({self.deadline}s)")
+
+                self._condition.wait(timeout=remaining if remaining > 0 else None)
+
+        if "error" in outcome:
+            raise outcome["error"]
+
+        return outcome["result"]
+
+    def collect(
+            self,
+            server_round: int,
+            results:  list[tuple[ClientProxy, FitRes]],
+            failures: list[Union[tuple[ClientProxy, FitRes], BaseException]],
+            ) -> tuple[list[tuple[ClientProxy, FitRes]], list[Union[tuple[ClientProxy, FitRes], BaseException]], dict[str, float]]:
+        """results (with the carried late ones), failures (without the missed deadlines) and completion times of the round"""
+
+        missed   = [ failure for failure in failures if isinstance(failure, RoundDeadlineMissed) ]
+        failures = [ failure for failure in failures if not isinstance(failure, RoundDeadlineMissed) ]
+
+        with self._condition:
+            carried, self._carried = self._carried, []
+            state = self._rounds.get(server_round)
+            completion_times = dict(state.completion_times) if state is not None else {}
+
+        if missed:
+            logm.console.log(f"🔁 Round:{server_round} ⏰ deadline {self.deadline}s : {len(results)} results in time, {len(missed)} late")
+
+        if carried:
+            logm.console.log(f"🔁 Round:{server_round} 🐢 {len(carried)} late results carried: {[ proxy.cid for proxy, _ in carried ]}")
+
+        return [ (proxy.proxy if isinstance(proxy, _DeadlineClientProxy) else proxy, fit_res) for proxy, fit_res in results ] + carried, failures, completion_times
+
+
+class _DeadlineClientProxy(ClientProxy):
+    """ClientProxy whose fit is cut at the round deadline (the real fit goes on in the background)"""
+
+    def __init__(self, proxy: ClientProxy, round_deadline: RoundDeadline, state: _RoundState):
+        super().__init__(proxy.cid)
+        self.proxy          = proxy
+        self.round_deadline = round_deadline
+        self.state          = state
+
+    def fit(self, ins: FitIns, timeout: Optional[float], group_id: Optional[int]) -> FitRes:
+        outcome = {}
+        threading.Thread(
+            target=self.round_deadline._run,
+            args=(self.proxy, ins, timeout, group_id, self.state, outcome),
+            name=f"pyb_deadline_{self.cid}",
+            daemon=True,
+        ).start()
+        return self.round_deadline.wait(self.state, outcome, self.cid)
+
+    def get_properties(self, ins: GetPropertiesIns, timeout: Optional[float], group_id: Optional[int]) -> GetPropertiesRes:
+        return self.proxy.get_properties(ins, timeout, group_id)
+
+    def get_parameters(self, ins: GetParametersIns, timeout: Optional[float], group_id: Optional[int]) -> GetParametersRes:
+        return self.proxy.get_parameters(ins, timeout, group_id)
+
+    def evaluate(self, ins: EvaluateIns, timeout: Optional[float], group_id: Optional[int]) -> EvaluateRes:
+        return self.proxy.evaluate(ins, timeout, group_id)
+
+    def reconnect(self, ins: ReconnectIns, timeout: Optional[float], group_id: Optional[int]) -> DisconnectRes:
+        return self.proxy.reconnect(ins, timeout, group_id)
@@ -0,0 +1,354 @@
+import hashlib
+import json
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import ClassVar, Literal, Optional, Union
+
+import numpy as np
+import torch
+from flwr.common import FitRes, Parameters, Scalar
+from flwr.server.client_manager import ClientManager
+from flwr.server.client_proxy import ClientProxy
+from flwr.server.strategy import Strategy
+from pydantic import BaseModel, ConfigDict, Field
+
+import pybiscus.core.pybiscus_logger as logm
+from pybiscus.core.pybiscusexception import PybiscusValueException
+from pybiscus.flower.flatparameters import FlatParametersLayout
+from pybiscus.interfaces.flower.strategydecorator import StrategyDecorator, undecorated_strategy
+
+
+class ConfigRoundHistory(BaseModel):
+    """Global model of every round, stored into the reporting directory (see RoundHistoryStore).
+
+    Attributes
+    ----------
+    dirname:           directory of the round history, in the reporting directory
+    delta_dtype:       dtype of the stored deltas between consecutive rounds
+    chunk_size:        number of elements of the compressed and deduplicated chunks
+    keyframe_every:    store one round in full every keyframe_every rounds (faster rebuild of the late rounds) ;
+                       only the first round if None
+    compression_level: zlib compression level
+    """
+
+    PYBISCUS_CONFIG: ClassVar[str] = "round_history"
+
+    dirname:           str                            = "round_history"
+    delta_dtype:       Literal["float32", "float16"]  = "float32"
+    chunk_size:        int                            = Field( default=65536, gt=0 )
+    keyframe_every:    Optional[int]                  = Field( default=None, gt=0 )
+    compression_level: int                            = Field( default=6, ge=0, le=9 )
+
+    model_config = ConfigDict(extra="forbid")
+
+
+# chunk table : one record per distinct chunk, its index being the chunk id
+CHUNK_RECORD = np.dtype([ ("digest", "S16"), ("offset", "<i8"), ("length", "<i4") ])
+
+# round table : one record per stored round, its chunks being refs[first_ref:first_ref + num_refs]
+ROUND_RECORD = np.dtype([ ("server_round", "<i4"), ("full", "u1"), ("float16", "u1"), ("first_ref", "<i8"), ("num_refs", "<i4") ])
+
+REF_RECORD = np.dtype("<i8")
+
+
+class RoundHistoryStore:
+    """Global model of every round, in a directory : full rounds, then deltas to the previous round.
+
+    The flat (float32, see FlatParametersLayout) parameters of the first round, and of every keyframe,
+    are stored in full ; the other rounds as the delta to the previous round (optionally float16).
+    Vectors are cut into chunks of chunk_size elements, zlib compressed and deduplicated on their content
+    (a frozen layer gives the same zero delta chunks round after round).
+
+    Files : layout.json, chunks.bin (compressed chunks), and the fixed size records tables chunks.idx,
+    rounds.idx and refs.idx, memory-mapped by the readers. A round record is appended after its
+    chunks and refs : an interrupted write leaves the rounds before it readable.
+
+    Deltas are taken against the rebuilt previous round (not the exact one) : float16 rounding errors
+    do not accumulate, and rebuilding a round gives exactly the vector the writer kept.
+    """
+
+    LAYOUT: ClassVar[str] = "layout.json"
+    CHUNKS: ClassVar[str] = "chunks.bin"
+    CHUNKS_INDEX: ClassVar[str] = "chunks.idx"
+    ROUNDS_INDEX: ClassVar[str] = "rounds.idx"
+    REFS_INDEX:   ClassVar[str] = "refs.idx"
+
+    def __init__(self, directory: Path):
+
+        self.directory = Path(directory)
+        self.layout: Optional[FlatParametersLayout] = None
+        self.chunk_size = 0
+
+        if (self.directory / self.LAYOUT).exists():
+            description = json.loads((self.directory / self.LAYOUT).read_text())
+            self.layout = FlatParametersLayout(description["names"], description["shapes"], description["dtypes"])
+            self.chunk_size = int(description["chunk_size"])
+
+    # -------------------------------------------------------------------------
+    # reading
+
+    def _table(self, name: str, dtype: np.dtype) -> np.ndarray:
+        """memory-mapped records table (empty if there is no record yet)"""
+
+        path = self.directory / name
+        if not path.exists() or path.stat().st_size < dtype.itemsize:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(path.stat().st_size // dtype.itemsize,))
+
+    def rounds(self) -> np.ndarray:
+        return self._table(self.ROUNDS_INDEX, ROUND_RECORD)
+
+    def _record(self, rounds: np.ndarray, server_round: int) -> int:
+        matches = np.flatnonzero(rounds["server_round"] == server_round)
+        if len(matches) == 0:
+            raise PybiscusValueException(f"round {server_round} is not in the round history {self.directory} (rounds {rounds['server_round'].min(initial=0)}..{rounds['server_round'].max(initial=0)})")
+        return int(matches[-1])
+
+    def _read_vector(self, record: np.void, chunks: np.ndarray, refs: np.ndarray, data: np.ndarray) -> np.ndarray:
+
+        dtype  = np.float16 if record["float16"] else np.float32
+        vector = np.empty(self.layout.numel, dtype=dtype)
+        first, count = int(record["first_ref"]), int(record["num_refs"])
+
+        for position, chunk_id in enumerate(refs[first:first + count]):
+            chunk = chunks[chunk_id]
+            raw = zlib.decompress(data[chunk["offset"]:chunk["offset"] + chunk["length"]])
+            start = position * self.chunk_size
+            vector[start:start + self.chunk_size] = np.frombuffer(raw, dtype=dtype)
+
+        return vector
+
+    def rebuild(self, server_round: int) -> np.ndarray:
+        """flat float32 parameters of a round : the previous full round, plus the deltas up to that round"""
+
+        if self.layout is None:
+            raise PybiscusValueException(f"no round history in {self.directory}")
+
+        rounds = self.rounds()
+        chunks = self._table(self.CHUNKS_INDEX, CHUNK_RECORD)
+        refs   = self._table(self.REFS_INDEX, REF_RECORD)
+        data   = np.memmap(self.directory / self.CHUNKS, dtype=np.uint8, mode="r")
+
+        last  = self._record(rounds, server_round)
+        first = int(np.flatnonzero(rounds["full"][:last + 1])[-1])
+
+        flat = self._read_vector(rounds[first], chunks, refs, data).astype(np.float32, copy=False)
+        for index in range(first + 1, last + 1):
+            # same float32 accumulation as the writer
+            flat += self._read_vector(rounds[index], chunks, refs, data).astype(np.float32, copy=False)
+
+        return flat
+
+    def state_dict(self, server_round: int) -> "OrderedDict[str, torch.Tensor]":
+        """parameters of a round, with their original dtypes"""
+        return OrderedDict( (name, torch.from_numpy(np.array(ndarray)))
+                            for name, ndarray in zip(self.layout.names, self.layout.flat_to_ndarrays(self.rebuild(server_round))) )
+
+    # -------------------------------------------------------------------------
+    # writing
+
+    def create(self, layout: FlatParametersLayout, chunk_size: int) -> None:
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.layout     = layout
+        self.chunk_size = chunk_size
+
+        (self.directory / self.LAYOUT).write_text(json.dumps({
+            "names":      layout.names,
+            "shapes":     layout.shapes,
+            "dtypes":     [ dtype.str for dtype in layout.dtypes ],
+            "chunk_size": chunk_size,
+        }))
+
+        for name in (self.CHUNKS, self.CHUNKS_INDEX, self.ROUNDS_INDEX, self.REFS_INDEX):
+            (self.directory / name).touch()
+
+    def append(self, server_round: int, vector: np.ndarray, full: bool, digests: dict[bytes, int], compression_level: int = 6) -> int:
+        """stores a full vector or a delta (float32 or float16) ; returns the stored size in bytes"""
+
+        chunks_path = self.directory / self.CHUNKS
+        num_chunks  = (self.directory / self.CHUNKS_INDEX).stat().st_size // CHUNK_RECORD.itemsize
+        offset      = chunks_path.stat().st_size
+        stored      = 0
+        ids         = np.empty((len(vector) + self.chunk_size - 1) // self.chunk_size, dtype=REF_RECORD)
+        new_chunks  = []
+
+        with open(chunks_path, "ab") as chunks_file:
+            for position, start in enumerate(range(0, len(vector), self.chunk_size)):
+
+                raw    = vector[start:start + self.chunk_size].tobytes()
+                digest = hashlib.blake2b(raw, digest_size=16, person=vector.dtype.str.encode()).digest()
+
+                if digest not in digests:
+                    compressed = zlib.compress(raw, compression_level)
+                    chunks_file.write(compressed)
+                    digests[digest] = num_chunks + len(new_chunks)
+                    new_chunks.append((digest, offset, len(compressed)))
+                    offset += len(compressed)
+                    stored += len(compressed)
+
+                ids[position] = digests[digest]
+
+        first_ref = (self.directory / self.REFS_INDEX).stat().st_size // REF_RECORD.itemsize
+
+        with open(self.directory / self.CHUNKS_INDEX, "ab") as index_file:
+            index_file.write(np.array(new_chunks, dtype=CHUNK_RECORD).tobytes())
+        with open(self.directory / self.REFS_INDEX, "ab") as refs_file:
+            refs_file.write(ids.tobytes())
+
+        # the round record last : commit of the round
+        record = np.array([ (server_round, full, vector.dtype == np.float16, first_ref, len(ids)) ], dtype=ROUND_RECORD)
+        with open(self.directory / self.ROUNDS_INDEX, "ab") as rounds_file:
+            rounds_file.write(record.tobytes())
+
+        return stored
+
+    def digests(self) -> dict[bytes, int]:
+        """content digest -> chunk id, of the stored chunks"""
+        return { bytes(digest): index for index, digest in enumerate(self._table(self.CHUNKS_INDEX, CHUNK_RECORD)["digest"]) }
+
+
+class RoundHistoryWriter:
+    """Appends the rounds to a RoundHistoryStore in a background thread (at most one round queued behind the one being written)."""
+
+    MAX_PENDING: ClassVar[int] = 2
+
+    def __init__(
+            self,
+            directory: Path,
+            delta_dtype: str = "float32",
+            chunk_size: int = 65536,
+            keyframe_every: Optional[int] = None,
+            compression_level: int = 6,
+            names: Optional[list[str]] = None,
+            ):
+
+        self.store             = RoundHistoryStore(directory)
+        self.names             = names
+        self.delta_dtype       = np.dtype(delta_dtype)
+        self.chunk_size        = chunk_size
+        self.keyframe_every    = keyframe_every
+        self.compression_level = compression_level
+
+        # rebuilt parameters of the last stored round (writer thread only)
+        self.previous: Optional[np.ndarray] = None
+        self.stored_rounds = 0
+        self._digests: dict[bytes, int] = self.store.digests()
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending:  list[Future] = []
+        self._lock = threading.Lock()
+
+    def submit(self, server_round: int, parameters: Parameters) -> None:
+        """stores the round parameters (serialized parameters are immutable : no copy)"""
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pyb_round_history")
+
+            self._pending = [ future for future in self._pending if not future.done() ]
+            running = list(self._pending)
+
+        if len(running) >= self.MAX_PENDING:
+            logm.console.log(f"🔁 Round {server_round} 🗃️ waiting for the round history backlog")
+            running[0].result()
+
+        with self._lock:
+            self._pending.append(self._executor.submit(self._write, server_round, parameters))
+
+    def _write(self, server_round: int, parameters: Parameters) -> None:
+
+        try:
+            if self.store.layout is None:
+                layout = FlatParametersLayout.from_parameters(parameters)
+                if self.names is not None and len(self.names) == len(layout):
+                    layout.names = list(self.names)
+                self.store.create(layout, self.chunk_size)
+
+            flat = self.store.layout.parameters_to_flat(parameters)
+            full = self.previous is None or (self.keyframe_every is not None and self.stored_rounds % self.keyframe_every == 0)
+
+            if full:
+                vector, self.previous = flat, flat.copy()
+            else:
+                vector = (flat - self.previous).astype(self.delta_dtype, copy=False)
+                # same float32 accumulation as the readers
+                self.previous += vector.astype(np.float32, copy=False)
+
+            stored = self.store.append(server_round, vector, full, self._digests, self.compression_level)
+            self.stored_rounds += 1
+
+        except Exception as e:
+            # a failed history write does not stop the Federated Learning
+            logm.console.log(f"🔁 Round {server_round} 🗃️ round history failed: {e!r}")
+            return
+
+        logm.console.log(f"🔁 Round {server_round} 🗃️ {'full' if full else 'delta'} round stored: {stored / 2**10:.1f} KiB (full size {flat.nbytes / 2**10:.1f} KiB)")
+
+    def close(self) -> None:
+        """waits for the rounds being written"""
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+            executor, self._executor = self._executor, None
+
+        for future in pending:
+            future.result()
+
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+class RoundHistoryStrategyDecorator(StrategyDecorator):
+    """Stores the global model of every round (the initial parameters, then each aggregation) into a round history.
+
+    The initial parameters are stored as the round before the first aggregated one (round 0,
+    or the checkpointed round of a resumed session).
+    """
+
+    def __init__(self, base_strategy: Strategy, directory: Path, **writer_options):
+        super().__init__(base_strategy)
+
+        # names of the parameters, when the strategy knows its model
+        model = getattr(undecorated_strategy(base_strategy), "model", None)
+        names = list(model.state_dict().keys()) if model is not None else None
+
+        self.writer = RoundHistoryWriter(directory, names=names, **writer_options)
+        self.initial_parameters: Optional[Parameters] = None
+
+    def initialize_parameters(self, client_manager: ClientManager) -> Optional[Parameters]:
+        self.initial_parameters = self.base_strategy.initialize_parameters(client_manager)
+        return self.initial_parameters
+
+    def aggregate_fit(
+            self,
+            server_round: int,
+            results: list[tuple[ClientProxy, FitRes]],
+            failures: list[Union[tuple[ClientProxy, FitRes], BaseException]],
+            ) -> tuple[Optional[Parameters], dict[str, Scalar]]:
+
+        parameters, metrics = self.base_strategy.aggregate_fit(server_round, results, failures)
+
+        if self.initial_parameters is not None:
+            self.writer.submit(server_round - 1, self.initial_parameters)
+            self.initial_parameters = None
+
+        if parameters is not None:
+            self.writer.submit(server_round, parameters)
+
+        return parameters, metrics
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+def close_round_history(strategy: Strategy) -> None:
+    """waits for the rounds being written into the round history, once the Federated Learning ended"""
+
+    while isinstance(strategy, StrategyDecorator):
+        if isinstance(strategy, RoundHistoryStrategyDecorator):
+            strategy.close()
+        strategy = strategy.base_strategy
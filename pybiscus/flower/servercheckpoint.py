@@ -0,0 +1,251 @@
+import copy
+import os
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, ClassVar, Optional, Union
+
+import torch
+from flwr.common import EvaluateIns, EvaluateRes, FitIns, FitRes, Parameters, Scalar, parameters_to_ndarrays
+from flwr.server.client_manager import ClientManager
+from flwr.server.client_proxy import ClientProxy
+from flwr.server.strategy import Strategy
+from lightning.pytorch import LightningModule
+
+import pybiscus.core.pybiscus_logger as logm
+from pybiscus.interfaces.flower.strategydecorator import StrategyDecorator, undecorated_strategy
+
+
+CHECKPOINT_FILENAME = "checkpoint_round_{:05d}.pt"
+CHECKPOINT_PATTERN  = re.compile(r"checkpoint_round_(\d+)\.pt$")
+
+
+def strategy_state(strategy: Strategy) -> dict:
+    """server side state of a (decorated) strategy : server optimizer and strategy decorators states"""
+
+    state = {}
+
+    aggregator = getattr(undecorated_strategy(strategy), "flower_fit_results_aggregator", None)
+    if aggregator is not None and aggregator.state_dict():
+        state["aggregator"] = aggregator.state_dict()
+
+    # stateless decorators (e.g. the reporting ones, added after the restore) are not saved
+    decorators = [ { "name": type(decorator).__name__, "state": decorator_state }
+                   for decorator in _decorators(strategy) if (decorator_state := decorator.state_dict()) ]
+    if decorators:
+        state["decorators"] = decorators
+
+    return state
+
+
+def load_strategy_state(strategy: Strategy, checkpoint: dict, decorators: bool = True) -> None:
+    """restores the server side state of a checkpoint into a (decorated) strategy"""
+
+    aggregator = getattr(undecorated_strategy(strategy), "flower_fit_results_aggregator", None)
+    if aggregator is not None and "aggregator" in checkpoint:
+        aggregator.load_state_dict(checkpoint["aggregator"])
+
+    if not decorators or "decorators" not in checkpoint:
+        return
+
+    # saved states matched by decorator name, in chain order
+    saved_states = [ saved for saved in checkpoint["decorators"] if saved["state"] ]
+
+    for decorator in _decorators(strategy):
+        name  = type(decorator).__name__
+        index = next((index for index, saved in enumerate(saved_states) if saved["name"] == name), None)
+        if index is not None:
+            decorator.load_state_dict(saved_states.pop(index)["state"])
+
+    for saved in saved_states:
+        logm.console.log(f"♻️ checkpointed state of {saved['name']} not restored (decorators changed)")
+
+
+def _decorators(strategy: Strategy) -> list[StrategyDecorator]:
+    """strategy decorators of the chain, outermost first, without the checkpointing one"""
+
+    decorators = []
+    while isinstance(strategy, StrategyDecorator):
+        if not isinstance(strategy, ServerCheckpointStrategyDecorator):
+            decorators.append(strategy)
+        strategy = strategy.base_strategy
+    return decorators
+
+
+def latest_server_checkpoint(basedir: Path, dirname: str = "checkpoints") -> Optional[Path]:
+    """the most recent periodic checkpoint under the reporting basedir (any session), None if there is none"""
+
+    checkpoints = [ path for path in Path(basedir).rglob(f"{dirname}/checkpoint_round_*.pt") if CHECKPOINT_PATTERN.search(path.name) ]
+
+    if not checkpoints:
+        return None
+
+    return max(checkpoints, key=lambda path: (path.stat().st_mtime, int(CHECKPOINT_PATTERN.search(path.name).group(1))))
+
+
+class ServerCheckpointWriter:
+    """Writes the server checkpoints in a background thread : serialization into a temporary file,
+    then atomic rename (a crash never leaves a truncated checkpoint).
+
+    At most one checkpoint is queued behind the one being written : a round whose checkpoint would
+    queue a second one waits for the oldest, which bounds the memory held by the snapshots.
+    """
+
+    MAX_PENDING: ClassVar[int] = 2
+
+    def __init__(self, directory: Path, keep_last: Optional[int] = 3):
+
+        self.directory = Path(directory)
+        self.keep_last = keep_last
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending:  list[Future] = []
+        self._lock = threading.Lock()
+
+    def submit(self, server_round: int, build: Callable[[], dict]) -> None:
+        """writes the checkpoint of the round, build giving its content (called in the background thread)"""
+
+        with self._lock:
+            if self._executor is None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pyb_server_checkpoint")
+
+            self._pending = [ future for future in self._pending if not future.done() ]
+            running = list(self._pending)
+
+        if len(running) >= self.MAX_PENDING:
+            logm.console.log(f"🔁 Round {server_round} 💾 waiting for the checkpoints backlog")
+            running[0].result()
+
+        with self._lock:
+            self._pending.append(self._executor.submit(self._write, server_round, build))
+
+    def _write(self, server_round: int, build: Callable[[], dict]) -> None:
+
+        path = self.directory / CHECKPOINT_FILENAME.format(server_round)
+        temporary_path = path.with_name(path.name + ".tmp")
+
+        try:
+            torch.save(build(), temporary_path)
+            os.replace(temporary_path, path)
+        except Exception as e:
+            # a failed checkpoint does not stop the Federated Learning
+            logm.console.log(f"🔁 Round {server_round} 💾 checkpoint failed: {e!r}")
+            temporary_path.unlink(missing_ok=True)
+            return
+
+        logm.console.log(f"🔁 Round {server_round} 💾 checkpoint saved to : {path}")
+
+        if self.keep_last is not None:
+            checkpoints = sorted(
+                ( path for path in self.directory.iterdir() if CHECKPOINT_PATTERN.search(path.name) ),
+                key=lambda path: int(CHECKPOINT_PATTERN.search(path.name).group(1)),
+            )
+            for old_path in checkpoints[:-self.keep_last]:
+                old_path.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        """waits for the checkpoints being written"""
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+            executor, self._executor = self._executor, None
+
+        for future in pending:
+            future.result()
+
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+class ServerCheckpointStrategyDecorator(StrategyDecorator):
+    """Outermost decorator of a server strategy : checkpoints every n rounds, and round numbering of a resumed session.
+
+    Flower numbers the rounds of a session from 1 : the rounds of a session resumed after round
+    round_offset are shifted by round_offset for the decorated strategy (fit configs, logged metrics,
+    checkpoints), the flower history keeping the session numbering.
+
+    A checkpoint holds the aggregated parameters (as the model state dict), the server optimizer and
+    strategy decorators states and the round number. The parameters are immutable bytes, and the states
+    are copied when the round ends : the serialization and the write run in the background.
+    """
+
+    def __init__(
+            self,
+            base_strategy: Strategy,
+            model: LightningModule,
+            every_n_rounds: Optional[int] = None,
+            directory: Optional[Path] = None,
+            keep_last: Optional[int] = 3,
+            round_offset: int = 0,
+            ):
+        super().__init__(base_strategy)
+
+        self.every_n_rounds = every_n_rounds
+        self.round_offset   = round_offset
+
+        # parameters are sent and aggregated in the order of the model state dict (see set_params)
+        self.state_names = list(model.state_dict().keys())
+
+        self.writer = ServerCheckpointWriter(directory, keep_last) if every_n_rounds is not None else None
+
+    def configure_fit(self, server_round: int, parameters: Parameters, client_manager: ClientManager) -> list[tuple[ClientProxy, FitIns]]:
+        return self.base_strategy.configure_fit(server_round + self.round_offset, parameters, client_manager)
+
+    def aggregate_fit(
+            self,
+            server_round: int,
+            results: list[tuple[ClientProxy, FitRes]],
+            failures: list[Union[tuple[ClientProxy, FitRes], BaseException]],
+            ) -> tuple[Optional[Parameters], dict[str, Scalar]]:
+
+        server_round += self.round_offset
+        parameters, metrics = self.base_strategy.aggregate_fit(server_round, results, failures)
+
+        if self.writer is not None and parameters is not None and server_round % self.every_n_rounds == 0:
+            self.checkpoint(server_round, parameters)
+
+        return parameters, metrics
+
+    def configure_evaluate(self, server_round: int, parameters: Parameters, client_manager: ClientManager) -> list[tuple[ClientProxy, EvaluateIns]]:
+        return self.base_strategy.configure_evaluate(server_round + self.round_offset, parameters, client_manager)
+
+    def aggregate_evaluate(
+            self,
+            server_round: int,
+            results: list[tuple[ClientProxy, EvaluateRes]],
+            failures: list[Union[tuple[ClientProxy, EvaluateRes], BaseException]],
+            ) -> tuple[Optional[float], dict[str, Scalar]]:
+        return self.base_strategy.aggregate_evaluate(server_round + self.round_offset, results, failures)
+
+    def evaluate(self, server_round: int, parameters: Parameters) -> Optional[tuple[float, dict[str, Scalar]]]:
+        return self.base_strategy.evaluate(server_round + self.round_offset, parameters)
+
+    def checkpoint(self, server_round: int, parameters: Parameters) -> None:
+
+        # the server optimizer buffers are updated in place by the next round
+        state = copy.deepcopy(strategy_state(self.base_strategy))
+        state["server_round"] = server_round
+
+        def build() -> dict:
+            ndarrays = parameters_to_ndarrays(parameters)
+            state["model"] = { name: torch.from_numpy(ndarray.copy()) for name, ndarray in zip(self.state_names, ndarrays, strict=True) }
+            return state
+
+        self.writer.submit(server_round, build)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+
+def resumed_round(strategy: Strategy) -> int:
+    """last round of the checkpoint a strategy was resumed from (0 for a new session)"""
+    return strategy.round_offset if isinstance(strategy, ServerCheckpointStrategyDecorator) else 0
+
+
+def close_server_checkpoints(strategy: Strategy) -> None:
+    """waits for the periodic checkpoints being written, once the Federated Learning ended"""
+    if isinstance(strategy, ServerCheckpointStrategyDecorator):
+        strategy.close()
@@ -0,0 +1,183 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, ClassVar, Optional
+
+import numpy as np
+from flwr.common import NDArrays, Scalar
+from flwr.server.history import History
+from flwr.server.strategy import Strategy
+from lightning.pytorch import LightningModule
+from pydantic import BaseModel, ConfigDict, Field
+from torch.utils.data import DataLoader
+
+import pybiscus.core.pybiscus_logger as logm
+from pybiscus.flower.servercheckpoint import resumed_round
+from pybiscus.interfaces.flower.strategydecorator import undecorated_strategy
+from pybiscus.ml.data.partition import subset_loader
+
+
+class ConfigServerEvaluation(BaseModel):
+    """Centralized (server side) evaluation of the global model.
+
+    Attributes
+    ----------
+    background:     evaluate round r in a background thread, on a snapshot of the aggregated parameters,
+                    while the fit of round r+1 is already dispatched ; results are logged (with step r)
+                    when available and added to the history at the end of the Federated Learning
+    every_n_rounds: evaluate only the rounds multiple of every_n_rounds (round 0 : initial parameters)
+    subset_size:    evaluate on a fixed random subset of the test set of that many samples ; whole test set if None
+    subset_seed:    seed of the random subset
+    """
+
+    PYBISCUS_CONFIG: ClassVar[str] = "server_evaluation"
+
+    background:     bool          = False
+    every_n_rounds: int           = Field( default=1, gt=0 )
+    subset_size:    Optional[int] = Field( default=None, gt=0 )
+    subset_seed:    int           = 0
+
+    model_config = ConfigDict(extra="forbid")
+
+
+def evaluation_loader(testloader: DataLoader, subset_size: Optional[int], subset_seed: int = 0) -> DataLoader:
+    """the test loader, or a loader over a fixed random subset of its dataset"""
+
+    num_samples = len(testloader.dataset)
+
+    if subset_size is None or subset_size >= num_samples:
+        return testloader
+
+    # sorted indices : same (sequential) access pattern as the whole test set
+    indices = np.sort(np.random.default_rng(subset_seed).choice(num_samples, size=subset_size, replace=False))
+    logm.console.log(f"🧪 server evaluation on a random subset of {subset_size}/{num_samples} test samples")
+
+    return subset_loader(testloader, indices, shuffle=False)
+
+
+# evaluation results reporting (logging) of a strategy : (server_round, loss, metrics)
+EvaluationReport = Callable[[int, float, dict[str, Scalar]], None]
+
+
+class ServerEvaluation:
+    """Schedules the centralized evaluation of a strategy : every n rounds, inline or in a background thread.
+
+    In background, at most one evaluation is queued behind the running one : a round whose
+    evaluation would queue a second one waits for the oldest, which bounds the parameters snapshots.
+    The test subset (subset_size, subset_seed) is applied by the evaluate function (see get_evaluate_fn).
+
+    The evaluate function loads the evaluated parameters into the model (saved at the end of the
+    Federated Learning) : drain loads the last round parameters when that round was not evaluated.
+    The results are reported to the strategy, then to the listeners (e.g. an exporter), from the
+    evaluation thread in background.
+    """
+
+    MAX_PENDING: ClassVar[int] = 2
+
+    def __init__(self, model: LightningModule, background: bool = False, every_n_rounds: int = 1, subset_size: Optional[int] = None, subset_seed: int = 0):
+
+        self.model          = model
+        self.background     = background
+        self.every_n_rounds = every_n_rounds
+
+        # parameters of the last round, when not evaluated
+        self._unevaluated: Optional[tuple[int, NDArrays]] = None
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending:  list[tuple[int, Future]] = []
+        self._lock = threading.Lock()
+
+        self._listeners: list[EvaluationReport] = []
+
+    def add_listener(self, listener: EvaluationReport) -> None:
+        """also reports the evaluation results to listener"""
+        self._listeners.append(listener)
+
+    def scheduled(self, server_round: int) -> bool:
+        return server_round % self.every_n_rounds == 0
+
+    def evaluate(
+            self,
+            server_round: int,
+            parameters_ndarrays: NDArrays,
+            evaluate_fn: Callable,
+            report: EvaluationReport,
+            ) -> Optional[tuple[float, dict[str, Scalar]]]:
+        """the evaluation result of the round ; None if not scheduled, or submitted in background"""
+
+        if not self.scheduled(server_round):
+            # the last parameters the strategy evaluates are not overwritten : no copy
+            self._unevaluated = (server_round, parameters_ndarrays)
+            return None
+
+        self._unevaluated = None
+
+        if not self.background:
+            return self._run(server_round, parameters_ndarrays, evaluate_fn, report)
+
+        # the strategy reuses its parameters buffers round after round
+        snapshot = [ np.array(ndarray, copy=True) for ndarray in parameters_ndarrays ]
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pyb_server_evaluation")
+
+            running = [ future for _, future in self._pending if not future.done() ]
+
+        if len(running) >= self.MAX_PENDING:
+            logm.console.log(f"🔁 Round {server_round} 🧪 waiting for the server evaluation backlog")
+            running[0].result()
+
+        with self._lock:
+            future = self._executor.submit(self._run, server_round, snapshot, evaluate_fn, report)
+            self._pending.append((server_round, future))
+
+        return None
+
+    def _run(self, server_round: int, parameters_ndarrays: NDArrays, evaluate_fn: Callable, report: EvaluationReport):
+
+        eval_res = evaluate_fn(server_round, parameters_ndarrays, {})
+
+        if eval_res is not None:
+            loss, metrics = eval_res
+            report(server_round, loss, metrics)
+            for listener in self._listeners:
+                listener(server_round, loss, metrics)
+
+        return eval_res
+
+    def drain(self, history: Optional[History] = None, round_offset: int = 0):
+        """waits for the background evaluations, adding their results to the history, and loads the last parameters into the model
+
+        The history keeps the session numbering : the rounds of a session resumed after round_offset are shifted back.
+        """
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+            executor, self._executor = self._executor, None
+
+        for server_round, future in pending:
+            eval_res = future.result()
+            if eval_res is not None and history is not None:
+                loss, metrics = eval_res
+                history.add_loss_centralized(server_round=server_round - round_offset, loss=loss)
+                history.add_metrics_centralized(server_round=server_round - round_offset, metrics=metrics)
+
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+        if self._unevaluated is not None:
+            from pybiscus.flower.utils_server import set_params
+
+            server_round, parameters_ndarrays = self._unevaluated
+            set_params(self.model, parameters_ndarrays)
+            self._unevaluated = None
+            logm.console.log(f"🧪 parameters of round {server_round} (not evaluated) loaded into the server model")
+
+
+def drain_server_evaluation(strategy: Strategy, history: Optional[History] = None):
+    """waits for the background server evaluations of a (decorated) strategy, once the Federated Learning ended"""
+
+    server_evaluation = getattr(undecorated_strategy(strategy), "server_evaluation", None)
+
+    if server_evaluation is not None:
+        server_evaluation.drain(history, resumed_round(strategy))
@@ -0,0 +1,291 @@
+import json
+import threading
+import time
+from pathlib import Path
+from typing import ClassVar, Optional, Union
+
+from flwr.common import (
+    DisconnectRes,
+    EvaluateIns,
+    EvaluateRes,
+    FitIns,
+    FitRes,
+    GetParametersIns,
+    GetParametersRes,
+    GetPropertiesIns,
+    GetPropertiesRes,
+    Parameters,
+    ReconnectIns,
+    Scalar,
+)
+from flwr.server.client_manager import ClientManager
+from flwr.server.client_proxy import ClientProxy
+from flwr.server.strategy import Strategy
+from pydantic import BaseModel, ConfigDict, Field
+
+import pybiscus.core.pybiscus_logger as logm
+from pybiscus.core.tracing import TRACE_METRIC
+from pybiscus.interfaces.flower.strategydecorator import StrategyDecorator
+
+
+class ConfigSessionTrace(BaseModel):
+    """Trace of the session (Chrome trace event format, viewable in Perfetto or chrome://tracing).
+
+    Attributes
+    ----------
+    filename:          trace file, in the reporting directory
+    client_spans:      ask the clients for the spans of their fit (data loading, forward, backward, optimizer step,
+                       get/set parameters), sent back in their fit metrics
+    max_client_events: highest number of spans sent back by a client for a fit
+    """
+
+    PYBISCUS_CONFIG: ClassVar[str] = "trace"
+
+    filename:          str  = "trace.json"
+    client_spans:      bool = True
+    max_client_events: int  = Field( default=20000, gt=0 )
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class SessionTrace:
+    """Complete ("X") events of the server and of the clients, merged into a single Chrome trace.
+
+    The server is the process 0 : the strategy calls on its thread 0, and the fit and evaluate of each
+    client (as seen by the server : transport, (de)serialization and client work) on one thread per client.
+    The spans sent back by a client are the ones of a process of their own. Timestamps are microseconds
+    since the epoch ; client spans out of the server view of their fit (clocks of other hosts) are shifted
+    into it.
+    """
+
+    SERVER_PID: ClassVar[int] = 0
+    STRATEGY_TID: ClassVar[int] = 0
+
+    def __init__(self):
+
+        self.origin  = time.time() - time.perf_counter()
+        self.events: list[dict] = [ self._metadata("process_name", self.SERVER_PID, 0, "server"),
+                                    self._metadata("thread_name", self.SERVER_PID, self.STRATEGY_TID, "strategy") ]
+        self.clients: dict[str, int] = {}
+        self._lock   = threading.Lock()
+
+    @staticmethod
+    def _metadata(kind: str, pid: int, tid: int, name: str) -> dict:
+        return { "name": kind, "ph": "M", "pid": pid, "tid": tid, "args": { "name": name } }
+
+    def now(self) -> float:
+        return time.perf_counter()
+
+    def timestamp(self, perf_time: float) -> int:
+        return round((self.origin + perf_time) * 1e6)
+
+    def client_index(self, cid: str) -> int:
+        """index of a client : its server thread, and its process"""
+
+        with self._lock:
+            index = self.clients.get(cid)
+            if index is None:
+                index = self.clients[cid] = len(self.clients) + 1
+                self.events.append(self._metadata("thread_name", self.SERVER_PID, index, f"client {cid}"))
+                self.events.append(self._metadata("process_name", index, 0, f"client {cid}"))
+            return index
+
+    def add(self, name: str, start: float, end: float, tid: int = 0, pid: int = 0, args: Optional[dict] = None) -> None:
+        """a span between two perf_counter values"""
+
+        event = { "name": name, "ph": "X", "ts": self.timestamp(start), "dur": round((end - start) * 1e6), "pid": pid, "tid": tid }
+        if args:
+            event["args"] = args
+
+        with self._lock:
+            self.events.append(event)
+
+    def add_client_spans(self, cid: str, payload: str, server_start: Optional[float] = None, server_end: Optional[float] = None) -> None:
+        """the spans of a client fit (see Tracer.payload), into its process"""
+
+        trace = json.loads(payload)
+        spans = trace["events"]
+        if not spans:
+            return
+
+        pid = self.client_index(cid)
+
+        first = min(ts for _, ts, _ in spans)
+        last  = max(ts + dur for _, ts, dur in spans)
+
+        shift = 0
+        if server_start is not None:
+            low, high = self.timestamp(server_start), self.timestamp(server_end)
+            if first < low or last > high:
+                # other clock : centered into the server view of the fit
+                shift = (low + high) // 2 - (first + last) // 2
+
+        with self._lock:
+            self.events.extend({ "name": name, "ph": "X", "ts": ts + shift, "dur": dur, "pid": pid, "tid": 0 } for name, ts, dur in spans)
+            if trace.get("dropped"):
+                self.events.append({ "name": "dropped spans", "ph": "i", "s": "p", "ts": last + shift, "pid": pid, "tid": 0,
+                                     "args": { "dropped": trace["dropped"] } })
+
+    def save(self, path: Path) -> None:
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._lock:
+            events = list(self.events)
+
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "w") as file:
+            json.dump({ "traceEvents": events, "displayTimeUnit": "ms" }, file)
+        tmp_path.replace(path)
+
+
+class _TracedClientProxy(ClientProxy):
+    """ClientProxy recording the fit and evaluate of a client, as seen by the server"""
+
+    def __init__(self, proxy: ClientProxy, session_trace: SessionTrace, server_round: int):
+        super().__init__(proxy.cid)
+        self.proxy         = proxy
+        self.session_trace = session_trace
+        self.server_round  = server_round
+
+    def _traced(self, name: str, call, ins, timeout: Optional[float], group_id: Optional[int]):
+
+        tid = self.session_trace.client_index(self.cid)
+        start = self.session_trace.now()
+        args = { "round": self.server_round }
+
+        try:
+            res = call(ins, timeout, group_id)
+            args["status"] = res.status.code.name
+            args["num_examples"] = res.num_examples
+            return res
+        except BaseException as err:
+            args["error"] = repr(err)
+            raise
+        finally:
+            end = self.session_trace.now()
+            self.session_trace.add(name, start, end, tid=tid, args=args)
+
+            if name == "fit" and "error" not in args:
+                payload = res.metrics.pop(TRACE_METRIC, None)
+                if payload is not None:
+                    self.session_trace.add_client_spans(self.cid, payload, start, end)
+
+    def fit(self, ins: FitIns, timeout: Optional[float], group_id: Optional[int]) -> FitRes:
+        return self._traced("fit", self.proxy.fit, ins, timeout, group_id)
+
+    def evaluate(self, ins: EvaluateIns, timeout: Optional[float], group_id: Optional[int]) -> EvaluateRes:
+        return self._traced("evaluate", self.proxy.evaluate, ins, timeout, group_id)
+
+    def get_properties(self, ins: GetPropertiesIns, timeout: Optional[float], group_id: Optional[int]) -> GetPropertiesRes:
+        return self.proxy.get_properties(ins, timeout, group_id)
+
+    def get_parameters(self, ins: GetParametersIns, timeout: Optional[float], group_id: Optional[int]) -> GetParametersRes:
+        return self.proxy.get_parameters(ins, timeout, group_id)
+
+    def reconnect(self, ins: ReconnectIns, timeout: Optional[float], group_id: Optional[int]) -> DisconnectRes:
+        return self.proxy.reconnect(ins, timeout, group_id)
+
+
+def _untraced(results: list) -> list:
+    """results (and failures) with their original proxies, the client spans left in the metrics being dropped"""
+
+    untraced = []
+    for result in results:
+        if isinstance(result, tuple):
+            proxy, res = result
+            # e.g. late results carried by a round deadline : not seen by a traced proxy
+            res.metrics.pop(TRACE_METRIC, None)
+            result = (proxy.proxy if isinstance(proxy, _TracedClientProxy) else proxy, res)
+        untraced.append(result)
+
+    return untraced
+
+
+class TracingStrategyDecorator(StrategyDecorator):
+    """Records the spans of the rounds into a SessionTrace, saved by close.
+
+    Server spans : configure_fit, the fit of each client, aggregate_fit, evaluate (centralized),
+    configure_evaluate, the evaluate of each client, aggregate_evaluate, and the round containing them.
+    With client_spans, the clients are asked (fit_config["trace"]) for the spans of their fit.
+    """
+
+    def __init__(self, base_strategy: Strategy, path: Path, client_spans: bool = True, max_client_events: int = 20000):
+        super().__init__(base_strategy)
+
+        self.path              = path
+        self.client_spans      = client_spans
+        self.max_client_events = max_client_events
+        self.session_trace     = SessionTrace()
+
+        # current round : its start, and the end of its last span
+        self._round: Optional[tuple[int, float]] = None
+        self._round_end: Optional[float] = None
+        self._closed = False
+
+    def _span(self, name: str, server_round: int, call, *args):
+
+        start = self.session_trace.now()
+        try:
+            return call(*args)
+        finally:
+            self._round_end = self.session_trace.now()
+            self.session_trace.add(name, start, self._round_end, args={ "round": server_round })
+
+    def _end_round(self) -> None:
+        if self._round is not None:
+            server_round, start = self._round
+            self.session_trace.add(f"round {server_round}", start, self._round_end, args={ "round": server_round })
+            self._round = None
+
+    def configure_fit(self, server_round: int, parameters: Parameters, client_manager: ClientManager
+                    ) -> list[tuple[ClientProxy, FitIns]]:
+
+        self._end_round()
+        self._round = (server_round, self.session_trace.now())
+
+        instructions = self._span("configure_fit", server_round, self.base_strategy.configure_fit, server_round, parameters, client_manager)
+
+        if self.client_spans:
+            instructions = [ (proxy, FitIns(ins.parameters, { **ins.config, TRACE_METRIC: self.max_client_events })) for proxy, ins in instructions ]
+
+        return [ (_TracedClientProxy(proxy, self.session_trace, server_round), ins) for proxy, ins in instructions ]
+
+    def aggregate_fit(self, server_round: int,
+                        results: list[tuple[ClientProxy, FitRes]], failures: list[Union[tuple[ClientProxy, FitRes], BaseException]],
+                    ) -> tuple[Optional[Parameters], dict[str, Scalar]]:
+        return self._span("aggregate_fit", server_round, self.base_strategy.aggregate_fit, server_round, _untraced(results), _untraced(failures))
+
+    def configure_evaluate(self, server_round: int, parameters: Parameters, client_manager: ClientManager
+                    ) -> list[tuple[ClientProxy, EvaluateIns]]:
+
+        instructions = self._span("configure_evaluate", server_round, self.base_strategy.configure_evaluate, server_round, parameters, client_manager)
+        return [ (_TracedClientProxy(proxy, self.session_trace, server_round), ins) for proxy, ins in instructions ]
+
+    def aggregate_evaluate(self, server_round: int,
+                        results: list[tuple[ClientProxy, EvaluateRes]], failures: list[Union[tuple[ClientProxy, EvaluateRes], BaseException]],
+                    ) -> tuple[Optional[float], dict[str, Scalar]]:
+        return self._span("aggregate_evaluate", server_round, self.base_strategy.aggregate_evaluate, server_round, _untraced(results), _untraced(failures))
+
+    def evaluate(self, server_round: int, parameters: Parameters) -> Optional[tuple[float, dict[str, Scalar]]]:
+        return self._span("evaluate", server_round, self.base_strategy.evaluate, server_round, parameters)
+
+    def close(self) -> None:
+        """saves the trace, once the Federated Learning ended"""
+
+        if self._closed:
+            return
+        self._closed = True
+
+        self._end_round()
+        self.session_trace.save(self.path)
+        logm.console.log(f"🔬 session trace ({len(self.session_trace.events)} events) 💾 saved to : {self.path}")
+
+
+def close_session_trace(strategy: Strategy) -> None:
+    """saves the session trace, once the Federated Learning ended"""
+
+    while isinstance(strategy, StrategyDecorator):
+        if isinstance(strategy, TracingStrategyDecorator):
+            strategy.close()
+        strategy = strategy.base_strategy
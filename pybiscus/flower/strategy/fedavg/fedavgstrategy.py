@@ -4,22 +4,30 @@ from typing import Callable, Literal, Optional, Union, ClassVar
 
 import flwr as fl
 from flwr.common import (
+    EvaluateIns,
     EvaluateRes,
+    FitIns,
     FitRes,
     MetricsAggregationFn,
     Parameters,
     Scalar,
     ndarrays_to_parameters,
-    parameters_to_ndarrays as flw_parameters_to_ndarrays,
+    parameters_to_ndarrays,
 )
 from flwr.common.logger import log
+from flwr.server.client_manager import ClientManager
 from flwr.server.client_proxy import ClientProxy
-from flwr.server.strategy.aggregate import aggregate, weighted_loss_avg
+from flwr.server.strategy.aggregate import weighted_loss_avg
 from lightning.fabric import Fabric
 from lightning.pytorch import LightningModule
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 import pybiscus.core.pybiscus_logger as logm
+from pybiscus.flower.flatparameters import FlatParametersLayout
+from pybiscus.flower.rounddeadline import ConfigRoundDeadline, RoundDeadline
+from pybiscus.flower.serverevaluation import ConfigServerEvaluation, ServerEvaluation
+from pybiscus.flower.workloadscheduler import ConfigWorkloadScheduler, WorkloadScheduler
+from pybiscus.flower.flowerfitresultsaggregator.flowerfitresultsaggregatorusingstreamingweightedaverage.flowerfitresultsaggregatorusingstreamingweightedaverage import pyb_aggregate_streaming
 from pybiscus.interfaces.flower.fabricstrategyfactory import FabricStrategyFactory
 from pybiscus.flower.utils_server import evaluate_config, fit_config, get_evaluate_fn, weighted_average
 
@@ -41,6 +49,10 @@ class ConfigFabricFedAvgStrategyData(BaseModel):
     # min_available_clients: int = 2,
 
     min_fit_clients: int = 2
+    round_deadline:  Optional[ConfigRoundDeadline] = None
+    server_evaluation: Optional[ConfigServerEvaluation] = None
+    workload_scheduler: Optional[ConfigWorkloadScheduler] = None
+    proximal_mu:     Optional[float] = Field(default=None, ge=0)
 
     model_config = ConfigDict(extra="forbid")
 
@@ -86,6 +98,10 @@ class FabricFedAvgStrategy(fl.server.strategy.FedAvg):
         min_evaluate_clients: int = 2,
         min_available_clients: int = 2,
         initial_parameters: Optional[Parameters] = None,
+        round_deadline: Optional[dict] = None,
+        server_evaluation: Optional[dict] = None,
+        workload_scheduler: Optional[dict] = None,
+        proximal_mu: Optional[float] = None,
     ) -> None:
         super().__init__(
             evaluate_fn=evaluate_fn,
@@ -104,6 +120,22 @@ class FabricFedAvgStrategy(fl.server.strategy.FedAvg):
         self.model = model
         self.fabric = fabric
 
+        # flat parameters layout computed once, and buffer reused round after round
+        self.flat_layout = FlatParametersLayout.from_module(model)
+        self.flat_parameters = None
+
+        # optional cut of the fit phase at a wall-clock deadline
+        self.round_deadline = RoundDeadline(**round_deadline) if round_deadline is not None else None
+
+        # centralized evaluation every n rounds, optionally in background
+        self.server_evaluation = ServerEvaluation(model, **(server_evaluation or {}))
+
+        # optional per-client workload, from the measured client throughputs
+        self.workload_scheduler = WorkloadScheduler(**workload_scheduler) if workload_scheduler is not None else None
+
+        # FedProx proximal term weight, sent to the clients in their fit config
+        self.proximal_mu = proximal_mu
+
     def evaluate(
         self, server_round: int, parameters: Parameters
     ) -> Optional[tuple[float, dict[str, Scalar]]]:
@@ -111,13 +143,16 @@ class FabricFedAvgStrategy(fl.server.strategy.FedAvg):
         if self.evaluate_fn is None:
             # No evaluation function provided
             return None
-        parameters_ndarrays = flw_parameters_to_ndarrays(parameters)
-        eval_res = self.evaluate_fn(server_round, parameters_ndarrays, {})
-        if eval_res is None:
-            return None
-        
-        loss, metrics = eval_res
-
+        if self.flat_layout.flat_dtype is None:
+            # mixed with integer layers : the layers are not all held exactly by a floating flat buffer
+            parameters_ndarrays = parameters_to_ndarrays(parameters)
+        else:
+            self.flat_parameters = self.flat_layout.parameters_to_flat(parameters, out=self.flat_parameters, dtype=self.flat_layout.flat_dtype)
+            parameters_ndarrays = self.flat_layout.views(self.flat_parameters)
+        return self.server_evaluation.evaluate(server_round, parameters_ndarrays, self.evaluate_fn, self.report_evaluation)
+
+    def report_evaluation(self, server_round: int, loss: float, metrics: dict[str, Scalar]) -> None:
+        """Log the centralized evaluation results of a round."""
         emo = defaultdict(str)
         emo["loss"]     = "📉"
         emo["accuracy"] = "🎯"
@@ -129,7 +164,18 @@ class FabricFedAvgStrategy(fl.server.strategy.FedAvg):
 
         logm.console.log(f"🔁 Round {server_round} 🧪 Test {logmsg}")
 
-        return loss, metrics
+    def configure_fit(
+        self, server_round: int, parameters: Parameters, client_manager: ClientManager
+    ) -> list[tuple[ClientProxy, FitIns]]:
+        """Configure the next round of training, cut at the round deadline if any."""
+        instructions = super().configure_fit(server_round, parameters, client_manager)
+        if self.proximal_mu is not None:
+            instructions = [(proxy, FitIns(ins.parameters, {**ins.config, "proximal_mu": self.proximal_mu})) for proxy, ins in instructions]
+        if self.workload_scheduler is not None:
+            instructions = self.workload_scheduler.configure(server_round, instructions)
+        if self.round_deadline is not None:
+            instructions = self.round_deadline.configure(server_round, instructions)
+        return instructions
 
     def aggregate_fit(
         self,
@@ -138,22 +184,32 @@ class FabricFedAvgStrategy(fl.server.strategy.FedAvg):
         failures: list[Union[tuple[ClientProxy, FitRes], BaseException]],
     ) -> tuple[Optional[Parameters], dict[str, Scalar]]:
         """Aggregate fit results using weighted average."""
+        if self.round_deadline is not None:
+            # results in time (and carried late ones), missed deadlines are not failures
+            results, failures, completion_times = self.round_deadline.collect(server_round, results, failures)
+            for cid, completion_time in completion_times.items():
+                self.fabric.log(f"fit_time_{cid}", completion_time, step=server_round)
+        if self.workload_scheduler is not None:
+            self.workload_scheduler.update(server_round, results)
+            for key, value in self.workload_scheduler.metrics().items():
+                self.fabric.log(key, value, step=server_round)
         if not results:
             return None, {}
         # Do not aggregate if there are failures and failures are not accepted
         if not self.accept_failures and failures:
             return None, {}
 
-        # Convert results
-        tuples_ndarrays_weight = [ (flw_parameters_to_ndarrays(fit_res.parameters), fit_res.num_examples) 
-            for _, fit_res in results ]
-
         logm.console.log(
             f"🔁 Round:{server_round} WeightedAverage\n" +
             "\n".join(f"🆔{client.cid} ⚖️{fit_res.num_examples}" for client, fit_res in results)
         )
 
-        parameters_aggregated = ndarrays_to_parameters(aggregate(tuples_ndarrays_weight))
+        # Convert and fold results one client at a time
+        ndarrays_aggregated = pyb_aggregate_streaming(results, release_results=True, layout=self.flat_layout, aggregator="FedAvg")
+        if ndarrays_aggregated is None:
+            log(WARNING, "Round %s: no example in the fit results, round not aggregated", server_round)
+            return None, {}
+        parameters_aggregated = ndarrays_to_parameters(ndarrays_aggregated)
 
         # Aggregate custom metrics if aggregation fn was provided
         metrics_aggregated = {}
@@ -171,6 +227,15 @@ class FabricFedAvgStrategy(fl.server.strategy.FedAvg):
 
         return parameters_aggregated, metrics_aggregated
 
+    def configure_evaluate(
+        self, server_round: int, parameters: Parameters, client_manager: ClientManager
+    ) -> list[tuple[ClientProxy, EvaluateIns]]:
+        """Configure the next round of evaluation, without the clients still training past the round deadline."""
+        instructions = super().configure_evaluate(server_round, parameters, client_manager)
+        if self.round_deadline is not None:
+            instructions = self.round_deadline.configure_evaluate(server_round, instructions)
+        return instructions
+
     def aggregate_evaluate(
         self,
         server_round: int,
@@ -225,7 +290,7 @@ class FabricFedAvgStrategyFactory(FabricStrategyFactory):
             evaluate_metrics_aggregation_fn=weighted_average,
             model=self.model,
             fabric=self.fabric,
-            evaluate_fn=get_evaluate_fn(testset=self.testset, model=self.model, fabric=self.fabric),
+            evaluate_fn=get_evaluate_fn(testset=self.testset, model=self.model, fabric=self.fabric, server_evaluation=self.config.server_evaluation),
             on_fit_config_fn=fit_config,
             on_evaluate_config_fn=evaluate_config,
             initial_parameters=self.initial_parameters,
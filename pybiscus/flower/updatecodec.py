@@ -0,0 +1,208 @@
+from typing import ClassVar, Literal, Optional
+
+import numpy as np
+from flwr.common import FitRes, NDArrays, bytes_to_ndarray as flw_bytes_to_ndarray
+from flwr.server.client_proxy import ClientProxy
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from pybiscus.core.pybiscusexception import PybiscusValueException
+
+# first array of an encoded update : [magic, version, delta, quantization bits, topk fraction]
+CODEC_MAGIC   = 7_079_620.0
+CODEC_VERSION = 1.0
+
+_QUANTIZATION_BITS = { "none": 32, "fp16": 16, "int8": 8 }
+_BITS_QUANTIZATION = { bits: quantization for quantization, bits in _QUANTIZATION_BITS.items() }
+
+_FP16_MAX = float(np.finfo(np.float16).max)
+
+
+class ConfigUpdateCodec(BaseModel):
+    """A Pydantic Model to validate the client update codec configuration.
+
+    Attributes
+    ----------
+    delta:          send the difference with the received global model instead of the weights
+    quantization:   "none", "fp16" or "int8" (per-tensor scale) encoding of the values
+    topk_fraction:  if set, only the largest (in magnitude) fraction of each delta tensor is sent
+    error_feedback: the part of the delta not sent (sparsification and quantization errors)
+                    is kept by the client and added to the next round delta
+    """
+
+    PYBISCUS_CONFIG: ClassVar[str] = "update_codec"
+
+    delta:          bool                             = False
+    quantization:   Literal["none", "fp16", "int8"]  = "none"
+    topk_fraction:  Optional[float]                  = Field( default=None, gt=0, le=1 )
+    error_feedback: bool                             = True
+
+    model_config = ConfigDict(extra="forbid")
+
+    @model_validator(mode="after")
+    def check_topk_on_delta(self):
+        if self.topk_fraction is not None and not self.delta:
+            raise ValueError("topk_fraction requires delta encoding")
+        return self
+
+
+def ndarrays_nbytes(ndarrays: NDArrays) -> int:
+    return int(sum(ndarray.nbytes for ndarray in ndarrays))
+
+
+def _quantize(values: np.ndarray, quantization: str) -> NDArrays:
+
+    if quantization == "fp16":
+        return [ np.clip(values, -_FP16_MAX, _FP16_MAX).astype(np.float16) ]
+
+    if quantization == "int8":
+        amax  = float(np.max(np.abs(values))) if values.size > 0 else 0.0
+        scale = amax / 127.0 if amax > 0.0 else 1.0
+        return [ np.clip(np.rint(values / scale), -127, 127).astype(np.int8), np.array(scale, dtype=np.float32) ]
+
+    return [ values.astype(np.float32, copy=False) ]
+
+
+def _dequantize(arrays: NDArrays, quantization: str) -> np.ndarray:
+
+    if quantization == "int8":
+        quantized, scale = arrays
+        return quantized.astype(np.float32) * scale.astype(np.float32)
+
+    return arrays[0].astype(np.float32)
+
+
+def _quantization_arity(quantization: str) -> int:
+    return 2 if quantization == "int8" else 1
+
+
+class UpdateEncoder:
+    """Client side encoding of the fit result (the error feedback residuals are kept between rounds)."""
+
+    def __init__(self, delta: bool = False, quantization: str = "none", topk_fraction: Optional[float] = None, error_feedback: bool = True):
+
+        self.delta          = delta
+        self.quantization   = quantization
+        self.topk_fraction  = topk_fraction
+        self.error_feedback = error_feedback and delta
+
+        self.residuals: dict[int, np.ndarray] = {}
+
+        self.last_raw_bytes     = 0
+        self.last_encoded_bytes = 0
+
+    def header(self) -> np.ndarray:
+        return np.array([
+            CODEC_MAGIC,
+            CODEC_VERSION,
+            1.0 if self.delta else 0.0,
+            float(_QUANTIZATION_BITS[self.quantization]),
+            self.topk_fraction if self.topk_fraction is not None else 0.0,
+        ], dtype=np.float64)
+
+    def encode(self, ndarrays: NDArrays, reference: Optional[NDArrays] = None) -> NDArrays:
+        """encode the weights (or, with delta, their difference with the reference, i.e. the received global model)"""
+
+        if self.delta and (reference is None or len(reference) != len(ndarrays)):
+            raise PybiscusValueException("delta encoding requires the received global parameters as reference")
+
+        encoded = [ self.header() ]
+
+        for index, layer in enumerate(ndarrays):
+
+            layer = np.asarray(layer)
+
+            # integer layers (e.g. batchnorm counters) are sent as they are
+            if not np.issubdtype(layer.dtype, np.floating):
+                encoded.append(layer)
+                continue
+
+            values = layer.reshape(-1).astype(np.float32)
+
+            if self.delta:
+                values = values - np.asarray(reference[index]).reshape(-1).astype(np.float32)
+
+            if self.error_feedback and index in self.residuals:
+                values += self.residuals[index]
+
+            if self.topk_fraction is not None:
+                k       = max(1, int(np.ceil(self.topk_fraction * values.size)))
+                indices = np.argpartition(np.abs(values), values.size - k)[values.size - k:]
+                indices = np.sort(indices).astype(np.int32 if values.size < 2**31 else np.int64)
+                arrays  = _quantize(values[indices], self.quantization)
+                sent    = np.zeros_like(values)
+                sent[indices] = _dequantize(arrays, self.quantization)
+                encoded.append(indices)
+            else:
+                arrays  = _quantize(values, self.quantization)
+                sent    = _dequantize(arrays, self.quantization)
+
+            encoded.extend(arrays)
+
+            if self.error_feedback:
+                self.residuals[index] = values - sent
+
+        self.last_raw_bytes     = ndarrays_nbytes(ndarrays)
+        self.last_encoded_bytes = ndarrays_nbytes(encoded)
+
+        return encoded
+
+
+def is_encoded_update(first_ndarray: np.ndarray) -> bool:
+    return first_ndarray.shape == (5,) and first_ndarray.dtype == np.float64 and first_ndarray[0] == CODEC_MAGIC
+
+
+def check_not_encoded(results: list[tuple[ClientProxy, FitRes]], aggregator: str) -> None:
+    """raises if a client sent an encoded update : an aggregator without codec would average its payload"""
+
+    for client, fit_res in results:
+        tensors = fit_res.parameters.tensors
+        if tensors and is_encoded_update(flw_bytes_to_ndarray(tensors[0])):
+            raise PybiscusValueException(
+                f"{aggregator}: client {client.cid} sent an encoded update (update_codec), which this aggregator can not decode ; "
+                "use the compressedweightedaverage flower_fit_results_aggregator (e.g. of the fedavgextended3 strategy), "
+                "or a server optimizer one (fedadam, fedyogi, fedavgm)")
+
+
+def decode_update(encoded: NDArrays, reference: NDArrays) -> NDArrays:
+    """server side decoding of an encoded update, reference being the global parameters sent to the client"""
+
+    header = encoded[0]
+
+    if not is_encoded_update(header):
+        raise PybiscusValueException("update is not encoded (missing codec header)")
+
+    delta         = bool(header[2])
+    quantization  = _BITS_QUANTIZATION[int(header[3])]
+    topk_fraction = float(header[4]) if header[4] > 0.0 else None
+    arity         = _quantization_arity(quantization)
+
+    decoded  = []
+    position = 1
+
+    for layer in reference:
+
+        if not np.issubdtype(layer.dtype, np.floating):
+            decoded.append(encoded[position])
+            position += 1
+            continue
+
+        if topk_fraction is not None:
+            indices = encoded[position]
+            values  = np.zeros(layer.size, dtype=np.float32)
+            values[indices] = _dequantize(encoded[position + 1:position + 1 + arity], quantization)
+            position += 1 + arity
+        else:
+            values = _dequantize(encoded[position:position + arity], quantization)
+            position += arity
+
+        values = values.reshape(layer.shape)
+
+        if delta:
+            values = layer.astype(np.float32) + values
+
+        decoded.append(values.astype(layer.dtype, copy=False))
+
+    if position != len(encoded):
+        raise PybiscusValueException(f"encoded update has {len(encoded)} arrays, {position} expected")
+
+    return decoded
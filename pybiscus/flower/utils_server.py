@@ -1,4 +1,3 @@
-from collections import OrderedDict
 from typing import Callable, Optional
 
 import flwr as fl
@@ -9,12 +8,14 @@ from lightning.fabric import Fabric
 from lightning.pytorch import LightningModule
 
 import pybiscus.core.pybiscus_logger as logm
+from pybiscus.flower.serverevaluation import ConfigServerEvaluation, evaluation_loader
 from pybiscus.ml.loops_fabric import test_loop
 
 def set_params(model: torch.nn.ModuleList, params: list[np.ndarray]):
-    params_dict = zip(model.state_dict().keys(), params)
-    state_dict = OrderedDict({k: torch.from_numpy(np.copy(v)) for k, v in params_dict})
-    model.load_state_dict(state_dict, strict=True)
+    """Copy the ndarrays in place into the model storage (no intermediate state_dict nor copies)."""
+    with torch.no_grad():
+        for tensor, value in zip(model.state_dict().values(), params, strict=True):
+            tensor.copy_(torch.as_tensor(value).view(tensor.shape))
 
 
 def fit_config(server_round: int):
@@ -39,13 +40,21 @@ def get_evaluate_fn(
     testset: torch.utils.data.DataLoader,
     model: LightningModule,
     fabric: Fabric,
+    server_evaluation: Optional[ConfigServerEvaluation] = None,
 ) -> Callable[[fl.common.NDArrays], Optional[tuple[float, float]]]:
+
+    if server_evaluation is not None:
+        testset = evaluation_loader(testset, server_evaluation.subset_size, server_evaluation.subset_seed)
+
+    # no progress bar for the background evaluations, running along the fit rounds
+    progress = server_evaluation is None or not server_evaluation.background
+
     def evaluate(
         server_round: int, parameters: fl.common.NDArrays, config: dict[str, Scalar]
     ) -> Optional[tuple[float, float]]:
         set_params(model, parameters)
 
-        results = test_loop(fabric=fabric, net=model, testloader=testset)
+        results = test_loop(fabric=fabric, net=model, testloader=testset, progress=progress)
         return results["loss"], results
 
     return evaluate
@@ -0,0 +1,192 @@
+import math
+from typing import ClassVar, Literal, Optional
+
+import numpy as np
+from flwr.common import FitIns, FitRes
+from flwr.server.client_proxy import ClientProxy
+from pydantic import BaseModel, ConfigDict, Field
+
+import pybiscus.core.pybiscus_logger as logm
+
+
+class ConfigWorkloadScheduler(BaseModel):
+    """Per-client workload of the fit rounds, from the measured throughput of the clients.
+
+    Attributes
+    ----------
+    assign:           "steps" (fit_config["max_steps"]) or "epochs" (fit_config["local_epochs"]) given to each client
+    target_time:      training time (seconds) aimed at for every client ;
+                      if None, the median time of the round clients for the default workload (local_epochs)
+    min_steps:        lowest number of steps given to a client
+    max_steps:        highest number of steps given to a client ; no limit if None
+    max_local_epochs: highest number of epochs given to a client
+    smoothing:        weight of the last measure in the throughput moving average of a client
+    """
+
+    PYBISCUS_CONFIG: ClassVar[str] = "workload_scheduler"
+
+    assign:           Literal["steps", "epochs"] = "steps"
+    target_time:      Optional[float] = Field( default=None, gt=0 )
+    min_steps:        int             = Field( default=1,    gt=0 )
+    max_steps:        Optional[int]   = Field( default=None, gt=0 )
+    max_local_epochs: int             = Field( default=10,   gt=0 )
+    smoothing:        float           = Field( default=0.5,  gt=0, le=1 )
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class ClientCapacityTable:
+    """Compact per-client statistics, one row per client (cid), kept across rounds.
+
+    Columns : throughput (samples/s, moving average), samples per step, steps per epoch,
+    number of measures and round of the last measure.
+    """
+
+    def __init__(self, capacity: int = 16):
+        self.rows: dict[str, int] = {}
+        self.throughput       = np.zeros(capacity, dtype=np.float64)
+        self.samples_per_step = np.zeros(capacity, dtype=np.float64)
+        self.epoch_steps      = np.zeros(capacity, dtype=np.int64)
+        self.measures         = np.zeros(capacity, dtype=np.int32)
+        self.last_round       = np.zeros(capacity, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def row(self, cid: str) -> int:
+        if cid not in self.rows:
+            if len(self.rows) == len(self.throughput):
+                # doubling of all the columns
+                for name in ("throughput", "samples_per_step", "epoch_steps", "measures", "last_round"):
+                    column = getattr(self, name)
+                    setattr(self, name, np.concatenate([column, np.zeros_like(column)]))
+            self.rows[cid] = len(self.rows)
+        return self.rows[cid]
+
+    def measured(self, cid: str) -> bool:
+        return cid in self.rows and self.measures[self.rows[cid]] > 0
+
+    def update(self, cid: str, server_round: int, throughput: float, samples_per_step: float, epoch_steps: int, smoothing: float):
+
+        row = self.row(cid)
+
+        if self.measures[row] == 0:
+            self.throughput[row] = throughput
+        else:
+            self.throughput[row] += smoothing * (throughput - self.throughput[row])
+
+        self.samples_per_step[row] = samples_per_step
+        self.epoch_steps[row]      = epoch_steps
+        self.measures[row]        += 1
+        self.last_round[row]       = server_round
+
+
+class WorkloadScheduler:
+    """Gives each client of a fit round its own workload, so that all of them finish at about the same time.
+
+    The clients report their measured throughput in their fit metrics (throughput, train_samples,
+    train_steps, epoch_steps) ; the workload of a client is the number of steps (or epochs) it trains in the target time.
+    Clients not measured yet get the default workload of the fit config.
+    """
+
+    def __init__(
+            self,
+            assign: str = "steps",
+            target_time: Optional[float] = None,
+            min_steps: int = 1,
+            max_steps: Optional[int] = None,
+            max_local_epochs: int = 10,
+            smoothing: float = 0.5,
+            ):
+
+        self.assign           = assign
+        self.target_time      = target_time
+        self.min_steps        = min_steps
+        self.max_steps        = max_steps
+        self.max_local_epochs = max_local_epochs
+        self.smoothing        = smoothing
+
+        self.table = ClientCapacityTable()
+        self.workloads: dict[str, int] = {}
+
+    def _target(self, rows: list[int], local_epochs: int) -> float:
+
+        if self.target_time is not None:
+            return self.target_time
+
+        # median time of the default workload
+        rows = np.asarray(rows)
+        table = self.table
+        return float(np.median(table.epoch_steps[rows] * local_epochs * table.samples_per_step[rows] / table.throughput[rows]))
+
+    def configure(self, server_round: int, instructions: list[tuple[ClientProxy, FitIns]]) -> list[tuple[ClientProxy, FitIns]]:
+        """the round instructions, with the workload of each measured client in its own fit config"""
+
+        rows = [ self.table.rows[proxy.cid] for proxy, _ in instructions if self.table.measured(proxy.cid) ]
+        self.workloads = {}
+
+        if not rows:
+            return instructions
+
+        # same default fit config for all the clients of the round
+        target    = self._target(rows, int(instructions[0][1].config.get("local_epochs", 1)))
+        scheduled = []
+
+        for proxy, ins in instructions:
+
+            if not self.table.measured(proxy.cid):
+                scheduled.append((proxy, ins))
+                continue
+
+            config = dict(ins.config)
+            row    = self.table.rows[proxy.cid]
+
+            # steps trained in the target time
+            steps       = self.table.throughput[row] * target / self.table.samples_per_step[row]
+            epoch_steps = max(int(self.table.epoch_steps[row]), 1)
+
+            if self.assign == "steps":
+                steps = max(self.min_steps, round(steps))
+                if self.max_steps is not None:
+                    steps = min(steps, self.max_steps)
+                config["max_steps"]    = steps
+                config["local_epochs"] = math.ceil(steps / epoch_steps)
+                self.workloads[proxy.cid] = steps
+            else:
+                epochs = min(self.max_local_epochs, max(1, round(steps / epoch_steps)))
+                config["local_epochs"] = epochs
+                self.workloads[proxy.cid] = epochs
+
+            scheduled.append((proxy, FitIns(ins.parameters, config)))
+
+        logm.console.log(
+            f"🔁 Round:{server_round} ⚖️ workloads ({self.assign}, {target:.2f}s): " +
+            ", ".join(f"🆔{cid} {workload}" for cid, workload in self.workloads.items())
+        )
+
+        return scheduled
+
+    def update(self, server_round: int, results: list[tuple[ClientProxy, FitRes]]):
+        """measured throughputs of the round results"""
+
+        for proxy, fit_res in results:
+            metrics = fit_res.metrics
+
+            if metrics.get("throughput", 0) <= 0 or metrics.get("train_steps", 0) <= 0 or "epoch_steps" not in metrics:
+                continue
+
+            self.table.update(
+                proxy.cid,
+                server_round,
+                throughput       = float(metrics["throughput"]),
+                samples_per_step = float(metrics["train_samples"]) / float(metrics["train_steps"]),
+                epoch_steps      = int(metrics["epoch_steps"]),
+                smoothing        = self.smoothing,
+            )
+
+    def metrics(self) -> dict[str, float]:
+        """throughput (moving average) of the measured clients and workload of the round clients"""
+
+        metrics = { f"throughput_{cid}": float(self.table.throughput[row]) for cid, row in self.table.rows.items() if self.table.measures[row] > 0 }
+        metrics.update({ f"workload_{cid}": float(workload) for cid, workload in self.workloads.items() })
+        return metrics
@@ -4,7 +4,8 @@ from typing_extensions import Annotated
 import torch
 from pydantic import BaseModel, ConfigDict
 
-from pybiscus.flower_config.config_computecontext import ConfigClientComputeContext
+from pybiscus.flower.updatecodec import ConfigUpdateCodec
+from pybiscus.flower_config.config_clientcomputecontext import ConfigClientComputeContext
 from pybiscus.plugin.registries import ClientConfig, ModelConfig, DataConfig
 
 torch.backends.cudnn.enabled = True
@@ -60,6 +61,8 @@ class ConfigFlowerClient(BaseModel):
     one_tera                = grpc config ( 1 Tb = 1_073_741_824 b)
     grpc_max_message_length = grpc config ( 1 Tb = 1_073_741_824 b)
     alternate_client_class  = use an alternate subclass of FlowerClient 
+    update_codec            = optional encoding of the fit result (delta, fp16/int8 quantization, top-k),
+                              decoded on the server by the compressedweightedaverage aggregator
     """
 
     PYBISCUS_CONFIG: ClassVar[str] = "flower_client"
@@ -70,6 +73,7 @@ class ConfigFlowerClient(BaseModel):
     # grpc_max_message_length : Optional[int]              = None
 
     alternate_client_class:   Optional[ClientConfig()]   = None # pyright: ignore[reportInvalidTypeForm]
+    update_codec:             Optional[ConfigUpdateCodec] = None
 
     model_config = ConfigDict(extra="forbid")
 
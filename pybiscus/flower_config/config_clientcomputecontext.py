@@ -0,0 +1,31 @@
+from typing import ClassVar, Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+from pybiscus.flower_config.config_hardware import ConfigHardware
+
+class ConfigClientComputeContext(BaseModel):
+    """A Pydantic Model to validate the client compute context given by the user.
+
+    Attributes
+    ----------
+    hardware:                the Fabric accelerator and devices
+    precision:               Fabric precision ("32-true", "bf16-mixed", "16-mixed", "64-true")
+    accumulate_grad_batches: number of batches whose gradients are accumulated before an optimizer step
+    compile:                 compile the LightningModule forward with torch.compile
+    compile_mode:            torch.compile mode (None being torch default)
+    num_threads:             torch intra-op threads (torch.set_num_threads), torch default if None
+    num_interop_threads:     torch inter-op threads (torch.set_num_interop_threads), torch default if None
+    """
+
+    PYBISCUS_CONFIG: ClassVar[str] = "client_compute_context"
+
+    hardware: ConfigHardware
+
+    precision:               Literal["32-true", "bf16-mixed", "16-mixed", "64-true"]        = "32-true"
+    accumulate_grad_batches: int                                                            = Field( default=1, gt=0 )
+    compile:                 bool                                                           = False
+    compile_mode:            Optional[Literal["default", "reduce-overhead", "max-autotune"]] = None
+    num_threads:             Optional[int]                                                  = Field( default=None, gt=0 )
+    num_interop_threads:     Optional[int]                                                  = Field( default=None, gt=0 )
+
+    model_config = ConfigDict(extra="forbid")
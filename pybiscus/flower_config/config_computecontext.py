@@ -1,24 +1,26 @@
-from typing import ClassVar
+from typing import ClassVar, Optional
 from pydantic import BaseModel, ConfigDict
 
 from pybiscus.plugin.registries import MetricsLoggerConfig
 from pybiscus.flower_config.config_hardware import ConfigHardware
+# the client compute context does not depend on the registries (imported by the client modules they load)
+from pybiscus.flower_config.config_clientcomputecontext import ConfigClientComputeContext # noqa: F401
+from pybiscus.flower.prometheusexporter import ConfigPrometheusExporter
 
 class ConfigServerComputeContext(BaseModel):
+    """A Pydantic Model to validate the server compute context given by the user.
+
+    Attributes
+    ----------
+    hardware:            the Fabric accelerator and devices
+    metrics_loggers:     the metrics loggers of the session
+    prometheus_exporter: a Prometheus /metrics endpoint of the server process, none if None
+    """
 
     PYBISCUS_CONFIG: ClassVar[str] = "server_compute_context"
 
     hardware: ConfigHardware
     metrics_loggers: list[MetricsLoggerConfig()] # pyright: ignore[reportInvalidTypeForm]
+    prometheus_exporter: Optional[ConfigPrometheusExporter] = None
 
     model_config = ConfigDict(extra="forbid")
-
-
-class ConfigClientComputeContext(BaseModel):
-
-    PYBISCUS_CONFIG: ClassVar[str] = "client_compute_context"
-
-    hardware: ConfigHardware
-
-    model_config = ConfigDict(extra="forbid")
-
@@ -0,0 +1,75 @@
+from typing import ClassVar, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from pybiscus.flower_config.config_client import ConfigSslClient
+from pybiscus.flower_config.config_server import ConfigSslServer
+from pybiscus.plugin.registries import LoggerConfig
+from pybiscus.plugin.registries2 import FlowerFitResultsAggregatorConfig
+
+
+class ConfigFlowerEdge(BaseModel):
+    """A Pydantic Model to validate the flower configuration of an edge node.
+
+    Attributes
+    ----------
+    listen_address = the address and port the local clients connect to
+    server_address = the address and port of the upstream server
+    ssl            = the ssl configuration of the local server
+    upstream_ssl   = the ssl configuration of the connection to the upstream server
+    """
+
+    PYBISCUS_CONFIG: ClassVar[str] = "flower_edge"
+
+    listen_address: str                        = '[::]:3334'
+    server_address: str                        = "localhost:3333"
+    ssl:            Optional[ConfigSslServer]  = None
+    upstream_ssl:   Optional[ConfigSslClient]  = None
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class ConfigEdgeRun(BaseModel):
+    """A Pydantic Model to validate the edge run configuration given by the user.
+
+    Attributes
+    ----------
+    cid           = edge identifier, as a client of the upstream server
+    min_clients   = number of local clients waited for before each upstream round
+    max_workers   = number of local clients trained concurrently (all of them if None)
+    round_timeout = timeout (seconds) of the local fits and evaluations ; no timeout if None
+    loggers       = the edge loggers (console if empty)
+    """
+
+    PYBISCUS_CONFIG: ClassVar[str] = "edge_run"
+
+    cid:           int             = 1
+    min_clients:   int             = Field( default=1, gt=0 )
+    max_workers:   Optional[int]   = Field( default=None, gt=0 )
+    round_timeout: Optional[float] = Field( default=None, gt=0 )
+    loggers:       list[LoggerConfig()] = [] # pyright: ignore[reportInvalidTypeForm]
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class ConfigEdge(BaseModel):
+    """A Pydantic Model to validate the edge node configuration given by the user.
+
+    An edge node is a flower server for its local clients, and a single client of the upstream server.
+
+    Attributes
+    ----------
+    root_dir: str                 = the path to a "root" directory
+    flower_edge                   = local server and upstream addresses
+    edge_run                      = local clients of the rounds
+    flower_fit_results_aggregator = the pre-aggregation of the local fit results
+    """
+
+    PYBISCUS_ALIAS: ClassVar[str] = "Pybiscus edge configuration"
+
+    root_dir:                      str = "${oc.env:PWD}"
+    flower_edge:                   ConfigFlowerEdge
+    edge_run:                      ConfigEdgeRun
+    flower_fit_results_aggregator: FlowerFitResultsAggregatorConfig() # pyright: ignore[reportInvalidTypeForm]
+
+    model_config = ConfigDict(extra="forbid")
@@ -1,8 +1,10 @@
 from enum import Enum
 from typing import List, Optional, ClassVar
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
+from pybiscus.flower.roundhistory import ConfigRoundHistory
+from pybiscus.flower.sessiontrace import ConfigSessionTrace
 from pybiscus.flower_config.config_computecontext import ConfigServerComputeContext
 from pybiscus.plugin.registries import LoggerConfig, ModelConfig, DataConfig, StrategyConfig, StrategyDecoratorConfig
 
@@ -33,6 +35,23 @@ class ConfigSaveWeights(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
 
+class ConfigPeriodicCheckpoint(BaseModel):
+    """Server checkpoints every n rounds, written in the background (see pybiscus.flower.servercheckpoint).
+
+    Attributes
+    ----------
+    every_n_rounds = checkpoint the rounds multiple of every_n_rounds
+    dirname        = directory of the checkpoints, in the reporting directory
+    keep_last      = number of checkpoints kept (the older ones are removed) ; all of them if None
+    """
+
+    every_n_rounds: int           = Field( default=10, gt=0 )
+    dirname:        str           = "checkpoints"
+    keep_last:      Optional[int] = Field( default=3, gt=0 )
+
+    model_config = ConfigDict(extra="forbid")
+
+
 class AxeKind(str, Enum):
     input  = "input"
     output = "output"
@@ -65,6 +84,9 @@ class ConfigServerReporting(BaseModel):
     server_config_filename : str = "config_server.yml"
 
     save_on_train_end: Optional[ConfigSaveWeights] = None
+    save_every_n_rounds: Optional[ConfigPeriodicCheckpoint] = None
+    round_history:     Optional[ConfigRoundHistory] = None
+    trace:             Optional[ConfigSessionTrace] = None
     onnx_export:       Optional[ConfigServerOnnxExport] = None
 
     model_config = ConfigDict(extra="forbid")
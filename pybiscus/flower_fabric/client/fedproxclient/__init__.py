@@ -0,0 +1,12 @@
+from typing import Dict, List, Tuple
+from pydantic import BaseModel
+
+from pybiscus.flower_fabric.client.fedproxclient.fedproxclient import ConfigFedProxClient, FedProxClientFactory
+from pybiscus.interfaces.flower.clientfactory import ClientFactory
+
+def get_modules_and_configs() -> Tuple[Dict[str, ClientFactory], List[BaseModel]]:
+
+    registry = {"fedprox": FedProxClientFactory,}
+    configs  = [ConfigFedProxClient,]
+
+    return registry, configs
@@ -0,0 +1,91 @@
+from typing import ClassVar, Literal, Optional
+
+from lightning import LightningDataModule, LightningModule
+from pydantic import BaseModel, ConfigDict, Field
+
+from pybiscus.flower.updatecodec import ConfigUpdateCodec
+from pybiscus.flower_config.config_clientcomputecontext import ConfigClientComputeContext
+from pybiscus.flower_fabric.client.flowerfabricclient.flowerfabricclient import FlowerFabricClient
+from pybiscus.interfaces.flower.clientfactory import ClientFactory
+from pybiscus.ml.proximal import ProximalTerm
+import pybiscus.core.pybiscus_logger as logm
+
+
+class ConfigFedProxClientData(BaseModel):
+    """
+    mu: weight of the proximal term mu/2 ||w - w_global||², used when the server
+        does not send one (fit_config["proximal_mu"], see the strategies proximal_mu)
+    """
+
+    PYBISCUS_CONFIG: ClassVar[str] = "config"
+
+    mu: float = Field( default=0.01, ge=0 )
+
+    model_config = ConfigDict(extra="forbid")
+
+class ConfigFedProxClient(BaseModel):
+    PYBISCUS_ALIAS: ClassVar[str] = "FedProx client"
+    name:   Literal["fedprox"]
+    config: ConfigFedProxClientData
+    model_config = ConfigDict(extra="forbid")
+
+
+class FedProxClient(FlowerFabricClient):
+    """FlowerFabricClient whose local training keeps close to the received global weights (FedProx).
+
+    The proximal term mu/2 ||w - w_global||² limits the client drift on non-IID data ;
+    its value at the end of the local training is reported in the fit metrics (proximal_term).
+    """
+
+    def __init__(
+        self,
+        cid: int,
+        model: LightningModule,
+        data: LightningDataModule,
+        num_examples: dict[str, int],
+        conf_fabric: ConfigClientComputeContext,
+        pre_train_val: bool = False,
+        update_codec: Optional[ConfigUpdateCodec] = None,
+        mu: float = 0.01,
+    ) -> None:
+        super().__init__(cid, model, data, num_examples, conf_fabric, pre_train_val, update_codec)
+        self.mu       = mu
+        self.proximal = ProximalTerm(mu)
+
+    def train_options(self, config) -> dict:
+
+        # the server setting prevails
+        self.proximal.mu = float(config.get("proximal_mu", self.mu))
+
+        # received global weights, just set into the model
+        self.proximal.snapshot(list(self.model.parameters()))
+        logm.console.log(f"[Client {self.cid}] 🧲 proximal term, mu={self.proximal.mu}")
+
+        return { "proximal": self.proximal }
+
+    def fit(self, parameters, config):
+        fit_parameters, num_examples, metrics = super().fit(parameters, config)
+        metrics["proximal_term"] = self.proximal.value()
+        return fit_parameters, num_examples, metrics
+
+
+class FedProxClientFactory(ClientFactory):
+
+    def __init__(self,config,data,model,num_examples):
+        self.config=config
+        self.data=data
+        self.model=model
+        self.num_examples=num_examples
+
+    def get_client(self):
+
+        return FedProxClient(
+            cid=self.config.client_run.cid,
+            model=self.model,
+            data=self.data,
+            num_examples=self.num_examples,
+            conf_fabric=self.config.client_compute_context,
+            pre_train_val=self.config.client_run.pre_train_val,
+            update_codec=self.config.flower_client.update_codec,
+            **self.config.flower_client.alternate_client_class.config.model_dump(),
+        )
@@ -1,12 +1,17 @@
-from collections import OrderedDict
+import time
 from collections.abc import Mapping
+from typing import Optional
 import flwr as fl
 from lightning import Fabric, LightningDataModule, LightningModule
+import numpy as np
 import torch
 
-from pybiscus.flower_config.config_computecontext import ConfigClientComputeContext
+from pybiscus.core.tracing import TRACE_METRIC, Tracer, span
+from pybiscus.flower.updatecodec import ConfigUpdateCodec, UpdateEncoder
+from pybiscus.flower_config.config_clientcomputecontext import ConfigClientComputeContext
 from pybiscus.ml.loops_fabric import test_loop, train_loop
 import pybiscus.core.pybiscus_logger as logm
+from pybiscus.core.pybiscusexception import PybiscusValueException
 
 def parse_optimizers(lightning_optimizers):
     """
@@ -28,6 +33,26 @@ def parse_optimizers(lightning_optimizers):
                     optimizers.append(optmizers_conf)
     return optimizers
 
+def ndarray_as_tensor(value: np.ndarray) -> torch.Tensor:
+    """a torch view of the ndarray (a copy only if the ndarray is read-only, which torch can not share)"""
+    value = np.asarray(value)
+    if not value.flags.writeable:
+        value = value.copy()
+    return torch.from_numpy(value)
+
+def configure_torch_threads(num_threads: Optional[int], num_interop_threads: Optional[int]):
+    """torch intra-op and inter-op threads (process wide), left to torch defaults when None"""
+
+    if num_threads is not None:
+        torch.set_num_threads(num_threads)
+
+    if num_interop_threads is not None and torch.get_num_interop_threads() != num_interop_threads:
+        try:
+            torch.set_num_interop_threads(num_interop_threads)
+        except RuntimeError as e:
+            # can only be set once, before any inter-op parallel work
+            logm.console.log(f"⚠️ torch inter-op threads left to {torch.get_num_interop_threads()}: {e}")
+
 class FlowerFabricClient(fl.client.NumPyClient):
     """A Fabric-based, modular Flower Client.
 
@@ -45,6 +70,7 @@ class FlowerFabricClient(fl.client.NumPyClient):
         num_examples: dict[str, int],
         conf_fabric: ConfigClientComputeContext,
         pre_train_val: bool = False,
+        update_codec: Optional[ConfigUpdateCodec] = None,
     ) -> None:
         """Initialize the FlowerClient instance.
 
@@ -61,29 +87,56 @@ class FlowerFabricClient(fl.client.NumPyClient):
         num_examples : dict[str, int]
             needed by Flower, for the FedAvg Streategy typically
         conf_fabric : ConfigClientComputeContext
-            a Pydantic-validated configuration for the Fabric instance
+            a Pydantic-validated configuration for the Fabric instance (hardware, precision),
+            the torch threads and the training options (gradient accumulation, compilation)
+        update_codec : ConfigUpdateCodec, optional
+            encoding of the fit result (delta, quantization, top-k), full weights if None
         """
         super().__init__()
         self.cid = cid
         self.model = model
         self.data = data
 
-        self.conf_fabric = conf_fabric.model_dump()
+        self.compute_context = conf_fabric
+        self.conf_fabric = conf_fabric.hardware.model_dump()
         self.num_examples = num_examples
         self.pre_train_val = pre_train_val
 
+        configure_torch_threads(conf_fabric.num_threads, conf_fabric.num_interop_threads)
+
         self.optimizers = parse_optimizers(self.model.configure_optimizers())
 
-        self.fabric = Fabric(**self.conf_fabric)
+        self.fabric = Fabric(**self.conf_fabric, precision=conf_fabric.precision)
+
+        self.update_encoder = UpdateEncoder(**update_codec.model_dump()) if update_codec is not None else None
+
+        # state tensors (sharing the model storage)
+        self._state_tensors = None
+
+    def state_tensors(self) -> dict[str, torch.Tensor]:
+        """state_dict tensors of the model, cached : they share the storage of the parameters and buffers"""
+
+        if self._state_tensors is None:
+            self._state_tensors = dict(self.model.state_dict())
+
+        return self._state_tensors
 
     def initialize(self):
         self.fabric.launch()
 
+        if self.compute_context.compile:
+            # in place : the module (and its state_dict keys) is kept, only its forward is compiled
+            logm.console.log(f"[Client {self.cid}] 🛠️ torch.compile, mode: {self.compute_context.compile_mode}")
+            self.model.compile(mode=self.compute_context.compile_mode)
+
         if hasattr(self, "optimizers") and self.optimizers:
             self.model, *self.optimizers = self.fabric.setup(self.model, *self.optimizers)
         else:
             self.model = self.fabric.setup(self.model)
 
+        # setup may have moved the model : forget cached tensors
+        self._state_tensors = None
+
         (
             self._train_dataloader,
             self._validation_dataloader,
@@ -93,44 +146,93 @@ class FlowerFabricClient(fl.client.NumPyClient):
 
     def get_parameters(self, config):
         logm.console.log(f"[Client] get_parameters, config: {config}")
-        return [val.cpu().numpy() for _, val in self.model.state_dict().items()]
+        # on cpu, numpy() is a view of the model storage : serialized by flower before any further training
+        return [tensor.cpu().numpy() for tensor in self.state_tensors().values()]
 
     def set_parameters(self, parameters):
         logm.console.log("[Client] set_parameters")
-        params_dict = zip(self.model.state_dict().keys(), parameters)
-        state_dict = OrderedDict({k: torch.tensor(v) for k, v in params_dict})
-        self.model.load_state_dict(state_dict, strict=True)
+
+        state_tensors = self.state_tensors()
+
+        if len(parameters) != len(state_tensors):
+            raise PybiscusValueException(f"received {len(parameters)} parameters for a model of {len(state_tensors)} tensors")
+
+        with torch.no_grad():
+            for tensor, value in zip(state_tensors.values(), parameters):
+
+                # in-place copy into the existing storage (handles dtype and device)
+                tensor.copy_(ndarray_as_tensor(value).view(tensor.shape))
+
+    def train_options(self, config) -> dict:
+        """extra train_loop options of a fit round (hook for client subclasses, called once the parameters are set)"""
+        return {}
 
     def fit(self, parameters, config):
         logm.console.log(f"[Client {self.cid}] fit, config: {config}")
-        self.set_parameters(parameters)
+
+        # spans requested by the server (fit_config["trace"] = max number of spans), sent back in the metrics
+        tracer = Tracer(max_events=int(config[TRACE_METRIC])) if config.get(TRACE_METRIC) else None
+        start = time.perf_counter()
+
+        with span(tracer, "set_parameters"):
+            self.set_parameters(parameters)
         metrics = {}
 
         if self.pre_train_val:
             logm.console.log(
                 f"Round {config['server_round']}, pre train validation started..."
             )
-            results_pre_train = test_loop(
-                self.fabric, self.model, self._validation_dataloader
-            )
+            with span(tracer, "pre_train_val"):
+                results_pre_train = test_loop(
+                    self.fabric, self.model, self._validation_dataloader
+                )
             for key, val in results_pre_train.items():
                 metrics[f"{key}_pre_train_val"] = val
 
         logm.console.log(f"Round {config['server_round']}, training Started...")
 
+        train_stats = {}
         results_train = train_loop(
             self.fabric,
             self.model,
             self._train_dataloader,
             self.optimizers, # Alice TODO extend this to multiple optimizers ??
             epochs=config["local_epochs"],
+            accumulate_grad_batches=self.compute_context.accumulate_grad_batches,
+            time_budget=config.get("time_budget"),
+            max_steps=config.get("max_steps"),
+            stats=train_stats,
+            tracer=tracer,
+            **self.train_options(config),
         )
             
         logm.console.log(f"Training Finished! Loss is {results_train['loss']}")
         metrics["cid"] = self.cid
         for key, val in results_train.items():
             metrics[key] = val
-        return self.get_parameters(config={}), self.num_examples["trainset"], metrics
+
+        # measured capacity (samples/s), for the server workload scheduling
+        metrics.update(train_stats)
+        metrics["throughput"] = train_stats["train_samples"] / max(train_stats["train_time"], 1e-9)
+
+        with span(tracer, "get_parameters"):
+            fit_parameters = self.get_parameters(config={})
+
+        if self.update_encoder is not None:
+            # received parameters are the reference of the delta
+            with span(tracer, "encode_update"):
+                fit_parameters = self.update_encoder.encode(fit_parameters, reference=parameters)
+            metrics["update_bytes"]     = self.update_encoder.last_encoded_bytes
+            metrics["update_raw_bytes"] = self.update_encoder.last_raw_bytes
+            logm.console.log(
+                f"[Client {self.cid}] 📦 update {self.update_encoder.last_raw_bytes} → {self.update_encoder.last_encoded_bytes} bytes"
+            )
+
+        if tracer is not None:
+            tracer.record("fit", start, time.perf_counter() - start)
+            metrics[TRACE_METRIC] = tracer.payload()
+
+        return fit_parameters, self.num_examples["trainset"], metrics
 
     def evaluate(self, parameters, config):
         logm.console.log(f"[Client {self.cid}] evaluate, config: {config}")
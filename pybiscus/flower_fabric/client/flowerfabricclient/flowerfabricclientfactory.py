@@ -22,6 +22,7 @@ class FlowerFabricClientFactory(ClientFactory):
             model=self.model,
             data=self.data,
             num_examples=self.num_examples,
-            conf_fabric=self.config.client_compute_context.hardware,
+            conf_fabric=self.config.client_compute_context,
             pre_train_val=self.config.client_run.pre_train_val,
+            update_codec=self.config.flower_client.update_codec,
         )
@@ -6,6 +6,14 @@ from flwr.common import FitRes, Parameters
 
 class FlowerFitResultsAggregator:
 
+    def on_configure_fit(
+            self,
+            server_round: int,
+            parameters: Parameters,
+            ) -> None:
+        """called with the global parameters sent to the clients for the round (no-op by default)"""
+        pass
+
     def aggregate( 
             self,
             server_round: int, 
@@ -13,3 +21,15 @@ class FlowerFitResultsAggregator:
             failures: list[Union[tuple[ClientProxy, FitRes], BaseException]],
             ) -> Parameters:
         raise NotImplementedError("Implement the aggregator.")
+
+    def state_dict(self) -> dict:
+        """server side state saved into the server checkpoints (stateless by default)"""
+        return {}
+
+    def load_state_dict(self, state: dict) -> None:
+        """restores the state of a server checkpoint (no-op by default)"""
+        pass
+
+    def close(self) -> None:
+        """releases the aggregator resources (e.g. a worker pool) once the Federated Learning ended (no-op by default)"""
+        pass
@@ -36,3 +36,25 @@ class StrategyDecorator(Strategy):
     def evaluate( self, server_round: int, parameters: Parameters
                     ) -> Optional[Tuple[float, Dict[str, Scalar]]]:
         return self.base_strategy.evaluate( server_round, parameters, )
+
+    def state_dict(self) -> dict:
+        """decorator state saved into the server checkpoints (stateless by default)"""
+        return {}
+
+    def load_state_dict(self, state: dict) -> None:
+        """restores the state of a server checkpoint (no-op by default)"""
+        pass
+
+
+def undecorated_strategy(strategy: Strategy) -> Strategy:
+    """the base strategy of a chain of strategy decorators"""
+    while isinstance(strategy, StrategyDecorator):
+        strategy = strategy.base_strategy
+    return strategy
+
+
+def close_strategy(strategy: Strategy) -> None:
+    """closes the base strategy of a chain, if it has a close (e.g. background workers), once the Federated Learning ended"""
+    close = getattr(undecorated_strategy(strategy), "close", None)
+    if close is not None:
+        close()
@@ -0,0 +1,143 @@
+import json
+import os
+from pathlib import Path
+from typing import Callable, Literal, Sequence
+
+import numpy as np
+import torch
+
+import pybiscus.core.pybiscus_logger as logm
+from pybiscus.ml.data.tensorbatchloader import TensorBatchDataset
+
+_CACHE_VERSION = 1
+
+CacheStorage = Literal["uint8", "float16"]
+
+
+def load_image_cache(
+        cache_dir: str,
+        key: str,
+        source: Callable[[], tuple[np.ndarray, np.ndarray]],
+        storage: CacheStorage,
+        mean: Sequence[float],
+        std: Sequence[float],
+        chunk_size: int = 4096,
+        ) -> tuple[np.ndarray, np.ndarray]:
+    """Memory-mapped (N, C, H, W) images and (N,) targets, built from source() on first use.
+
+    source returns the raw images, (N, C, H, W) uint8, and their targets.
+    uint8 storage keeps the raw images (normalized per batch when served),
+    float16 storage keeps the normalized images.
+    Files are written aside then renamed : concurrent clients never read a partial cache.
+    """
+
+    cache_dir = Path(cache_dir)
+    images_path  = cache_dir / f"{key}-{storage}-images.npy"
+    targets_path = cache_dir / f"{key}-{storage}-targets.npy"
+    meta_path    = cache_dir / f"{key}-{storage}-meta.json"
+    meta = { "version": _CACHE_VERSION, "storage": storage, "mean": list(mean), "std": list(std) }
+
+    try:
+        if json.loads(meta_path.read_text()) == meta:
+            # copy on write mapping : writable for torch, never written back
+            return np.load(images_path, mmap_mode="c"), np.load(targets_path)
+    except (OSError, ValueError):
+        pass
+
+    images, targets = source()
+    logm.console.log(f"💾 building {storage} image cache {images_path} {images.shape}")
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    suffix = f".{os.getpid()}.tmp.npy"
+
+    cache = np.lib.format.open_memmap(str(images_path) + suffix, mode="w+", dtype=storage, shape=images.shape)
+
+    if storage == "uint8":
+        cache[:] = images
+    else:
+        mean_ = np.asarray(mean, dtype=np.float32).reshape(1, -1, 1, 1)
+        std_  = np.asarray(std,  dtype=np.float32).reshape(1, -1, 1, 1)
+        for start in range(0, len(images), chunk_size):
+            chunk = images[start:start + chunk_size].astype(np.float32) / 255.0
+            cache[start:start + chunk_size] = ((chunk - mean_) / std_).astype(np.float16)
+
+    cache.flush()
+    del cache
+
+    np.save(str(targets_path) + suffix, np.asarray(targets, dtype=np.int64))
+
+    os.replace(str(images_path) + suffix, images_path)
+    os.replace(str(targets_path) + suffix, targets_path)
+    tmp_meta_path = Path(str(meta_path) + f".{os.getpid()}.tmp")
+    tmp_meta_path.write_text(json.dumps(meta))
+    os.replace(tmp_meta_path, meta_path)
+
+    return np.load(images_path, mmap_mode="c"), np.load(targets_path)
+
+
+class CachedImageDataset(TensorBatchDataset):
+    """Normalized images from a (memory-mapped) image cache, indexed by whole batches.
+
+    A batch is gathered by one fancy indexing of the cache (see tensor_batch_loader),
+    then normalized and augmented in a vectorized way
+    (random horizontal flip and random crop with black padding, drawn per sample).
+    """
+
+    def __init__(
+            self,
+            images: np.ndarray,
+            targets: np.ndarray,
+            mean: Sequence[float],
+            std: Sequence[float],
+            hflip: bool = False,
+            crop_padding: int = 0,
+            ):
+
+        self.images  = torch.from_numpy(images)
+        self.targets = torch.from_numpy(np.asarray(targets, dtype=np.int64))
+        super().__init__(self.images, self.targets)
+
+        self.normalize = images.dtype == np.uint8
+        self.mean = torch.tensor(mean, dtype=torch.float32).reshape(1, -1, 1, 1)
+        self.std  = torch.tensor(std,  dtype=torch.float32).reshape(1, -1, 1, 1)
+
+        self.hflip        = hflip
+        self.crop_padding = crop_padding
+
+    def transform_batch(self, batch: tuple[torch.Tensor, torch.Tensor]) -> tuple[torch.Tensor, torch.Tensor]:
+
+        x, y = batch
+        x = x.to(torch.float32)
+
+        if self.normalize:
+            x.mul_(1.0 / 255.0).sub_(self.mean).div_(self.std)
+
+        if self.hflip:
+            flip = torch.rand(len(x)) < 0.5
+            x[flip] = x[flip].flip(-1)
+
+        if self.crop_padding > 0:
+            x = self._random_crop(x)
+
+        return x, y
+
+    def _random_crop(self, x: torch.Tensor) -> torch.Tensor:
+        """per-sample random crop of the padded batch, by one gather
+
+        The padding is black, normalized (-mean/std per channel) : as transforms.RandomCrop(padding)
+        applied on the raw images, before normalization.
+        """
+
+        batch, channels, height, width = x.shape
+        padding = self.crop_padding
+        padded  = (-self.mean / self.std).to(x.dtype).expand(batch, channels, height + 2 * padding, width + 2 * padding).clone()
+        padded[:, :, padding:padding + height, padding:padding + width] = x
+
+        offset_y = torch.randint(0, 2 * padding + 1, (batch,))
+        offset_x = torch.randint(0, 2 * padding + 1, (batch,))
+        rows = (offset_y[:, None] + torch.arange(height)[None, :])[:, :, None]
+        cols = (offset_x[:, None] + torch.arange(width)[None, :])[:, None, :]
+
+        # (B, H, W, C) -> (B, C, H, W)
+        return padded[torch.arange(batch)[:, None, None], :, rows, cols].permute(0, 3, 1, 2).contiguous()
+
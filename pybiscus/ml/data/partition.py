@@ -0,0 +1,119 @@
+from typing import Literal, Optional
+
+import lightning.pytorch as pl
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Dataset
+
+from pybiscus.core.pybiscusexception import PybiscusValueException
+from pybiscus.ml.data.tensorbatchloader import TensorBatchSampler, tensor_batch_loader
+
+PartitionMethod = Literal["iid", "dirichlet"]
+
+
+def dataset_targets(dataset: Dataset) -> Optional[np.ndarray]:
+    """labels of a dataset, when exposed as a targets attribute (torchvision, cached images)"""
+    targets = getattr(dataset, "targets", None)
+    if targets is None:
+        return None
+    if isinstance(targets, torch.Tensor):
+        return targets.cpu().numpy()
+    return np.asarray(targets)
+
+
+def partition_indices(
+        num_samples: int,
+        num_partitions: int,
+        method: PartitionMethod = "iid",
+        seed: int = 0,
+        targets: Optional[np.ndarray] = None,
+        alpha: float = 0.5,
+        ) -> list[np.ndarray]:
+    """Split range(num_samples) into num_partitions disjoint index sets.
+
+    iid       : random split into (almost) equal parts
+    dirichlet : label skew, the share of each label among the partitions being drawn from Dir(alpha)
+    """
+
+    if num_partitions <= 0:
+        raise PybiscusValueException(f"number of partitions should be positive, got {num_partitions}")
+
+    rng = np.random.default_rng(seed)
+
+    if method == "iid":
+        return [ np.sort(part) for part in np.array_split(rng.permutation(num_samples), num_partitions) ]
+
+    if method == "dirichlet":
+
+        if targets is None:
+            raise PybiscusValueException("dirichlet partition needs a dataset exposing its targets")
+
+        parts = [ [] for _ in range(num_partitions) ]
+
+        for label in np.unique(targets):
+            indices = rng.permutation(np.flatnonzero(targets == label))
+            shares  = rng.dirichlet(np.full(num_partitions, alpha))
+            bounds  = (np.cumsum(shares)[:-1] * len(indices)).astype(int)
+            for part, chunk in zip(parts, np.split(indices, bounds)):
+                part.append(chunk)
+
+        return [ np.sort(np.concatenate(part)) for part in parts ]
+
+    raise PybiscusValueException(f"unknown partition method {method}")
+
+
+class IndexedSubset(Dataset):
+    """Subset of a dataset, forwarding single indices as well as batches of indices (tensor batch datasets)"""
+
+    def __init__(self, dataset: Dataset, indices: np.ndarray):
+        self.dataset = dataset
+        self.indices = torch.as_tensor(indices, dtype=torch.long)
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, index):
+        if isinstance(index, int):
+            return self.dataset[int(self.indices[index])]
+        return self.dataset[self.indices[torch.as_tensor(index, dtype=torch.long)]]
+
+
+def subset_loader(loader: DataLoader, indices: np.ndarray, shuffle: bool) -> DataLoader:
+    """a DataLoader like loader (batching, drop_last, workers), over a subset of its dataset"""
+
+    subset = IndexedSubset(loader.dataset, indices)
+
+    if isinstance(loader.sampler, TensorBatchSampler):
+        return tensor_batch_loader( subset, loader.sampler.batch_size, shuffle=shuffle, drop_last=loader.sampler.drop_last,
+                                    num_workers=loader.num_workers, pin_memory=loader.pin_memory )
+
+    if loader.batch_size is None:
+        raise PybiscusValueException("can not partition a DataLoader without batch_size (custom batch sampler)")
+
+    return DataLoader( subset, batch_size=loader.batch_size, shuffle=shuffle, drop_last=loader.drop_last,
+                       num_workers=loader.num_workers, collate_fn=loader.collate_fn, pin_memory=loader.pin_memory )
+
+
+class PartitionDataModule(pl.LightningDataModule):
+    """One client share of the training set of a (shared, already set up) datamodule.
+
+    The validation and test sets are the ones of the shared datamodule.
+    """
+
+    def __init__(self, datamodule: pl.LightningDataModule, train_indices: np.ndarray):
+        super().__init__()
+        self.datamodule    = datamodule
+        self.train_indices = train_indices
+
+    def setup(self, stage: Optional[str] = None):
+        # the shared datamodule is set up once, by its owner
+        pass
+
+    def train_dataloader(self) -> DataLoader:
+        return subset_loader(self.datamodule.train_dataloader(), self.train_indices, shuffle=True)
+
+    def val_dataloader(self) -> DataLoader:
+        return self.datamodule.val_dataloader()
+
+    def test_dataloader(self) -> DataLoader:
+        return self.datamodule.test_dataloader()
@@ -0,0 +1,105 @@
+import numbers
+from typing import Optional, Union
+
+import torch
+from torch.utils.data import DataLoader, Dataset, Sampler
+
+from pybiscus.core.pybiscusexception import PybiscusValueException
+
+
+class TensorBatchDataset(Dataset):
+    """Dataset over tensors sharing their first dimension, indexed by whole batches.
+
+    __getitem__ accepts a single index, or a tensor (or sequence) of indices :
+    a batch is then gathered by one fancy indexing of each tensor, instead of
+    one __getitem__ per sample followed by a collate.
+    Subclasses may override transform_batch (e.g. vectorized normalization or augmentation).
+    """
+
+    def __init__(self, *tensors: torch.Tensor):
+
+        if not tensors:
+            raise PybiscusValueException("TensorBatchDataset needs at least one tensor")
+
+        if any(len(tensor) != len(tensors[0]) for tensor in tensors):
+            raise PybiscusValueException(f"TensorBatchDataset tensors lengths differ: {[len(tensor) for tensor in tensors]}")
+
+        self.tensors = tensors
+
+    def __len__(self):
+        return len(self.tensors[0])
+
+    def transform_batch(self, batch: tuple[torch.Tensor, ...]) -> tuple[torch.Tensor, ...]:
+        return batch
+
+    def __getitem__(self, index):
+
+        if isinstance(index, numbers.Integral) or (isinstance(index, torch.Tensor) and index.ndim == 0):
+            # a single sample : a batch of one, unbatched after its transformation
+            index = int(index)
+            return tuple(sample[0] for sample in self.transform_batch(tuple(tensor[index:index + 1] for tensor in self.tensors)))
+
+        index = torch.as_tensor(index, dtype=torch.long)
+        return self.transform_batch(tuple(tensor[index] for tensor in self.tensors))
+
+
+class TensorBatchSampler(Sampler):
+    """Yields the indices of each batch as one tensor (slices of a permutation when shuffled)."""
+
+    def __init__(self, num_samples: int, batch_size: int, shuffle: bool = False, drop_last: bool = False, generator: Optional[torch.Generator] = None):
+
+        if batch_size <= 0:
+            raise PybiscusValueException(f"batch_size should be a positive integer, got {batch_size}")
+
+        self.num_samples = num_samples
+        self.batch_size  = batch_size
+        self.shuffle     = shuffle
+        self.drop_last   = drop_last
+        self.generator   = generator
+
+    def __len__(self):
+        if self.drop_last:
+            return self.num_samples // self.batch_size
+        return (self.num_samples + self.batch_size - 1) // self.batch_size
+
+    def __iter__(self):
+
+        if self.shuffle:
+            indices = torch.randperm(self.num_samples, generator=self.generator)
+        else:
+            indices = torch.arange(self.num_samples)
+
+        for batch in range(len(self)):
+            yield indices[batch * self.batch_size:(batch + 1) * self.batch_size]
+
+
+def tensor_batch_loader(
+        data: Union[Dataset, torch.Tensor, tuple[torch.Tensor, ...]],
+        batch_size: int,
+        shuffle: bool = False,
+        drop_last: bool = False,
+        num_workers: int = 0,
+        pin_memory: bool = False,
+        generator: Optional[torch.Generator] = None,
+        ) -> DataLoader:
+    """A DataLoader yielding whole batches gathered by fancy indexing.
+
+    data is a TensorBatchDataset (or any dataset whose __getitem__ accepts a tensor of indices),
+    a tensor, or a tuple of tensors. The result is a plain torch DataLoader (len(), drop_last,
+    workers, fabric.setup_dataloaders) whose sampler yields one tensor of indices per batch,
+    so no per-sample __getitem__ nor collate happens. A client being a single process,
+    no distributed sampler is involved.
+    """
+
+    if isinstance(data, torch.Tensor):
+        data = TensorBatchDataset(data)
+    elif isinstance(data, tuple):
+        data = TensorBatchDataset(*data)
+
+    return DataLoader(
+        data,
+        batch_size=None,
+        sampler=TensorBatchSampler(len(data), batch_size, shuffle=shuffle, drop_last=drop_last, generator=generator),
+        num_workers=num_workers,
+        pin_memory=pin_memory,
+    )
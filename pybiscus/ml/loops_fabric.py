@@ -1,11 +1,145 @@
+import math
+import time
+from collections.abc import Mapping
+from typing import Optional
+
 import torch
-from rich.progress import track
+from rich.errors import LiveError
+from rich.progress import Progress
+
+from pybiscus.core.tracing import Tracer, span
+from pybiscus.ml.proximal import ProximalTerm
 
 torch.backends.cudnn.enabled = True
 
 
-def train_loop(fabric, net, trainloader, optimizer, epochs: int, verbose=False):
-    """Train the network on the training set."""
+def signature_keys(net) -> list[str]:
+    """metric keys of the network signature, resolved once (in declaration order)"""
+    required = net.signature.__required_keys__
+    return [ key for key in net.signature.__annotations__ if key in required ]
+
+
+def batch_num_samples(batch) -> int:
+    """number of samples of a batch (first dimension of its first tensor)"""
+
+    if isinstance(batch, torch.Tensor):
+        return int(batch.shape[0]) if batch.ndim > 0 else 1
+
+    if isinstance(batch, Mapping):
+        batch = list(batch.values())
+
+    if isinstance(batch, (list, tuple)) and len(batch) > 0:
+        return batch_num_samples(batch[0])
+
+    return 1
+
+
+class MetricAccumulator:
+    """Sample-weighted sums of the step metrics, kept on the device.
+
+    Each step adds value * batch_size to a device tensor (no host synchronization),
+    the averages are only brought back to the host once, by compute().
+    The mean is thus exact even when the last batch is partial.
+    """
+
+    def __init__(self, keys: list[str], device: torch.device):
+        self.keys = list(keys)
+        # float64 sums, except on devices without float64 support
+        dtype = torch.float32 if torch.device(device).type == "mps" else torch.float64
+        self.sums = torch.zeros(len(self.keys), dtype=dtype, device=device)
+        self.num_samples = 0
+
+    def update(self, results: Mapping, num_samples: int):
+
+        for index, key in enumerate(self.keys):
+            value = results[key]
+
+            if isinstance(value, torch.Tensor):
+                # detached : the accumulator must not keep the autograd graph alive
+                self.sums[index].add_(value.detach().reshape(()), alpha=num_samples)
+            else:
+                self.sums[index].add_(float(value) * num_samples)
+
+        self.num_samples += num_samples
+
+    def compute(self) -> dict[str, float]:
+        averages = (self.sums / max(self.num_samples, 1)).tolist()
+        return dict(zip(self.keys, averages))
+
+
+def progress_track(iterable, total: int, description: str, enabled: bool = True, refresh_every: int = 0):
+    """iterate with an optional rich progress bar, advanced every refresh_every steps (about 100 refreshes if 0)"""
+
+    if not enabled:
+        yield from iterable
+        return
+
+    if refresh_every <= 0:
+        refresh_every = max(1, total // 100)
+
+    progress = Progress(transient=True)
+    try:
+        progress.start()
+    except LiveError:
+        # another live display is running (e.g. concurrent simulated clients) : no bar
+        yield from iterable
+        return
+
+    with progress:
+        task = progress.add_task(description, total=total)
+        pending = 0
+        for item in iterable:
+            yield item
+            pending += 1
+            if pending >= refresh_every:
+                progress.advance(task, pending)
+                pending = 0
+        progress.advance(task, pending)
+
+
+def apply_proximal(fabric, optimizer, proximal: ProximalTerm) -> None:
+    """adds the proximal gradient to the (true scale) gradients, just before the optimizer step
+
+    With a gradient scaler (16-mixed precision), fabric.backward leaves loss-scaled gradients : they are
+    unscaled first (the scaler step then does not unscale them again), the proximal gradient being unscaled.
+    """
+
+    scaler = getattr(fabric.strategy.precision, "scaler", None)
+    if scaler is not None:
+        scaler.unscale_(getattr(optimizer, "optimizer", optimizer))
+
+    proximal.apply_()
+
+
+def train_loop(
+        fabric,
+        net,
+        trainloader,
+        optimizer,
+        epochs:                  int,
+        verbose                  = False,
+        progress:                bool = True,
+        accumulate_grad_batches: int = 1,
+        time_budget:             Optional[float] = None,
+        max_steps:               Optional[int] = None,
+        stats:                   Optional[dict] = None,
+        proximal:                Optional[ProximalTerm] = None,
+        tracer:                  Optional[Tracer] = None,
+        ):
+    """Train the network on the training set, with the precision of the Fabric instance.
+
+    progress:                rich progress bar
+    accumulate_grad_batches: batches whose gradients are accumulated before each optimizer step
+                             (the last, possibly shorter, window of the epoch is stepped too)
+    time_budget:             seconds ; stops before the first batch not fitting the budget at the mean batch
+                             duration so far (at least one batch is trained), the metrics being those of the last epoch
+    max_steps:               batches to train (over as many epochs as needed), instead of epochs
+    stats:                   filled with train_samples, train_steps, train_time (seconds) and epoch_steps
+    proximal:                FedProx term, whose gradient is added before each optimizer step
+    tracer:                  records the data loading, forward, backward and optimizer step of each batch
+
+    If no batch is trained (empty loader, or no epoch), the metrics are zeros.
+    """
 
     net.train()
 
@@ -13,75 +147,124 @@ def train_loop(fabric, net, trainloader, optimizer, epochs: int, verbose=False):
         optimizer = None
     elif isinstance(optimizer, list) and len(optimizer) == 1:
         optimizer = optimizer[0]
-    
+
+    keys = signature_keys(net)
+    num_batches = len(trainloader)
+    precision = fabric.strategy.precision
+
+    if max_steps is not None:
+        epochs = math.ceil(max_steps / max(num_batches, 1))
+
+    start = time.perf_counter()
+    trained_batches = 0
+    trained_samples = 0
+    stopped = False
+    pending_step = False
+    results_epoch = None
+
     for epoch in range(epochs):
-        results_epoch = {
-            key: torch.tensor(0.0, device=net.device)
-            for key in net.signature.__required_keys__
-        }
-        for batch_idx, batch in track(
-            enumerate(trainloader),
+        accumulator = MetricAccumulator(keys, net.device)
+
+        batches = enumerate(trainloader)
+        if tracer is not None:
+            batches = tracer.iterate(batches, "data")
+
+        for batch_idx, batch in progress_track(
+            batches,
             total=len(trainloader),
             description="Training...",
+            enabled=progress,
         ):
-            results = net.training_step(batch, batch_idx)
+            if time_budget is not None and trained_batches > 0:
+                elapsed = time.perf_counter() - start
+                if elapsed + elapsed / trained_batches > time_budget:
+                    stopped = True
+                    break
+
+            if max_steps is not None and trained_batches >= max_steps:
+                stopped = True
+                break
+
+            # the steps are not called through the fabric module forward : precision is applied here
+            with span(tracer, "forward"):
+                batch = precision.convert_input(batch)
+                with fabric.autocast():
+                    results = net.training_step(batch, batch_idx)
             loss = results["loss"]
 
             if optimizer is not None:
-                optimizer.zero_grad()
-                fabric.backward(loss)
-                optimizer.step()
+                if accumulate_grad_batches == 1:
+                    optimizer.zero_grad()
+                    with span(tracer, "backward"):
+                        fabric.backward(loss)
+                    with span(tracer, "optimizer_step"):
+                        if proximal is not None:
+                            apply_proximal(fabric, optimizer, proximal)
+                        optimizer.step()
+                else:
+                    if batch_idx % accumulate_grad_batches == 0:
+                        optimizer.zero_grad()
+
+                    is_accumulating = (batch_idx + 1) % accumulate_grad_batches != 0 and batch_idx + 1 != num_batches
 
-            for key in results_epoch.keys():
-                value = results[key]
+                    # no gradient synchronization between devices while accumulating
+                    with span(tracer, "backward"), fabric.no_backward_sync(net, enabled=is_accumulating):
+                        fabric.backward(loss / accumulate_grad_batches)
 
-                # hardening code --- begin ---
-                if not isinstance(value, torch.Tensor):
-                    value = torch.tensor(value, device=net.device)
+                    if not is_accumulating:
+                        with span(tracer, "optimizer_step"):
+                            if proximal is not None:
+                                apply_proximal(fabric, optimizer, proximal)
+                            optimizer.step()
+                    pending_step = is_accumulating
 
-                if value.shape != results_epoch[key].shape:
-                    value = value.reshape(results_epoch[key].shape)
-                # hardening code --- end ---
+            num_samples = batch_num_samples(batch)
+            accumulator.update(results, num_samples)
+            trained_batches += 1
+            trained_samples += num_samples
+
+        if accumulator.num_samples > 0:
+            results_epoch = accumulator.compute()
+
+        if stopped:
+            if pending_step:
+                # the accumulated gradients of the interrupted window are not lost
+                if proximal is not None:
+                    apply_proximal(fabric, optimizer, proximal)
+                optimizer.step()
+            break
 
-                results_epoch[key] += value
+    if results_epoch is None:
+        # no batch trained (empty loader, no epoch) : zero metrics, as the test loop on an empty set
+        results_epoch = MetricAccumulator(keys, net.device).compute()
+
+    if stats is not None:
+        stats["train_samples"] = trained_samples
+        stats["train_steps"]   = trained_batches
+        stats["train_time"]    = time.perf_counter() - start
+        stats["epoch_steps"]   = num_batches
 
-        for key in results_epoch.keys():
-            results_epoch[key] /= len(trainloader)
-            results_epoch[key] = results_epoch[key].item()
     return results_epoch
 
 
-def test_loop(fabric, net, testloader):
+def test_loop(fabric, net, testloader, progress: bool = True):
     """Evaluate the network on the entire test set."""
-    # Alice: fabric is not used
     net.eval()
 
+    accumulator = MetricAccumulator(signature_keys(net), net.device)
+    precision = fabric.strategy.precision
+
     with torch.no_grad():
-        results_epoch = {
-            key: torch.tensor(0.0, device=net.device)
-            for key in net.signature.__required_keys__
-        }
-        for batch_idx, batch in track(
+        for batch_idx, batch in progress_track(
             enumerate(testloader),
             total=len(testloader),
             description="Validating...",
+            enabled=progress,
         ):
-            results = net.validation_step(batch, batch_idx)
-
-            for key in results_epoch.keys():
-                value = results[key]
+            batch = precision.convert_input(batch)
+            with fabric.autocast():
+                results = net.validation_step(batch, batch_idx)
 
-                # hardening code --- begin ---
-                if not isinstance(value, torch.Tensor):
-                    value = torch.tensor(value, device=net.device)
+            accumulator.update(results, batch_num_samples(batch))
 
-                if value.shape != results_epoch[key].shape:
-                    value = value.reshape(results_epoch[key].shape)
-                # hardening code --- end ---
-
-                results_epoch[key] += value
-
-    for key in results_epoch.keys():
-        results_epoch[key] /= len(testloader)
-        results_epoch[key] = results_epoch[key].item()
-    return results_epoch
+    return accumulator.compute()
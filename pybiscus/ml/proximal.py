@@ -0,0 +1,79 @@
+from typing import Optional
+
+import torch
+
+
+class ProximalTerm:
+    """FedProx proximal term mu/2 ||w - w_global||² of the local objective.
+
+    The global weights are snapshot into one flat tensor (allocated once, on the parameters device),
+    the parameters reaching it through views. The term is not added to the loss (no autograd graph
+    over all the parameters) : its gradient mu (w - w_global) is added to the gradients before each
+    optimizer step, by two fused (foreach) kernels and without temporary copy of the model.
+    Its value (a reported metric) is computed chunk by chunk, with at most CHUNK temporary elements.
+    """
+
+    # elements of w - w_global alive at once while computing the value
+    CHUNK: int = 2**20
+
+    def __init__(self, mu: float):
+        self.mu = mu
+        self.params: list[torch.Tensor] = []
+        self.flat: Optional[torch.Tensor] = None
+        self.snapshots: list[torch.Tensor] = []
+
+    def snapshot(self, params: list[torch.Tensor]) -> None:
+        """copy of the (global) weights the local training is kept close to"""
+
+        self.params = [ param for param in params if param.requires_grad ]
+        numel = sum(param.numel() for param in self.params)
+
+        if not self.params:
+            # nothing trained : no proximal term
+            self.flat, self.snapshots = None, []
+            return
+
+        if self.flat is None or self.flat.numel() != numel or self.flat.device != self.params[0].device:
+            self.flat = torch.empty(numel, dtype=self.params[0].dtype, device=self.params[0].device)
+            self.snapshots, offset = [], 0
+            for param in self.params:
+                self.snapshots.append(self.flat[offset:offset + param.numel()].view_as(param))
+                offset += param.numel()
+
+        with torch.no_grad():
+            torch._foreach_copy_(self.snapshots, [ param.detach() for param in self.params ])
+
+    @torch.no_grad()
+    def apply_(self) -> None:
+        """grad += mu (w - w_global), for the parameters having a gradient"""
+
+        if self.mu == 0:
+            return
+
+        pairs = [ (param.grad, snapshot) for param, snapshot in zip(self.params, self.snapshots) if param.grad is not None ]
+        if not pairs:
+            return
+
+        grads, snapshots = zip(*pairs)
+        params = [ param for param in self.params if param.grad is not None ]
+
+        torch._foreach_add_(list(grads), params, alpha=self.mu)
+        torch._foreach_add_(list(grads), list(snapshots), alpha=-self.mu)
+
+    @torch.no_grad()
+    def value(self) -> float:
+        """mu/2 ||w - w_global||²"""
+
+        if not self.params:
+            return 0.0
+
+        # sum of squares kept on the device, brought back to the host once
+        squares = torch.zeros((), dtype=torch.float64 if self.flat.device.type != "mps" else torch.float32, device=self.flat.device)
+
+        for param, snapshot in zip(self.params, self.snapshots):
+            param, snapshot = param.detach().reshape(-1), snapshot.reshape(-1)
+            for start in range(0, param.numel(), self.CHUNK):
+                difference = param[start:start + self.CHUNK] - snapshot[start:start + self.CHUNK]
+                squares += torch.linalg.vector_norm(difference) ** 2
+
+        return 0.5 * self.mu * float(squares)
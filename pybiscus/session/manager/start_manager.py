@@ -90,62 +90,133 @@ def ping_server():
 # *** Log management ***
 # **********************
 
-from threading import Lock
+import json
+from collections import deque
+from threading import Condition
 
-log_messages = []  # Liste pour stocker les messages
-log_lock = Lock()  # Verrou pour gérer l'accès concurrent aux messages
+from flask import Response
+
+class MessageRing:
+    """Bounded buffer of the received messages, numbered by a monotonically increasing sequence number.
+
+    Readers never consume the messages : each one keeps its own cursor (the last sequence number it got),
+    so several pages can follow the same run, and the memory stays bounded when nobody reads.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.messages  = deque(maxlen=capacity)
+        self.last_seq  = 0
+        self.condition = Condition()
+
+    def resize(self, capacity: int):
+        with self.condition:
+            self.messages = deque(self.messages, maxlen=capacity)
+
+    def extend(self, messages: list):
+        with self.condition:
+            for message in messages:
+                self.last_seq += 1
+                self.messages.append({'seq': self.last_seq, **message})
+            self.condition.notify_all()
+
+    def since(self, cursor: int) -> tuple[list, int]:
+        """the messages after cursor, and the number of them already dropped from the buffer"""
+
+        with self.condition:
+            cursor = min(max(cursor, 0), self.last_seq)
+            available = self.last_seq - cursor
+            messages = list(self.messages)[-available:] if available > 0 else []
+
+        missed = available - len(messages)
+        return messages, missed
+
+    def wait(self, cursor: int, timeout: float) -> bool:
+        """waits for a message after cursor, at most timeout seconds ; False on timeout"""
+
+        with self.condition:
+            return self.condition.wait_for(lambda: self.last_seq > cursor, timeout=timeout)
+
+log_ring     = MessageRing()
+metrics_ring = MessageRing()
+
+# comment line sent on an idle stream, so that proxies and browsers keep it open
+SSE_KEEPALIVE = 15.0
+
+def webhook_items(data):
+    """the messages of a webhook payload : a batch { 'source', 'batch': [...] } or a single message"""
+    return data.get('batch', [data])
+
+def cursor_argument() -> int:
+    """the reader cursor : on an EventSource reconnection its Last-Event-ID, else the 'since' query argument"""
+
+    cursor = request.headers.get('Last-Event-ID', request.args.get('since', 0))
+    try:
+        return int(cursor)
+    except ValueError:
+        return 0
+
+def get_messages(ring: MessageRing):
+    messages, missed = ring.since(cursor_argument())
+    return jsonify({'messages': messages, 'next': messages[-1]['seq'] if messages else ring.last_seq, 'missed': missed})
+
+def stream_messages(ring: MessageRing):
+    """server-sent events : one 'message' event per message (its id is the sequence number), and a 'missed'
+    event when the reader fell behind the buffer"""
+
+    cursor = cursor_argument()
+
+    def events():
+        nonlocal cursor
+        while True:
+            messages, missed = ring.since(cursor)
+
+            if missed:
+                yield f"event: missed\ndata: {missed}\n\n"
+
+            for message in messages:
+                yield f"id: {message['seq']}\ndata: {json.dumps(message)}\n\n"
+
+            if messages:
+                cursor = messages[-1]['seq']
+            else:
+                # a cursor ahead of the buffer (e.g. a manager restart) restarts from its end
+                cursor = min(cursor, ring.last_seq)
+                if not ring.wait(cursor, SSE_KEEPALIVE):
+                    yield ": keepalive\n\n"
+
+    return Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/webhook/logs', methods=['POST'])
 def receive_log():
     data = request.json
-    message = data.get('content', '')
     source = data.get('source', 'unknown')
-
-    # Verrouiller l'accès pour éviter les problèmes de concurrence
-    with log_lock:
-        global log_messages
-        log_messages.append({'source': source, 'message': message})
+    log_ring.extend([ {'source': source, 'message': item.get('content', '')} for item in webhook_items(data) ])
 
     return jsonify({"status": "success"}), 200
 
 @app.route('/logs', methods=['GET'])
 def get_logs():
+    return get_messages(log_ring)
 
-    with log_lock:
-        global log_messages
-        _log_messages = log_messages
-        log_messages = []
-
-    # Retourner les messages stockés sous forme de JSON
-    return jsonify(_log_messages)
-
-metrics_messages = []  # Liste pour stocker les messages
-metrics_lock = Lock()  # Verrou pour gérer l'accès concurrent aux messages
+@app.route('/logs/stream', methods=['GET'])
+def stream_logs():
+    return stream_messages(log_ring)
 
 @app.route('/webhook/metrics', methods=['POST'])
 def receive_metrics():
     data = request.json
-    metrics = data.get('metrics', '')
     source = data.get('source', 'unknown')
-    log = { 'source' : source, 'message' : str(metrics) }
-
-    # Verrouiller l'accès pour éviter les problèmes de concurrence
-    with metrics_lock:
-        global metrics_messages
-        metrics_messages.append(log)
+    metrics_ring.extend([ { 'source' : source, 'message' : str(item.get('metrics', '')) } for item in webhook_items(data) ])
 
     return jsonify({"status": "success"}), 200
 
 @app.route('/metrics', methods=['GET'])
 def get_metricss():
+    return get_messages(metrics_ring)
 
-    with metrics_lock:
-        global metrics_messages
-        _metrics_messages = metrics_messages
-        metrics_messages = []
-
-    # Retourner les messages stockés sous forme de JSON
-    return jsonify(_metrics_messages)
+@app.route('/metrics/stream', methods=['GET'])
+def stream_metrics():
+    return stream_messages(metrics_ring)
 
 
 def main():
@@ -155,11 +226,15 @@ def main():
     parser = argparse.ArgumentParser(description="Start the Federated Learning Manager Server.")
     parser.add_argument("--port", type=int, default=6000, help="Port to run the manager on")
     parser.add_argument("--server-url", type=str, required=True, help="URL of the central server (e.g. http://localhost:5555)")
+    parser.add_argument("--buffer-size", type=int, default=1000, help="Number of logs (and of metrics) kept for the readers")
     args = parser.parse_args()
 
     server_url = args.server_url
     manager_port=args.port
 
+    log_ring.resize(args.buffer_size)
+    metrics_ring.resize(args.buffer_size)
+
     print(f"🚀 Manager starting on port {manager_port}, connected to server: {server_url}")
     app.run(port=manager_port)
 
@@ -0,0 +1,154 @@
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+import numpy as np
+import torch
+from flwr.common import Code, FitRes, Status, ndarrays_to_parameters, parameters_to_ndarrays
+from flwr.server.client_manager import SimpleClientManager
+from flwr.server.client_proxy import ClientProxy
+from lightning.fabric import Fabric
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "pybiscus-plugins" / "strategy"))
+
+from fedbuff.fedbuffstrategy import FabricFedBuffStrategy, _Arrival, _BufferSlotProxy  # noqa: E402
+
+
+class FakeClientProxy(ClientProxy):
+    """fit returns fixed parameters, optionally once released"""
+
+    def __init__(self, cid: str, ndarrays, num_examples: int = 10, release: threading.Event = None):
+        super().__init__(cid)
+        self.ndarrays     = ndarrays
+        self.num_examples = num_examples
+        self.release      = release
+        self.fits         = 0
+
+    def fit(self, ins, timeout, group_id):
+        self.fits += 1
+        if self.release is not None:
+            self.release.wait(timeout=10)
+        return FitRes(Status(Code.OK, ""), ndarrays_to_parameters(self.ndarrays), self.num_examples, {})
+
+    def get_properties(self, ins, timeout, group_id):
+        raise NotImplementedError
+
+    def get_parameters(self, ins, timeout, group_id):
+        raise NotImplementedError
+
+    def evaluate(self, ins, timeout, group_id):
+        raise NotImplementedError
+
+    def reconnect(self, ins, timeout, group_id):
+        raise NotImplementedError
+
+
+def fedbuff_strategy(**kwargs) -> FabricFedBuffStrategy:
+    return FabricFedBuffStrategy(
+        model=torch.nn.Linear(2, 1),
+        fabric=Fabric(accelerator="cpu", devices=1),
+        evaluate_fn=None,
+        flower_fit_results_aggregator={ "name": "weightedaverage", "config": { "empty_configuration": True } },
+        **kwargs,
+    )
+
+
+def client_manager(proxies) -> SimpleClientManager:
+    manager = SimpleClientManager()
+    for proxy in proxies:
+        manager.register(proxy)
+    return manager
+
+
+def fedbuff_threads() -> list[threading.Thread]:
+    return [ thread for thread in threading.enumerate() if thread.name.startswith("pyb_fedbuff") ]
+
+
+class TestFedBuffAggregation(unittest.TestCase):
+
+    def test_stale_update_scaled_down_with_integer_weights(self):
+
+        strategy = fedbuff_strategy(buffer_size=2, staleness_exponent=1.0)
+        strategy._client_manager = client_manager([])
+
+        base    = [ np.zeros(2) ]
+        current = [ np.ones(2) ]
+        strategy._set_global(ndarrays_to_parameters(base), base)
+        strategy._in_flight[0] += 1
+        strategy._set_global(ndarrays_to_parameters(current), current)
+        strategy._in_flight[1] += 1
+
+        fresh = FakeClientProxy("fresh", [ np.full(2, 3.0) ], num_examples=10)
+        stale = FakeClientProxy("stale", [ np.full(2, 5.0) ], num_examples=30)
+
+        slots = []
+        for slot, (proxy, version) in enumerate([ (fresh, 1), (stale, 0) ]):
+            slots.append(_BufferSlotProxy(strategy, slot))
+            slots[-1].arrival = _Arrival(proxy=proxy, version=version, fit_res=proxy.fit(None, None, None))
+
+        weights  = []
+        aggregate = strategy.flower_fit_results_aggregator.aggregate
+
+        def spied_aggregate(server_round, results, failures):
+            weights.extend(fit_res.num_examples for _, fit_res in results)
+            return aggregate(server_round, results, failures)
+
+        strategy.flower_fit_results_aggregator.aggregate = spied_aggregate
+
+        parameters, metrics = strategy.aggregate_fit(1, [ (slot, slot.arrival.fit_res) for slot in slots ], [])
+
+        # staleness 1, exponent 1 : the stale update (5 - 0) is halved, then rebased onto the current model
+        expected = (10 * 3.0 + 30 * (1.0 + 0.5 * (5.0 - 0.0))) / 40
+        np.testing.assert_allclose(parameters_to_ndarrays(parameters)[0], np.full(2, expected))
+
+        self.assertEqual(weights, [ 10, 30 ])
+        self.assertTrue(all(isinstance(weight, int) for weight in weights))
+        self.assertEqual(metrics["staleness_max"], 1)
+
+        # the model the stale client started from is released
+        self.assertEqual(list(strategy._versions), [ 2 ])
+
+
+class TestFedBuffTrainings(unittest.TestCase):
+
+    def test_trainings_bounded_by_max_concurrency(self):
+
+        release = threading.Event()
+        proxies = [ FakeClientProxy(str(cid), [ np.zeros(2) ], release=release) for cid in range(3) ]
+
+        strategy = fedbuff_strategy(buffer_size=2, max_concurrency=1)
+        strategy.configure_fit(1, ndarrays_to_parameters([ np.zeros(2) ]), client_manager(proxies))
+
+        try:
+            self.assertEqual(len(strategy._busy), 1)
+            self.assertLessEqual(len(fedbuff_threads()), 1)
+        finally:
+            release.set()
+            strategy.close()
+
+    def test_close_waits_for_trainings_in_flight(self):
+
+        release = threading.Event()
+        proxies = [ FakeClientProxy(str(cid), [ np.zeros(2) ], release=release) for cid in range(2) ]
+
+        strategy = fedbuff_strategy(buffer_size=2)
+        strategy.configure_fit(1, ndarrays_to_parameters([ np.zeros(2) ]), client_manager(proxies))
+
+        self.assertEqual(len(strategy._busy), 2)
+
+        threading.Timer(0.2, release.set).start()
+        strategy.close()
+
+        # the trainings ended, and were not started again once closed
+        self.assertEqual([ proxy.fits for proxy in proxies ], [ 1, 1 ])
+        self.assertEqual(fedbuff_threads(), [])
+        self.assertEqual(strategy._versions, {})
+        self.assertEqual(strategy._busy, set())
+
+        # closing twice is a no-op
+        strategy.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+import numpy as np
+import torch
+from flwr.common import ndarrays_to_parameters
+
+from pybiscus.flower.flatparameters import FlatParametersLayout
+
+
+class TestFlatDtype(unittest.TestCase):
+
+    def test_widest_floating_dtype(self):
+
+        self.assertEqual(FlatParametersLayout.from_module(torch.nn.Linear(2, 1)).flat_dtype, np.float32)
+        self.assertEqual(FlatParametersLayout.from_module(torch.nn.Linear(2, 1).half()).flat_dtype, np.float16)
+        self.assertEqual(FlatParametersLayout.from_ndarrays([ np.zeros(2, np.float32), np.zeros(2, np.float64) ]).flat_dtype, np.float64)
+
+    def test_integer_layers_have_no_flat_dtype(self):
+
+        # batchnorm num_batches_tracked is int64
+        self.assertIsNone(FlatParametersLayout.from_module(torch.nn.BatchNorm1d(2)).flat_dtype)
+
+    def test_float64_layers_kept_exact_in_the_flat_buffer(self):
+
+        ndarrays = [ np.array([ 1 + 2**-40, 3.0 ]), np.array([ 0.5 ], dtype=np.float32) ]
+        layout   = FlatParametersLayout.from_ndarrays(ndarrays)
+
+        views = layout.views(layout.parameters_to_flat(ndarrays_to_parameters(ndarrays), dtype=layout.flat_dtype))
+
+        np.testing.assert_array_equal(views[0], ndarrays[0])
+        np.testing.assert_array_equal(views[1], ndarrays[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+
+import numpy as np
+import torch
+
+from pybiscus.ml.data.imagecache import CachedImageDataset
+
+MEAN = [ 0.5, 0.4, 0.3 ]
+STD  = [ 0.2, 0.25, 0.1 ]
+
+
+class TestRandomCrop(unittest.TestCase):
+
+    def test_padding_is_normalized_black(self):
+
+        torch.manual_seed(0)
+        images  = np.full((64, 3, 4, 4), 255, dtype=np.uint8)
+        dataset = CachedImageDataset(images, np.zeros(64), MEAN, STD, crop_padding=2)
+
+        x, _ = dataset.transform_batch((torch.from_numpy(images), torch.zeros(64)))
+
+        self.assertEqual(tuple(x.shape), (64, 3, 4, 4))
+
+        for channel, (mean, std) in enumerate(zip(MEAN, STD)):
+            values = np.unique(np.round(x[:, channel].numpy(), 4))
+            # padding pixels (raw black once normalized, present with 64 random crops), and white image pixels
+            np.testing.assert_allclose(values, [ -mean / std, (1 - mean) / std ], rtol=1e-4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+import torch
+
+from pybiscus.ml.proximal import ProximalTerm
+
+
+class TestProximalTerm(unittest.TestCase):
+
+    def test_value_computed_by_chunks(self):
+
+        torch.manual_seed(0)
+        model    = torch.nn.Linear(30, 20)
+        proximal = ProximalTerm(mu=0.1)
+        proximal.CHUNK = 7
+
+        proximal.snapshot(list(model.parameters()))
+        with torch.no_grad():
+            for param in model.parameters():
+                param.add_(torch.randn_like(param))
+
+        expected = 0.5 * 0.1 * sum(float(((param.detach() - snapshot) ** 2).sum())
+                                   for param, snapshot in zip(model.parameters(), proximal.snapshots))
+
+        self.assertAlmostEqual(proximal.value(), expected, places=3)
+
+    def test_no_trained_parameter(self):
+
+        proximal = ProximalTerm(mu=0.1)
+        proximal.snapshot([ torch.zeros(3) ])
+
+        self.assertEqual(proximal.value(), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
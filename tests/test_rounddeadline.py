@@ -0,0 +1,161 @@
+import threading
+import unittest
+
+import numpy as np
+from flwr.common import Code, FitIns, FitRes, Status, ndarrays_to_parameters
+from flwr.server.client_proxy import ClientProxy
+
+from pybiscus.flower.rounddeadline import RoundDeadline, RoundDeadlineMissed
+
+DEADLINE = 0.1
+
+
+class FakeClientProxy(ClientProxy):
+    """fit returns fixed parameters, once released if a release event is given"""
+
+    def __init__(self, cid: str, release: threading.Event = None):
+        super().__init__(cid)
+        self.release = release
+        self.fits    = 0
+
+    def fit(self, ins, timeout, group_id):
+        self.fits += 1
+        if self.release is not None:
+            self.release.wait(timeout=10)
+        return FitRes(Status(Code.OK, ""), ndarrays_to_parameters([ np.full(2, float(self.cid)) ]), 10, {})
+
+    def get_properties(self, ins, timeout, group_id):
+        raise NotImplementedError
+
+    def get_parameters(self, ins, timeout, group_id):
+        raise NotImplementedError
+
+    def evaluate(self, ins, timeout, group_id):
+        raise NotImplementedError
+
+    def reconnect(self, ins, timeout, group_id):
+        raise NotImplementedError
+
+
+def instructions(proxies) -> list[tuple[ClientProxy, FitIns]]:
+    return [ (proxy, FitIns(ndarrays_to_parameters([ np.zeros(2) ]), {})) for proxy in proxies ]
+
+
+def run_fits(wrapped) -> tuple[list, list]:
+    """the fits of the round, as the flower server gathers them"""
+
+    results, failures = [], []
+    for proxy, ins in wrapped:
+        try:
+            results.append((proxy, proxy.fit(ins, timeout=None, group_id=None)))
+        except RoundDeadlineMissed as e:
+            failures.append(e)
+    return results, failures
+
+
+def wait_finished(round_deadline: RoundDeadline, wrapped):
+    """blocks until every training of the round has returned (in time or late)"""
+
+    state = wrapped[0][0].state
+    with round_deadline._condition:
+        finished = round_deadline._condition.wait_for(lambda: state.finished == state.expected, timeout=10)
+    assert finished, "trainings of the round did not end"
+
+
+class TestRoundDeadline(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.fast    = FakeClientProxy("1")
+        self.slow    = FakeClientProxy("2", release=self.release)
+
+    def tearDown(self):
+        self.release.set()
+
+    def cut_first_round(self, round_deadline: RoundDeadline):
+        """round 1 : the fast client in time, the slow one past the cut"""
+
+        wrapped = round_deadline.configure(1, instructions([ self.fast, self.slow ]))
+        results, failures = run_fits(wrapped)
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(len(failures), 1)
+
+        results, failures, completion_times = round_deadline.collect(1, results, failures)
+
+        # the aggregated results are those of the real clients, the missed deadline is not a failure
+        self.assertEqual([ proxy for proxy, _ in results ], [ self.fast ])
+        self.assertEqual(failures, [])
+        self.assertEqual(list(completion_times), [ "1" ])
+
+        return wrapped
+
+    def test_late_result_carried_into_next_round(self):
+
+        round_deadline = RoundDeadline(DEADLINE, late_results="carry", client_time_budget=None)
+        wrapped = self.cut_first_round(round_deadline)
+
+        self.release.set()
+        wait_finished(round_deadline, wrapped)
+
+        wrapped = round_deadline.configure(2, instructions([ self.fast ]))
+        results, failures = run_fits(wrapped)
+        results, failures, _ = round_deadline.collect(2, results, failures)
+
+        self.assertEqual([ proxy for proxy, _ in results ], [ self.fast, self.slow ])
+        self.assertEqual(failures, [])
+
+        # carried once only
+        results, _, _ = round_deadline.collect(2, [], [])
+        self.assertEqual(results, [])
+
+    def test_late_result_dropped(self):
+
+        round_deadline = RoundDeadline(DEADLINE, late_results="drop", client_time_budget=None)
+        wrapped = self.cut_first_round(round_deadline)
+
+        self.release.set()
+        wait_finished(round_deadline, wrapped)
+
+        wrapped = round_deadline.configure(2, instructions([ self.fast ]))
+        results, failures = run_fits(wrapped)
+        results, failures, _ = round_deadline.collect(2, results, failures)
+
+        self.assertEqual([ proxy for proxy, _ in results ], [ self.fast ])
+        self.assertEqual(self.slow.fits, 1)
+
+    def test_busy_client_skipped_until_its_training_ends(self):
+
+        round_deadline = RoundDeadline(DEADLINE, client_time_budget=None)
+        self.cut_first_round(round_deadline)
+
+        # the slow client is still training : neither fitted nor evaluated
+        wrapped = round_deadline.configure(2, instructions([ self.fast, self.slow ]))
+        self.assertEqual([ proxy.cid for proxy, _ in wrapped ], [ "1" ])
+
+        run_fits(wrapped)
+        self.assertEqual(round_deadline.configure_evaluate(2, [ (self.fast, None), (self.slow, None) ]), [ (self.fast, None) ])
+
+        self.release.set()
+        wait_finished(round_deadline, wrapped)
+        with round_deadline._condition:
+            round_deadline._condition.wait_for(lambda: not round_deadline._busy, timeout=10)
+
+        # its training ended : selected again
+        wrapped = round_deadline.configure(3, instructions([ self.fast, self.slow ]))
+        self.assertEqual([ proxy.cid for proxy, _ in wrapped ], [ "1", "2" ])
+        run_fits(wrapped)
+
+        self.assertEqual(self.slow.fits, 2)
+
+    def test_client_time_budget_sent_with_the_instructions(self):
+
+        round_deadline = RoundDeadline(DEADLINE, client_time_budget=0.5)
+        wrapped = round_deadline.configure(1, instructions([ self.fast ]))
+
+        self.assertAlmostEqual(wrapped[0][1].config["time_budget"], DEADLINE * 0.5)
+        run_fits(wrapped)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+
+import torch
+from flwr.server.strategy import FedAvg
+
+from pybiscus.flower.servercheckpoint import ServerCheckpointStrategyDecorator, load_strategy_state, strategy_state
+from pybiscus.interfaces.flower.strategydecorator import StrategyDecorator
+
+
+class UserDecorator(StrategyDecorator):
+
+    def __init__(self, base_strategy, value=None):
+        super().__init__(base_strategy)
+        self.value = value
+
+    def state_dict(self) -> dict:
+        return { "value": self.value }
+
+    def load_state_dict(self, state: dict) -> None:
+        self.value = state["value"]
+
+
+class ReportingDecorator(StrategyDecorator):
+    """stateless, added after the restore (as the round history, tracing and prometheus decorators)"""
+
+
+class TestStrategyStateRoundTrip(unittest.TestCase):
+
+    def test_user_state_restored_below_reporting_decorators(self):
+
+        saved = ServerCheckpointStrategyDecorator(ReportingDecorator(UserDecorator(FedAvg(), value=3)), torch.nn.Linear(1, 1))
+        state = strategy_state(saved)
+
+        self.assertEqual(state["decorators"], [ { "name": "UserDecorator", "state": { "value": 3 } } ])
+
+        # restored before the reporting decorators are added
+        restored = UserDecorator(FedAvg())
+        load_strategy_state(restored, state)
+
+        self.assertEqual(restored.value, 3)
+
+    def test_same_decorators_restored_in_chain_order(self):
+
+        state = strategy_state(UserDecorator(ReportingDecorator(UserDecorator(FedAvg(), value=2)), value=1))
+
+        inner    = UserDecorator(FedAvg())
+        outer    = UserDecorator(inner)
+        load_strategy_state(outer, state)
+
+        self.assertEqual((outer.value, inner.value), (1, 2))
+
+    def test_removed_decorator_state_not_restored(self):
+
+        state = strategy_state(UserDecorator(FedAvg(), value=3))
+
+        restored = ReportingDecorator(FedAvg())
+        load_strategy_state(restored, state)
+
+        state = strategy_state(restored)
+        self.assertNotIn("decorators", state)
+
+    def test_decorators_not_restored_on_warm_start(self):
+
+        state = strategy_state(UserDecorator(FedAvg(), value=3))
+
+        restored = UserDecorator(FedAvg())
+        load_strategy_state(restored, state, decorators=False)
+
+        self.assertIsNone(restored.value)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+from flwr.common import Code, FitRes, Status, ndarrays_to_parameters, parameters_to_ndarrays
+
+from pybiscus.flower.flowerfitresultsaggregator.flowerfitresultsaggregatorusingserveroptimizer.flowerfitresultsaggregatorusingserveroptimizer import (
+    FlowerFitResultsAggregatorUsingFedAvgM,
+    FlowerFitResultsAggregatorUsingServerOptimizer,
+)
+
+
+def result(cid: str, ndarrays, num_examples: int):
+    return SimpleNamespace(cid=cid), FitRes(Status(Code.OK, ""), ndarrays_to_parameters(ndarrays), num_examples, {})
+
+
+class TestServerOptimizer(unittest.TestCase):
+
+    def test_step_is_abstract(self):
+
+        with self.assertRaises(TypeError):
+            FlowerFitResultsAggregatorUsingServerOptimizer(1.0)
+
+    def test_buffers_at_the_layout_dtype(self):
+
+        # without momentum and with a unit step size, FedAvgM is the weighted average
+        aggregator = FlowerFitResultsAggregatorUsingFedAvgM(server_learning_rate=1.0, server_momentum=0.0)
+
+        small  = 2**-40
+        counts = 2**40 + 1
+        aggregator.on_configure_fit(1, ndarrays_to_parameters([ np.zeros(2), np.array([ 0 ], dtype=np.int64) ]))
+
+        self.assertEqual(aggregator.current.dtype, np.float64)
+        self.assertEqual(aggregator.state["momentum"].dtype, np.float64)
+
+        parameters = aggregator.aggregate(1, [
+            result("1", [ np.full(2, 1 + small),     np.array([ counts ], dtype=np.int64) ], 10),
+            result("2", [ np.full(2, 1 + 3 * small), np.array([ counts ], dtype=np.int64) ], 10),
+        ], [])
+
+        layer, counter = parameters_to_ndarrays(parameters)
+        np.testing.assert_array_equal(layer, np.full(2, 1 + 2 * small))
+        self.assertEqual(counter.dtype, np.int64)
+        self.assertEqual(int(counter[0]), counts)
+
+    def test_no_example_no_step(self):
+
+        aggregator = FlowerFitResultsAggregatorUsingFedAvgM()
+        aggregator.on_configure_fit(1, ndarrays_to_parameters([ np.zeros(2, dtype=np.float32) ]))
+
+        self.assertIsNone(aggregator.aggregate(1, [ result("1", [ np.ones(2, dtype=np.float32) ], 0) ], []))
+        self.assertEqual(aggregator.steps, 0)
+        np.testing.assert_array_equal(aggregator.current, np.zeros(2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from pybiscus.core.metricslogger.sqlite.metricsstore import MetricsStore
+from pybiscus.core.metricslogger.sqlite.sqlitemetricslogger import SQLiteMetricsLogger
+
+
+def stored_rows(path) -> int:
+    store = MetricsStore(path, readonly=True)
+    try:
+        return store.connection.execute(f"SELECT COUNT(*) FROM {MetricsStore.TABLE}").fetchone()[0]
+    finally:
+        store.close()
+
+
+class TestSQLiteMetricsLogger(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "metrics.sqlite"
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_flushed_after_the_interval_without_further_call(self):
+
+        logger = SQLiteMetricsLogger(self.path, flush_interval=0.1)
+        logger.log_metrics({ "val_loss_glob": 1.0 }, step=1)
+
+        self.assertEqual(stored_rows(self.path), 0)
+
+        deadline = time.monotonic() + 5
+        while stored_rows(self.path) == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        self.assertEqual(stored_rows(self.path), 1)
+
+        logger.close()
+        self.assertFalse(any(thread.name == "pyb_sqlite_metrics" for thread in threading.enumerate()))
+
+    def test_flushed_at_each_call_without_interval(self):
+
+        logger = SQLiteMetricsLogger(self.path, flush_interval=0)
+        logger.log_metrics({ "val_loss_glob": 1.0 }, step=1)
+
+        self.assertEqual(stored_rows(self.path), 1)
+        self.assertIsNone(logger.thread)
+
+        logger.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+from flwr.common import Code, FitRes, Status, ndarrays_to_parameters, parameters_to_ndarrays
+
+from pybiscus.flower.flowerfitresultsaggregator.flowerfitresultsaggregatorusingstreamingweightedaverage.flowerfitresultsaggregatorusingstreamingweightedaverage import (
+    FlowerFitResultsAggregatorUsingStreamingWeightedAverage,
+    pyb_aggregate_streaming,
+)
+
+
+def client(cid: str) -> SimpleNamespace:
+    """the aggregator only reads the client id of the proxies"""
+    return SimpleNamespace(cid=cid)
+
+
+def fit_res(value: float, num_examples: int) -> FitRes:
+    return FitRes(Status(Code.OK, ""), ndarrays_to_parameters([ np.full(3, value, dtype=np.float32) ]), num_examples, {})
+
+
+class TestStreamingWeightedAverage(unittest.TestCase):
+
+    def test_weighted_average_releases_the_results(self):
+
+        results = [ (client("1"), fit_res(1.0, 10)), (client("2"), fit_res(4.0, 30)) ]
+
+        parameters = FlowerFitResultsAggregatorUsingStreamingWeightedAverage().aggregate(1, results, [])
+
+        layer = parameters_to_ndarrays(parameters)[0]
+        np.testing.assert_allclose(layer, np.full(3, (10 * 1.0 + 30 * 4.0) / 40))
+        self.assertEqual(layer.dtype, np.float32)
+
+        # released by default once folded
+        self.assertTrue(all(res.parameters.tensors == [] for _, res in results))
+
+    def test_no_example_not_aggregated(self):
+
+        results = [ (client("1"), fit_res(1.0, 0)), (client("2"), fit_res(4.0, 0)) ]
+
+        self.assertIsNone(pyb_aggregate_streaming(results))
+        self.assertIsNone(FlowerFitResultsAggregatorUsingStreamingWeightedAverage().aggregate(1, results, []))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import threading
+import time
+import unittest
+
+from pybiscus.core.webhooksender import WebHookSender
+
+
+class RecordingSender(WebHookSender):
+    """records the batches instead of POSTing them"""
+
+    def __init__(self, **kwargs):
+        super().__init__("http://localhost/webhook", "test", **kwargs)
+        self.batches = []
+        self.sent    = threading.Event()
+
+    def _send(self, batch: list[dict]) -> None:
+        self.batches.append((time.monotonic(), batch))
+        self.sent.set()
+
+
+class TestWebHookSender(unittest.TestCase):
+
+    def test_isolated_message_sent_one_interval_after_it_was_queued(self):
+
+        sender = RecordingSender(flush_interval=0.3)
+
+        # an idle sender thread, then an isolated message
+        sender.put({ "index": 0 })
+        self.assertTrue(sender.sent.wait(timeout=5))
+        sender.sent.clear()
+        time.sleep(0.45)
+
+        queued = time.monotonic()
+        sender.put({ "index": 1 })
+        self.assertTrue(sender.sent.wait(timeout=5))
+
+        sent, batch = sender.batches[-1]
+        self.assertEqual(batch, [ { "index": 1 } ])
+        self.assertLess(sent - queued, 0.3 + 0.2)
+
+        sender.close()
+
+    def test_messages_of_the_interval_gathered(self):
+
+        sender = RecordingSender(flush_interval=0.3)
+        for index in range(3):
+            sender.put({ "index": index })
+        sender.close()
+
+        self.assertEqual([ batch for _, batch in sender.batches ], [ [ { "index": index } for index in range(3) ] ])
+
+    def test_full_batch_and_flush_sent_without_waiting(self):
+
+        sender = RecordingSender(flush_interval=60, max_batch=2)
+
+        start = time.monotonic()
+        sender.put({ "index": 0 })
+        sender.put({ "index": 1 })
+        sender.put({ "index": 2 })
+        self.assertTrue(sender.flush(timeout=5))
+
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual([ len(batch) for _, batch in sender.batches ], [ 2, 1 ])
+
+        sender.close()
+
+
+if __name__ == "__main__":
+    unittest.main()